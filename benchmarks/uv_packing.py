@@ -0,0 +1,279 @@
+'''
+Benchmark and quality suite of the UV-packing used by the "Set minecraft UVs"
+operator. The script runs outside of Blender. It generates synthetic sets of
+cubes, plans their UVs with every packing strategy and records the time,
+the peak memory, the area of the texture and the fill ratio (the area of the
+faces of the cubes divided by the area of the texture).
+
+The results are compared with the baseline stored in
+uv_packing_baseline.json. A strategy that produces a larger texture than the
+baseline is a regression. The times are machine-dependent, so being slower
+than the baseline only produces a warning.
+
+Run with:
+```
+python benchmarks/uv_packing.py [--set NAME] [--strategy NAME] [--scale SCALE]
+    [--update-baseline]
+```
+The planner tests the boxes against every other box, so its running time
+grows quickly with the number of the cubes. The default sets are small
+enough to run the whole suite in a few seconds. The case with thousands of
+tiny cubes is opt-in. Run it with --set tiny_cubes --scale 25 (a thousand
+cubes) and with selected strategies. It takes about a minute for
+cube_expand, cube_power_of_two and per_face_expand. cube_multiple_of_16
+tests many widths of the texture and takes much longer. --scale multiplies
+the number of the cubes in any set. The baselines are stored separately for
+every number of cubes.
+'''
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+ROOT_PATH = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / 'uv_packing_baseline.json'
+
+TIME_TOLERANCE = 1.5
+'''How many times slower than the baseline the strategy can be.'''
+
+# width, depth, height of a cube
+CubeSize = Tuple[int, int, int]
+
+
+def load_uv_module() -> types.ModuleType:
+    '''
+    Imports the mcblend.operator_func.uv module without running the __init__
+    files of the addon (they depend on bpy). The benchmark doesn't depend on
+    the tests package, so it has its own loader.
+    '''
+    packages = [
+        ('mcblend', ROOT_PATH / 'mcblend'),
+        ('mcblend.operator_func', ROOT_PATH / 'mcblend' / 'operator_func')]
+    for name, path in packages:
+        if name not in sys.modules:
+            package = types.ModuleType(name)
+            package.__path__ = [str(path)]  # type: ignore
+            sys.modules[name] = package
+    return importlib.import_module('mcblend.operator_func.uv')
+
+uv = load_uv_module()
+
+
+# Synthetic sets of cubes
+def humanoid_rigs(count: int, seed: int = 0) -> List[CubeSize]:
+    '''
+    Cubes of humanoid models (head, body, arms and legs) with a few random
+    accessories.
+    '''
+    rng = random.Random(seed)
+    result: List[CubeSize] = []
+    for _ in range(count):
+        result.extend([
+            (8, 8, 8), (8, 4, 12), (4, 4, 12), (4, 4, 12), (4, 4, 12),
+            (4, 4, 12)])
+        for _ in range(rng.randint(2, 6)):
+            result.append((
+                rng.randint(1, 8), rng.randint(1, 8), rng.randint(1, 8)))
+    return result
+
+def voxel_props(count: int, seed: int = 0) -> List[CubeSize]:
+    '''Cubes of random sizes in range from 1 to 6 (voxel-style props).'''
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 6))
+        for _ in range(count)]
+
+def tiny_cubes(count: int, seed: int = 0) -> List[CubeSize]:
+    '''Large number of cubes with sizes 1 and 2.'''
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, 2), rng.randint(1, 2), rng.randint(1, 2))
+        for _ in range(count)]
+
+class BoxSet(NamedTuple):
+    '''A generator of the synthetic set of cubes.'''
+    generate: Callable[[int], List[CubeSize]]
+    default_count: int
+
+BOX_SETS: Dict[str, BoxSet] = {
+    'humanoid_rigs': BoxSet(humanoid_rigs, 3),
+    'voxel_props': BoxSet(voxel_props, 40),
+    'tiny_cubes': BoxSet(tiny_cubes, 40),
+}
+
+
+# Packing strategies
+def cube_boxes(cubes: List[CubeSize]) -> List[uv.UvBox]:
+    '''
+    Creates the UvBoxes that cover the standard Minecraft UV layout of the
+    cubes.
+    '''
+    return [uv.UvBox((2*d + 2*w, d + h)) for w, d, h in cubes]
+
+def face_boxes(cubes: List[CubeSize]) -> List[uv.UvBox]:
+    '''Creates separate UvBoxes for every face of the cubes.'''
+    result: List[uv.UvBox] = []
+    for w, d, h in cubes:
+        result.extend([
+            uv.UvBox((d, h)), uv.UvBox((w, h)), uv.UvBox((d, h)),
+            uv.UvBox((w, h)), uv.UvBox((w, d)), uv.UvBox((w, d))])
+    return result
+
+class Strategy(NamedTuple):
+    '''A way of packing the boxes.'''
+    create_boxes: Callable[[List[CubeSize]], List[uv.UvBox]]
+    size_mode: uv.TextureSizeMode
+
+STRATEGIES: Dict[str, Strategy] = {
+    'cube_expand': Strategy(cube_boxes, uv.TextureSizeMode.EXPAND),
+    'cube_power_of_two': Strategy(
+        cube_boxes, uv.TextureSizeMode.POWER_OF_TWO),
+    'cube_multiple_of_16': Strategy(
+        cube_boxes, uv.TextureSizeMode.MULTIPLE_OF_16),
+    'per_face_expand': Strategy(face_boxes, uv.TextureSizeMode.EXPAND),
+}
+
+
+def plan(cubes: List[CubeSize], strategy: Strategy) -> Tuple[int, int, int]:
+    '''
+    Plans the UV of the cubes using the strategy.
+
+    :returns: the width and the height of the texture and the area covered
+        by the faces of the cubes.
+    '''
+    # Start with small texture to let the strategies pick the size
+    mapper = uv.UvMapper(16, 16)
+    mapper.uv_boxes = strategy.create_boxes(cubes)
+    if strategy.size_mode == uv.TextureSizeMode.EXPAND:
+        mapper.plan_uv(True)
+        used_width, used_height = mapper.used_space()
+        width = max(mapper.width, used_width)
+        height = max(mapper.height, used_height)
+    else:
+        mapper.plan_uv_minimal_size(strategy.size_mode)
+        width, height = mapper.width, mapper.height
+    faces_area = sum(2*(w*h + d*h + w*d) for w, d, h in cubes)
+    return width, height, faces_area
+
+def run_benchmark(cubes: List[CubeSize], strategy: Strategy) -> Dict:
+    '''
+    Runs single benchmark and returns its results as a dictionary.
+    '''
+    start = time.perf_counter()
+    width, height, faces_area = plan(cubes, strategy)
+    wall_time = time.perf_counter() - start
+
+    # Measured in separate run because tracing slows down the execution
+    tracemalloc.start()
+    plan(cubes, strategy)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'width': width,
+        'height': height,
+        'area': width*height,
+        'fill_ratio': round(faces_area/(width*height), 4),
+        'time': round(wall_time, 4),
+        'peak_memory': peak_memory,
+    }
+
+def compare_with_baseline(
+        name: str, result: Dict, baseline: Dict) -> Tuple[List[str], bool]:
+    '''
+    Compares the result of a benchmark with the baseline.
+
+    :returns: the list of messages and a flag which is True if the result is
+        a regression.
+    '''
+    if name not in baseline:
+        return [f'{name}: no baseline'], False
+    base = baseline[name]
+    messages = []
+    is_regression = False
+    if result['area'] > base['area']:
+        messages.append(
+            f'{name}: REGRESSION texture area {result["area"]} > '
+            f'{base["area"]}')
+        is_regression = True
+    elif result['area'] < base['area']:
+        messages.append(
+            f'{name}: texture area improved {result["area"]} < '
+            f'{base["area"]}')
+    if result['time'] > base['time'] * TIME_TOLERANCE:
+        messages.append(
+            f'{name}: WARNING slower than baseline {result["time"]}s > '
+            f'{base["time"]}s')
+    return messages, is_regression
+
+def main():
+    '''Main function.'''
+    parser = argparse.ArgumentParser(description=(
+        'Benchmark of the UV-packing of Mcblend.'))
+    parser.add_argument(
+        '--set', action='append', choices=list(BOX_SETS), dest='sets',
+        help='the set of boxes to test (all by default)')
+    parser.add_argument(
+        '--strategy', action='append', choices=list(STRATEGIES),
+        dest='strategies', help='the packing strategy (all by default)')
+    parser.add_argument(
+        '--scale', type=float, default=1.0,
+        help=(
+            'multiplies the number of the cubes in the sets (the cases with '
+            'thousands of cubes are opt-in, e.g. --set tiny_cubes --scale '
+            '25)'))
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='saves the results as the new baseline')
+    args = parser.parse_args()
+    sets = args.sets or list(BOX_SETS)
+    strategies = args.strategies or list(STRATEGIES)
+
+    baseline: Dict[str, Dict] = {}
+    if BASELINE_PATH.exists():
+        with BASELINE_PATH.open('r') as f:
+            baseline = json.load(f)
+
+    print(
+        f'{"benchmark":<40}{"size":>12}{"fill":>8}{"time [s]":>10}'
+        f'{"peak [KiB]":>12}')
+    results: Dict[str, Dict] = {}
+    messages: List[str] = []
+    has_regression = False
+    for set_name in sets:
+        count = max(1, int(BOX_SETS[set_name].default_count * args.scale))
+        cubes = BOX_SETS[set_name].generate(count)
+        for strategy_name in strategies:
+            name = f'{set_name}[{count}]/{strategy_name}'
+            result = run_benchmark(cubes, STRATEGIES[strategy_name])
+            results[name] = result
+            size = f'{result["width"]}x{result["height"]}'
+            print(
+                f'{name:<40}{size:>12}{result["fill_ratio"]:>8.3f}'
+                f'{result["time"]:>10.3f}'
+                f'{result["peak_memory"]/1024:>12.1f}', flush=True)
+            curr_messages, is_regression = compare_with_baseline(
+                name, result, baseline)
+            messages.extend(curr_messages)
+            has_regression = has_regression or is_regression
+    for message in messages:
+        print(message)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with BASELINE_PATH.open('w') as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+        print(f'Baseline saved to {BASELINE_PATH}')
+    elif has_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+'''
+Import model from source_path with shared meshes of the identical cubes,
+save the names of the meshes of the cubes to target_path and export the
+model to export_path.
+
+This script is used for testing the import with shared meshes.
+'''
+import sys
+import json
+import bpy
+
+
+# Collect arguments after "--"
+argv = sys.argv
+argv = argv[argv.index("--") + 1:]
+
+
+def main(source_path: str, target_path: str, export_path: str):
+    # Remove all starting objects
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete(use_global=False)
+
+    # Load model from source file
+    bpy.ops.object.nusiq_mcblend_import_operator(
+        filepath=source_path, replace_bones_with_empties=True,
+        share_cube_meshes=True)
+    cubes = sorted(
+        [obj for obj in bpy.data.objects if obj.type == 'MESH'],
+        key=lambda obj: obj.name)
+    with open(target_path, 'w') as f:
+        json.dump([obj.data.name for obj in cubes], f)
+
+    # Save model to target file
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.nusiq_mcblend_export_operator(filepath=export_path)
+
+
+if __name__ == "__main__":
+    main(argv[0], argv[1], argv[2])
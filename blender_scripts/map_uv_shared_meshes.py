@@ -0,0 +1,55 @@
+'''
+Import model from source_path with shared meshes of the identical cubes, map
+the UV of the first cube and save the UV layers of all of the cubes to
+target_path.
+
+This script is used for testing the UV-mapping of the cubes that share
+meshes.
+'''
+import sys
+import json
+import bpy
+
+
+# Collect arguments after "--"
+argv = sys.argv
+argv = argv[argv.index("--") + 1:]
+
+
+def main(source_path: str, target_path: str):
+    # Remove all starting objects
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete(use_global=False)
+
+    # Load model from source file
+    bpy.ops.object.nusiq_mcblend_import_operator(
+        filepath=source_path, replace_bones_with_empties=True,
+        share_cube_meshes=True)
+    cubes = sorted(
+        [obj for obj in bpy.data.objects if obj.type == 'MESH'],
+        key=lambda obj: obj.name)
+    shared_before = [obj.data.users for obj in cubes]
+
+    # Map only the first cube
+    bpy.ops.object.select_all(action='DESELECT')
+    cubes[0].select_set(True)
+    bpy.context.view_layer.objects.active = cubes[0]
+    bpy.ops.object.nusiq_mcblend_map_uv_operator()
+
+    result = {
+        'shared_before': shared_before,
+        'cubes': [
+            {
+                'name': obj.name,
+                'mesh': obj.data.name,
+                'uv_layers': len(obj.data.uv_layers),
+            }
+            for obj in cubes
+        ]
+    }
+    with open(target_path, 'w') as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main(argv[0], argv[1])
@@ -11,6 +11,7 @@ from bpy.props import (
 from .operator import (
     OBJECT_OT_NusiqMcblendExportModelOperator, OBJECT_OT_NusiqMcblendExportAnimationOperator,
     OBJECT_OT_NusiqMcblendMapUvOperator, OBJECT_OT_NusiqMcblendUvGroupOperator,
+    OBJECT_OT_NusiqMcblendRepaintTemplateOperator,
     OBJECT_OT_NusiqMcblendClearUvGroupOperator,
     OBJECT_OT_NusiqMcblendToggleIsBoneOperator,
     OBJECT_OT_NusiqMcblendToggleMirrorOperator,
@@ -19,6 +20,11 @@ from .operator import (
     OBJECT_OT_NusiqMcblendRoundDimensionsOperator,
     OBJECT_OT_NusiqMcblendSeparateMeshCubesOperator,
     OBJECT_OT_NusiqMcblendImport, menu_func_nusiq_mcblend_import,
+    OBJECT_OT_NusiqMcblendBatchImport, menu_func_nusiq_mcblend_batch_import,
+    OBJECT_OT_NusiqMcblendImportAnimationOperator,
+    menu_func_nusiq_mcblend_import_animation,
+    OBJECT_OT_NusiqMcblendClearImportCache,
+    OBJECT_OT_NusiqMcblendInvalidateImportCache,
 
     OBJECT_OT_NusiqMcblendListAnimations,
     OBJECT_OT_NusiqMcblendAddAnimation,
@@ -100,6 +106,7 @@ classes = (
     OBJECT_PT_NusiqMcblendExportAnimationPanel,
     OBJECT_PT_NusiqMcblendExportPanel,
     OBJECT_OT_NusiqMcblendMapUvOperator,
+    OBJECT_OT_NusiqMcblendRepaintTemplateOperator,
     OBJECT_PT_NusiqMcblendSetUvsPanel,
     OBJECT_OT_NusiqMcblendUvGroupOperator,
     OBJECT_OT_NusiqMcblendClearUvGroupOperator,
@@ -110,6 +117,10 @@ classes = (
     OBJECT_OT_NusiqMcblendRoundDimensionsOperator,
     OBJECT_OT_NusiqMcblendSeparateMeshCubesOperator,
     OBJECT_OT_NusiqMcblendImport,
+    OBJECT_OT_NusiqMcblendBatchImport,
+    OBJECT_OT_NusiqMcblendImportAnimationOperator,
+    OBJECT_OT_NusiqMcblendClearImportCache,
+    OBJECT_OT_NusiqMcblendInvalidateImportCache,
     OBJECT_PT_NusiqMcblendImportPanel,
     OBJECT_PT_NusiqMcblendUVGroupPanel,
     OBJECT_UL_NusiqMcblendUVGroupList,
@@ -198,6 +209,12 @@ def register():
     bpy.types.TOPBAR_MT_file_import.append(
         menu_func_nusiq_mcblend_import
     )
+    bpy.types.TOPBAR_MT_file_import.append(
+        menu_func_nusiq_mcblend_batch_import
+    )
+    bpy.types.TOPBAR_MT_file_import.append(
+        menu_func_nusiq_mcblend_import_animation
+    )
 
 def unregister():
     '''Unregisters the plugin'''
@@ -214,3 +231,9 @@ def unregister():
     bpy.types.TOPBAR_MT_file_import.remove(
         menu_func_nusiq_mcblend_import
     )
+    bpy.types.TOPBAR_MT_file_import.remove(
+        menu_func_nusiq_mcblend_batch_import
+    )
+    bpy.types.TOPBAR_MT_file_import.remove(
+        menu_func_nusiq_mcblend_import_animation
+    )
@@ -14,6 +14,7 @@ from bpy.props import (
 from .operator_func.texture_generator import (
     list_mask_types_as_blender_enum, UvMaskTypes,
     list_mix_mask_modes_as_blender_enum)
+from .operator_func.uv import list_texture_size_modes_as_blender_enum
 from .operator_func.common import MeshType
 
 # UV-mask stripe properties
@@ -334,6 +335,20 @@ class OBJECT_NusiqMcblendObjectProperties(bpy.types.PropertyGroup):
     )
     mesh_type: EnumProperty(  # type: ignore
         items=list_mesh_types_as_blender_enum, name='Mesh type')
+    texture_page: IntProperty(  # type: ignore
+        name="Texture page",
+        description=(
+            "The page of the texture atlas used by this object. Set during "
+            "UV-mapping."),
+        default=0, min=0
+    )
+    painted_uv_masks: StringProperty(  # type: ignore
+        name="Painted UV masks",
+        description=(
+            "The hash of the masks used for the last painting of the "
+            "template texture of this object."),
+        default=""
+    )
 
 # Animation sound and particle effects
 class EffectTypes(Enum):
@@ -596,13 +611,86 @@ class OBJECT_NusiqMcblendExporterProperties(bpy.types.PropertyGroup):
         min=1,
         soft_max=5,
     )
+    texture_generation_threads: IntProperty(  # type: ignore
+        name="Texture generation threads",
+        description=(
+            "The number of the threads used for painting the template "
+            "texture. The value of 0 uses the number of the processors."),
+        default=0,
+        min=0,
+        soft_max=32,
+    )
+    template_png_path: StringProperty(  # type: ignore
+        name="Template PNG path",
+        description=(
+            "Saves the generated template texture to this PNG file. The "
+            "additional pages of the texture atlas get the number of the "
+            "page added to the name of the file. Leave empty to disable."),
+        default="",
+        subtype='FILE_PATH',
+    )
+    reuse_template_image: BoolProperty(  # type: ignore
+        name="Reuse template image",
+        description=(
+            "Writes the generated texture into the existing template image "
+            "if it has the right size instead of replacing it with a new "
+            "image."),
+        default=True,
+    )
+    template_png_only: BoolProperty(  # type: ignore
+        name="Only PNG",
+        description=(
+            "Saves the template texture only to the PNG file without "
+            "creating the Blender image."),
+        default=False,
+    )
+    texture_atlas: BoolProperty(  # type: ignore
+        name="Texture atlas",
+        description=(
+            "Limits the size of the texture to the texture width and height "
+            "and moves the objects that don't fit to additional textures "
+            "(pages). Each page is exported as a separate geometry."),
+        default=False,
+    )
     allow_expanding: BoolProperty(  # type: ignore
         name="Allow Texture Expanding",
         description="Allows expanding texture during texture generation.",
         default=True,
     )
+    texture_size_mode: EnumProperty(  # type: ignore
+        items=list_texture_size_modes_as_blender_enum,
+        name='Texture size mode',
+        description=(
+            "Defines how the texture is expanded. \"Expand\" - expands the "
+            "texture only when it's necessary. Other modes search for the "
+            "smallest texture with the width and the height matching the "
+            "mode."))
     generate_texture: BoolProperty(  # type: ignore
         name="Generate texture",
         description="Generates texture during UV mapping.",
         default=True,
     )
+    auto_uv_sharing: BoolProperty(  # type: ignore
+        name="Automatic UV sharing",
+        description=(
+            "Maps the cubes with the same dimensions and the same masks "
+            "(UV-group masks) to the same space on the texture. Mirrored "
+            "cubes use their mirror property to flip the shared UV."),
+        default=False,
+    )
+    per_face_uv_packing: BoolProperty(  # type: ignore
+        name="Per-face UV packing",
+        description=(
+            "Maps every face of the cubes independently. Results in "
+            "denser textures but the model is exported with per-face "
+            "UV-mapping."),
+        default=False,
+    )
+    import_cache_directory: StringProperty(  # type: ignore
+        name="Import cache directory",
+        description=(
+            "The directory of the import cache. Leave empty to use the "
+            "default directory in the temporary files."),
+        default="",
+        subtype='DIR_PATH',
+    )
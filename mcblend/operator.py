@@ -3,29 +3,143 @@ This module contains all of the operators.
 '''
 # don't import future annotations Blender needs that
 import json
+import os
 from json.decoder import JSONDecodeError
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Optional, Dict, Set, Tuple, Type
 
 import bpy_types
 import bpy
 from bpy.props import (
-    StringProperty, FloatProperty, EnumProperty, BoolProperty, IntProperty)
+    StringProperty, FloatProperty, EnumProperty, BoolProperty, IntProperty,
+    CollectionProperty)
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 from .custom_properties import (
     get_unused_event_name, list_effect_types_as_blender_enum)
 from .operator_func import (
-    export_model, export_animation, separate_mesh_cubes, set_uvs, round_dimensions,
-    import_model, inflate_objects)
+    export_model, iter_export_animation, separate_mesh_cubes, set_uvs,
+    round_dimensions, iter_import_model, iter_import_model_cached,
+    import_models, import_animations, inflate_objects, repaint_template,
+    get_import_cache_directory, IMPORT_EXCEPTIONS)
 from .operator_func.json_tools import CompactEncoder
 from .operator_func.exception import (
-    NameConflictException, NotEnoughTextureSpace,)
+    NameConflictException, NotEnoughTextureSpace,
+    FileIsNotAnAnimationException, FileIsNotAModelException)
 from .operator_func.jsonc_decoder import JSONCDecoder
+from .operator_func.scheduler import ChunkedTask, TaskSteps
+from .operator_func.import_cache import clear_cache, invalidate_source
+from .operator_func.geometry_index import index_geometries
 from .operator_func.texture_generator import (
     list_mask_types_as_blender_enum, UvMaskTypes, MixMaskMode)
 
 from .custom_properties import get_unused_uv_group_name
 
+class ChunkedTaskOperatorMixin:
+    '''
+    Mixin for the operators that run their work as a :class:`ChunkedTask`.
+    The task runs in the timer events of the modal operator so Blender stays
+    responsive. The progress is shown with the progress indicator of the
+    window manager and pressing Esc cancels the task (the task cleans up its
+    partial results). The other input events are blocked while the task is
+    running, so the user can't change the scene that the task works on.
+    Without a window (e.g. in the background mode) the task runs at once.
+
+    The operators implement get_task_steps and on_task_finished and call
+    run_task in their execute method. The exceptions from task_exceptions
+    are handled by on_task_failed (by default reported as errors that cancel
+    the operator).
+    '''
+    # pylint: disable=no-member
+    task_exceptions: Tuple[Type[Exception], ...] = ()
+
+    def get_task_steps(self, context: bpy_types.Context) -> TaskSteps:
+        '''
+        Returns the generator with the steps of the task.
+
+        :param context: the context for the steps of the task.
+        '''
+        raise NotImplementedError()
+
+    def on_task_finished(
+            self, context: bpy_types.Context, result: Any) -> Set[str]:
+        '''
+        Called with the result of the finished task. Returns the result of
+        the operator.
+        '''
+        # pylint: disable=unused-argument
+        return {'FINISHED'}
+
+    def on_task_failed(
+            self, context: bpy_types.Context, exception: Exception
+        ) -> Set[str]:
+        '''
+        Called with the exception from task_exceptions that stopped the
+        task. Returns the result of the operator.
+        '''
+        # pylint: disable=unused-argument
+        self.report({'ERROR'}, str(exception))
+        return {'CANCELLED'}
+
+    def run_task(
+            self, context: bpy_types.Context, modal: bool = True) -> Set[str]:
+        '''
+        Runs the task. The execute method returns the result of this
+        function.
+
+        :param context: the context of running the operator.
+        :param modal: whether to run the task in the modal mode (if the
+            operator runs in a window).
+        '''
+        if not modal or context.window is None:
+            try:
+                result = ChunkedTask(self.get_task_steps(context)).run()
+            except self.task_exceptions as e:
+                return self.on_task_failed(context, e)
+            return self.on_task_finished(context, result)
+        # The context passed to execute is valid only during the call, the
+        # steps running in the modal method use bpy.context
+        self._task = ChunkedTask(self.get_task_steps(bpy.context))
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(
+            0.01, window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context: bpy_types.Context, event: bpy.types.Event):
+        '''Runs a chunk of the task in every timer event.'''
+        if event.type == 'ESC':
+            self._end_task(context, cancel=True)
+            self.report({'INFO'}, 'Cancelled')
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            # Block the input, the task can't run on a changed scene
+            return {'RUNNING_MODAL'}
+        try:
+            finished = self._task.run_chunk()
+        except self.task_exceptions as e:
+            self._end_task(context)
+            return self.on_task_failed(context, e)
+        except BaseException:
+            self._end_task(context)
+            raise
+        context.window_manager.progress_update(
+            round(self._task.progress * 100))
+        if not finished:
+            return {'RUNNING_MODAL'}
+        self._end_task(context)
+        return self.on_task_finished(context, self._task.result)
+
+    def _end_task(self, context: bpy_types.Context, cancel: bool = False):
+        '''
+        Removes the timer and the progress indicator and optionally cancels
+        the task.
+        '''
+        if cancel:
+            self._task.cancel()
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
+
 # Model exporter
 class OBJECT_OT_NusiqMcblendExportModelOperator(
         bpy.types.Operator, ExportHelper):
@@ -87,7 +201,7 @@ def menu_func_nusiq_mcblend_export_model(self, context):
 
 # Animation exporter
 class OBJECT_OT_NusiqMcblendExportAnimationOperator(
-        bpy.types.Operator, ExportHelper):
+        ChunkedTaskOperatorMixin, bpy.types.Operator, ExportHelper):
     '''Operator used for exporting Minecraft animations from blender.'''
     # pylint: disable=unused-argument, no-member
     bl_idname = "object.nusiq_mcblend_export_animation_operator"
@@ -107,6 +221,17 @@ class OBJECT_OT_NusiqMcblendExportAnimationOperator(
         maxlen=1000
     )
 
+    show_progress: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Exports the animation in small parts and shows the progress. '
+            'Blender stays responsive and the export can be cancelled with '
+            'Esc'),
+        name='Show progress'
+    )
+
+    task_exceptions = (NameConflictException,)
+
     @classmethod
     def poll(cls, context: bpy_types.Context):
         if context.mode != 'OBJECT':
@@ -127,16 +252,21 @@ class OBJECT_OT_NusiqMcblendExportAnimationOperator(
                 old_dict = json.load(f, cls=JSONCDecoder)
         except (json.JSONDecodeError, OSError):
             pass
+        self._old_dict = old_dict
+        return self.run_task(context, self.show_progress)
 
-        try:
-            animation_dict = export_animation(context, old_dict)
-        except NameConflictException as e:
-            self.report({'WARNING'}, str(e))
-            return {'FINISHED'}
+    def get_task_steps(self, context):
+        return iter_export_animation(context, self._old_dict)
+
+    def on_task_failed(self, context, exception):
+        # Name conflicts are only a warning (nothing is saved)
+        self.report({'WARNING'}, str(exception))
+        return {'FINISHED'}
 
+    def on_task_finished(self, context, result):
         # Save file and finish
         with open(self.filepath, 'w') as f:
-            json.dump(animation_dict, f, cls=CompactEncoder)
+            json.dump(result, f, cls=CompactEncoder)
         self.report({'INFO'}, f'Animation saved in {self.filepath}.')
         return {'FINISHED'}
 
@@ -182,7 +312,7 @@ class OBJECT_OT_NusiqMcblendMapUvOperator(bpy.types.Operator):
                         "Negative object scale is not supported. "
                         f"Object: {obj.name}; Frame: 0.")
                     return {'FINISHED'}
-            set_uvs(context)
+            shared_area, pages = set_uvs(context)
         except NotEnoughTextureSpace:
             self.report(
                 {'ERROR'},
@@ -196,10 +326,51 @@ class OBJECT_OT_NusiqMcblendMapUvOperator(bpy.types.Operator):
 
         width = context.scene.nusiq_mcblend.texture_width
         height = context.scene.nusiq_mcblend.texture_height
-        self.report(
-            {'INFO'},
-            f'UV map created successfully for {width}x{height} texture.'
-        )
+        message = f'UV map created successfully for {width}x{height} texture.'
+        if pages > 1:
+            message += f' The texture has {pages} pages.'
+        if context.scene.nusiq_mcblend.auto_uv_sharing:
+            message += (
+                f' Sharing the UV saved {shared_area} pixels of the texture.')
+        self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+class OBJECT_OT_NusiqMcblendRepaintTemplateOperator(bpy.types.Operator):
+    '''
+    Operator used for painting the template texture again without changing
+    the UV-mapping.
+    '''
+    # pylint: disable=unused-argument, no-member
+    bl_idname = "object.nusiq_mcblend_repaint_template_operator"
+    bl_label = "Repaint template texture."
+    bl_options = {'REGISTER', 'UNDO'}
+    bl_description = (
+        "Paints the template texture again using the current UV-mapping of "
+        "the selected objects."
+    )
+
+    only_changed: BoolProperty(  # type: ignore
+        name='Only changed',
+        description=(
+            'Repaints only the cubes with the masks changed since the last '
+            'painting.'),
+        default=True)
+
+    @classmethod
+    def poll(cls, context: bpy_types.Context):
+        if context.mode != 'OBJECT':
+            return False
+        if len(context.selected_objects) < 1:
+            return False
+        return True
+
+    def execute(self, context):
+        try:
+            counter = repaint_template(context, self.only_changed)
+        except NameConflictException as e:
+            self.report({'WARNING'}, str(e))
+            return {'FINISHED'}
+        self.report({'INFO'}, f'Repainted {counter} cubes.')
         return {'FINISHED'}
 
 # UV grouping
@@ -486,7 +657,53 @@ class OBJECT_OT_NusiqMcblendSeparateMeshCubesOperator(bpy.types.Operator):
         return {'FINISHED'}
 
 # Model Importer
-class OBJECT_OT_NusiqMcblendImport(bpy.types.Operator, ImportHelper):
+# The item of the geometry picker which uses the "Geometry name" property
+_GEOMETRY_NAME_ITEM = (
+    '*', 'Use "Geometry name"',
+    'Import the geometry from the "Geometry name" property')
+# The items of the geometry picker of the last indexed file keyed by the path,
+# the modification time and the size of the file. Blender needs the Python
+# references to the items of the dynamic enums.
+_geometry_picker_items: Dict[
+    Tuple[str, float, int], List[Tuple[str, str, str]]] = {}
+
+def _list_geometry_picker_items(
+        filepath: str) -> List[Tuple[str, str, str]]:
+    '''
+    Returns the items of the geometry picker for the model file. The file is
+    indexed without loading its geometries (see index_geometries).
+
+    :param filepath: the path to the model file.
+    '''
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return [_GEOMETRY_NAME_ITEM]
+    key = (filepath, stat.st_mtime, stat.st_size)
+    if key not in _geometry_picker_items:
+        items = [_GEOMETRY_NAME_ITEM]
+        try:
+            with open(filepath, 'rb') as f:
+                index = index_geometries(f.read())
+        except (OSError, FileIsNotAModelException):
+            index = None
+        if index is not None:
+            identifiers: Set[str] = set()
+            for entry in index.geometries:
+                if entry.identifier in identifiers:
+                    continue
+                identifiers.add(entry.identifier)
+                items.append((
+                    entry.identifier,
+                    f'{entry.identifier} ({entry.bone_count} bones, '
+                    f'{entry.cube_count} cubes)',
+                    f'Import {entry.identifier}'))
+        _geometry_picker_items.clear()
+        _geometry_picker_items[key] = items
+    return _geometry_picker_items[key]
+
+class OBJECT_OT_NusiqMcblendImport(
+        ChunkedTaskOperatorMixin, bpy.types.Operator, ImportHelper):
     '''Operator used for importing Minecraft models to Blender.'''
     # pylint: disable=unused-argument, no-member
     bl_idname = "object.nusiq_mcblend_import_operator"
@@ -507,28 +724,311 @@ class OBJECT_OT_NusiqMcblendImport(bpy.types.Operator, ImportHelper):
         name='Geometry name'
     )
 
+    def _list_geometries(self, context):
+        # pylint: disable=unused-argument
+        return _list_geometry_picker_items(self.filepath)
+    geometry_picker: EnumProperty(  # type: ignore
+        items=_list_geometries, name='Geometry',
+        description='The geometry from the selected file to import'
+    )
+
     replace_bones_with_empties: BoolProperty(  # type: ignore
         default=False,
         description='Creates empties instead of armature and bones',
         name='Replace bones with empties'
     )
 
+    share_cube_meshes: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Identical cubes use the same mesh. Reduces the memory usage '
+            'of the models with many identical cubes'),
+        name='Share meshes of identical cubes'
+    )
+
+    trusted_input: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Skips the validation of the model. Use only for the models '
+            'exported by Mcblend'),
+        name='Trusted input'
+    )
+
+    show_progress: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Imports the model in small parts and shows the progress. '
+            'Blender stays responsive and the import can be cancelled with '
+            'Esc (the imported objects are removed)'),
+        name='Show progress'
+    )
+
+    use_cache: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Loads the model from the import cache if it was imported '
+            'before from the same file with the same options. Otherwise '
+            'imports the model into a new collection and saves it in the '
+            'cache'),
+        name='Use import cache'
+    )
+
+    link_cached: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Links the model from the import cache as a collection '
+            'instance instead of appending it'),
+        name='Link from cache'
+    )
+
+    task_exceptions = IMPORT_EXCEPTIONS
+
+    def execute(self, context):
+        with open(self.filepath, 'rb') as f:
+            self._source = f.read()
+        self._geometry_name = self.geometry_name
+        if self.geometry_picker not in ('', _GEOMETRY_NAME_ITEM[0]):
+            self._geometry_name = self.geometry_picker
+        return self.run_task(context, self.show_progress)
+
+    def get_task_steps(self, context):
+        # Only the imported geometry is decoded from the source
+        if self.use_cache:
+            return iter_import_model_cached(
+                self._source, self._source, self._geometry_name,
+                self.replace_bones_with_empties, context,
+                self.share_cube_meshes, self.trusted_input, self.link_cached)
+        return iter_import_model(
+            self._source, self._geometry_name,
+            self.replace_bones_with_empties, context, self.share_cube_meshes,
+            self.trusted_input)
+
+    def on_task_finished(self, context, result):
+        # The import with the cache returns the warning about the failed
+        # saving of the model in the cache
+        if result is not None:
+            self.report({'WARNING'}, result)
+        return {'FINISHED'}
+
+    def on_task_failed(self, context, exception):
+        # Invalid models are reported without cancelling the operator
+        if isinstance(exception, AssertionError):
+            self.report({'ERROR'}, f'Invalid model: {exception}')
+        else:
+            self.report({'ERROR'}, str(exception))
+        return {'FINISHED'}
+
+class OBJECT_OT_NusiqMcblendClearImportCache(bpy.types.Operator):
+    '''Operator used for removing the files from the import cache.'''
+    # pylint: disable=unused-argument, no-member
+    bl_idname = "object.nusiq_mcblend_clear_import_cache"
+    bl_label = "Clear import cache"
+    bl_options = {'REGISTER'}
+    bl_description = "Removes the models saved in the import cache."
+
+    max_age_days: IntProperty(  # type: ignore
+        default=0, min=0,
+        description=(
+            'Removes only the models that weren\'t used for this number of '
+            'days. The value of 0 removes all of the models'),
+        name='Unused for days'
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
     def execute(self, context):
-        # Save file and finish
-        with open(self.filepath, 'r') as f:
-            data = json.load(f, cls=JSONCDecoder)
         try:
-            import_model(
-                data, self.geometry_name, self.replace_bones_with_empties,
-                context)
-        except AssertionError as e:
-            self.report(
-                {'ERROR'}, f'Invalid model: {e}'
-            )
-        except ValueError as e:
+            removed = clear_cache(
+                get_import_cache_directory(context), self.max_age_days)
+        except OSError as e:
+            self.report({'ERROR'}, f'Unable to clear the import cache: {e}')
+            return {'CANCELLED'}
+        self.report(
+            {'INFO'}, f'Removed {removed} models from the import cache.')
+        return {'FINISHED'}
+
+class OBJECT_OT_NusiqMcblendInvalidateImportCache(
+        bpy.types.Operator, ImportHelper):
+    '''
+    Operator used for removing the cached models of a model file from the
+    import cache.
+    '''
+    # pylint: disable=unused-argument, no-member
+    bl_idname = "object.nusiq_mcblend_invalidate_import_cache"
+    bl_label = "Invalidate cached file"
+    bl_options = {'REGISTER'}
+    bl_description = (
+        "Removes the models imported from the selected file from the "
+        "import cache.")
+    # ImportHelper mixin class uses this
+    filename_ext = ".json"
+    filter_glob: StringProperty(  # type: ignore
+        default="*.json",
+        options={'HIDDEN'},
+        maxlen=1000,
+    )
+
+    def execute(self, context):
+        try:
+            with open(self.filepath, 'rb') as f:
+                source = f.read()
+            removed = invalidate_source(
+                get_import_cache_directory(context), source)
+        except OSError as e:
+            self.report({'ERROR'}, f'Unable to read the file: {e}')
+            return {'CANCELLED'}
+        self.report(
+            {'INFO'}, f'Removed {removed} models from the import cache.')
+        return {'FINISHED'}
+
+class OBJECT_OT_NusiqMcblendBatchImport(bpy.types.Operator, ImportHelper):
+    '''
+    Operator used for importing multiple Minecraft models from multiple
+    files to Blender.
+    '''
+    # pylint: disable=unused-argument, no-member
+    bl_idname = "object.nusiq_mcblend_batch_import_operator"
+    bl_label = "Import models"
+    bl_options = {'REGISTER'}
+    bl_description = (
+        "Import multiple models from the selected json files or from all of "
+        "the json files in the directory.")
+    # ImportHelper mixin class uses this
+    filename_ext = ".json"
+    filter_glob: StringProperty(  # type: ignore
+        default="*.json",
+        options={'HIDDEN'},
+        maxlen=1000,
+    )
+    files: CollectionProperty(  # type: ignore
+        type=bpy.types.OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+    directory: StringProperty(  # type: ignore
+        subtype='DIR_PATH',
+        options={'HIDDEN'},
+    )
+
+    geometry_names: StringProperty(  # type: ignore
+        default='',
+        maxlen=2000,
+        description=(
+            'Comma separated names of the geometries to import. Leave empty '
+            'to import all of the geometries'),
+        name='Geometry names'
+    )
+
+    replace_bones_with_empties: BoolProperty(  # type: ignore
+        default=False,
+        description='Creates empties instead of armature and bones',
+        name='Replace bones with empties'
+    )
+
+    share_cube_meshes: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Identical cubes use the same mesh. Reduces the memory usage '
+            'of the models with many identical cubes'),
+        name='Share meshes of identical cubes'
+    )
+
+    trusted_input: BoolProperty(  # type: ignore
+        default=False,
+        description=(
+            'Skips the validation of the models. Use only for the models '
+            'exported by Mcblend'),
+        name='Trusted input'
+    )
+
+    workers: IntProperty(  # type: ignore
+        default=0, min=0, max=64,
+        description=(
+            'The number of the processes used for loading the files. '
+            '0 uses the number of the processors'),
+        name='Workers'
+    )
+
+    def execute(self, context):
+        file_names = [f.name for f in self.files if f.name != '']
+        if len(file_names) == 0:
+            # Nothing selected - import all of the files from the directory
+            file_names = sorted(
+                name for name in os.listdir(self.directory)
+                if name.endswith('.json'))
+        paths = [os.path.join(self.directory, name) for name in file_names]
+
+        geometry_names: Optional[List[str]] = None
+        if self.geometry_names.strip() != '':
+            geometry_names = []
+            for name in self.geometry_names.split(','):
+                name = name.strip()
+                if name == '':
+                    continue
+                # Accept the names with and without the "geometry." prefix
+                geometry_names.append(name)
+                if not name.startswith('geometry.'):
+                    geometry_names.append(f'geometry.{name}')
+
+        imported, errors = import_models(
+            paths, geometry_names, self.replace_bones_with_empties, context,
+            self.share_cube_meshes, self.trusted_input, self.workers)
+        for error in errors:
+            self.report({'ERROR'}, error)
+        self.report(
+            {'INFO'},
+            f'Imported {imported} geometries from {len(paths)} files')
+        return {'FINISHED'}
+
+# Animation importer
+class OBJECT_OT_NusiqMcblendImportAnimationOperator(
+        bpy.types.Operator, ImportHelper):
+    '''
+    Operator used for importing Minecraft animations into the actions of the
+    selected objects.
+    '''
+    # pylint: disable=unused-argument, no-member
+    bl_idname = "object.nusiq_mcblend_import_animation_operator"
+    bl_label = "Import animation"
+    bl_options = {'REGISTER'}
+    bl_description = (
+        "Import the animations from bedrock entity animation file into the "
+        "actions of selected objects.")
+    # ImportHelper mixin class uses this
+    filename_ext = ".json"
+    filter_glob: StringProperty(  # type: ignore
+        default="*.json",
+        options={'HIDDEN'},
+        maxlen=1000,
+    )
+
+    @classmethod
+    def poll(cls, context: bpy_types.Context):
+        if context.mode != 'OBJECT':
+            return False
+        if len(context.selected_objects) < 1:
+            return False
+        return True
+
+    def execute(self, context):
+        try:
+            with open(self.filepath, 'r') as f:
+                data = json.load(f, cls=JSONCDecoder)
+        except (JSONDecodeError, OSError) as e:
+            self.report({'ERROR'}, f'Unable to read the file: {e}')
+            return {'CANCELLED'}
+        try:
+            animations, bones, skipped = import_animations(data, context)
+        except FileIsNotAnAnimationException as e:
+            self.report({'ERROR'}, f'Invalid animation: {e}')
+            return {'CANCELLED'}
+        if skipped > 0:
             self.report(
-                {'ERROR'}, f'{e}'
-            )
+                {'WARNING'},
+                f'Skipped {skipped} keyframes with Molang expressions')
+        self.report(
+            {'INFO'},
+            f'Imported {animations} animations of {bones} bones')
         return {'FINISHED'}
 
 # Animation (GUI)
@@ -539,6 +1039,22 @@ def menu_func_nusiq_mcblend_import(self, context):
         OBJECT_OT_NusiqMcblendImport.bl_idname, text="Mcblend: Import model"
     )
 
+def menu_func_nusiq_mcblend_import_animation(self, context):
+    '''Registers ImportAnimation operator to the F3 menu.'''
+    # pylint: disable=unused-argument
+    self.layout.operator(
+        OBJECT_OT_NusiqMcblendImportAnimationOperator.bl_idname,
+        text="Mcblend: Import animation"
+    )
+
+def menu_func_nusiq_mcblend_batch_import(self, context):
+    '''Registers BatchImport operator to the F3 menu.'''
+    # pylint: disable=unused-argument
+    self.layout.operator(
+        OBJECT_OT_NusiqMcblendBatchImport.bl_idname,
+        text="Mcblend: Import models (batch)"
+    )
+
 def save_animation_properties(animation, context):
     '''
     Saves animation properties from context to
@@ -3,20 +3,35 @@ Functions used directly by the blender operators.
 '''
 from __future__ import annotations
 
-from typing import Dict, Optional, List
+import os
+from typing import Collection, Dict, Optional, List, Sequence, Tuple, Union
+from pathlib import Path
 
 import numpy as np
 
 import bpy
 import bpy_types
 
-from .uv import UvMapper, CoordinatesConverter
-from .animation import AnimationExport
+from .uv import (
+    UvMapper, CoordinatesConverter, TextureSizeMode, McblendObjUvBox,
+    UvMcCube, paint_texture, get_cube_uv_size)
+from .animation import (
+    AnimationExport, build_animation_actions, get_animation_import_targets)
+from .animation_loader import load_animations
 from .model import ModelExport
 from .common import (
-    MINECRAFT_SCALE_FACTOR, McblendObjectGroup, MeshType,
+    MINECRAFT_SCALE_FACTOR, McblendObject, McblendObjectGroup, MeshType,
     apply_obj_transform_keep_origin, fix_cube_rotation)
-from .importer import ImportGeometry, ModelLoader
+from .importer import ImportGeometry
+from .model_loader import (
+    ModelLoader, load_model_files, load_indexed_geometry)
+from .texture_generator import MaskTileCache
+from .exception import FileIsNotAModelException, ImportingNotImplementedError
+from .png_tools import save_png
+from .scheduler import ChunkedTask, TaskSteps
+from .import_cache import (
+    get_cache_key, get_cache_path, get_default_cache_directory,
+    touch_cache_file)
 
 
 def export_model(context: bpy_types.Context) -> Dict:
@@ -38,6 +53,7 @@ def export_model(context: bpy_types.Context) -> Dict:
         visible_bounds_width=context.scene.nusiq_mcblend.visible_bounds_width,
         visible_bounds_height=context.scene.nusiq_mcblend.visible_bounds_height,
         model_name=context.scene.nusiq_mcblend.model_name,
+        texture_atlas=context.scene.nusiq_mcblend.texture_atlas,
     )
     model.load(object_properties)
     return model.json()
@@ -54,6 +70,18 @@ def export_animation(
     :param old_dict: optional - JSON dict with animation to write into.
     :returns: JSON dict of Minecraft animations.
     '''
+    return ChunkedTask(iter_export_animation(context, old_dict)).run()
+
+def iter_export_animation(
+        context: bpy_types.Context, old_dict: Optional[Dict]
+    ) -> TaskSteps:
+    '''
+    Creates a Minecraft animation (dictionary) from selected objects in
+    steps (see :class:`ChunkedTask`). Yields the progress and returns the
+    JSON dict of Minecraft animations.
+
+    See :func:`export_animation` for the description of the parameters.
+    '''
     # Check and create object properties
     object_properties = McblendObjectGroup(context)
 
@@ -72,11 +100,11 @@ def export_animation(
             for event in context.scene.nusiq_mcblend_events
         }
     )
-    animation.load_poses(object_properties, context)
+    yield from animation.iter_load_poses(object_properties, context)
     return animation.json(
         old_json=old_dict, skip_rest_poses=anim_data.skip_rest_poses)
 
-def set_uvs(context: bpy_types.Context):
+def set_uvs(context: bpy_types.Context) -> Tuple[int, int]:
     '''
     Maps the UV for selected objects.
 
@@ -86,17 +114,41 @@ def set_uvs(context: bpy_types.Context):
     bones are detected.
 
     :param context: the execution context.
+    :returns: the texture area saved by mapping multiple cubes to the same
+        space on the texture and the number of the pages of the texture.
     '''
     width = context.scene.nusiq_mcblend.texture_width
     height = context.scene.nusiq_mcblend.texture_height
     allow_expanding = context.scene.nusiq_mcblend.allow_expanding
     generate_texture = context.scene.nusiq_mcblend.generate_texture
     resolution = context.scene.nusiq_mcblend.texture_template_resolution
+    auto_uv_sharing = context.scene.nusiq_mcblend.auto_uv_sharing
+    per_face_uv_packing = context.scene.nusiq_mcblend.per_face_uv_packing
+    texture_size_mode = TextureSizeMode(
+        context.scene.nusiq_mcblend.texture_size_mode)
+    texture_atlas = context.scene.nusiq_mcblend.texture_atlas
+    texture_generation_threads = (
+        context.scene.nusiq_mcblend.texture_generation_threads)
+    template_png_path = bpy.path.abspath(
+        context.scene.nusiq_mcblend.template_png_path)
+    template_png_only = context.scene.nusiq_mcblend.template_png_only
+    reuse_template_image = context.scene.nusiq_mcblend.reuse_template_image
 
     object_properties = McblendObjectGroup(context)
     mapper = UvMapper(width, height)
-    mapper.load_uv_boxes(object_properties)
-    mapper.plan_uv(allow_expanding)
+    mapper.load_uv_boxes(
+        object_properties, auto_share=auto_uv_sharing,
+        split_bone_sets=texture_atlas)
+    pages: List[UvMapper]
+    if texture_atlas:
+        pages = mapper.plan_uv_atlas(per_face=per_face_uv_packing)
+    else:
+        if allow_expanding and texture_size_mode != TextureSizeMode.EXPAND:
+            mapper.plan_uv_minimal_size(
+                texture_size_mode, per_face=per_face_uv_packing)
+        else:
+            mapper.plan_uv(allow_expanding, per_face=per_face_uv_packing)
+        pages = [mapper]
 
     # Replace old mappings
     for objprop in mapper:
@@ -104,39 +156,42 @@ def set_uvs(context: bpy_types.Context):
 
 
     # Update height and width
-    if allow_expanding:
-        widths = [width]
-        heights = [height]
-        for box in mapper.uv_boxes:
-            widths.append(box.uv[0] + box.size[0])
-            heights.append(box.uv[1] + box.size[1])
-        height = max(heights)
-        width = max(widths)
+    if allow_expanding and not texture_atlas:
+        if texture_size_mode == TextureSizeMode.EXPAND:
+            used_width, used_height = mapper.used_space()
+            height = max(height, used_height)
+            width = max(width, used_width)
+        else:
+            width, height = mapper.width, mapper.height
 
         context.scene.nusiq_mcblend.texture_height = height
         context.scene.nusiq_mcblend.texture_width = width
 
-    if generate_texture:
-        old_image = None
-        if "template" in bpy.data.images:
-            old_image = bpy.data.images['template']
-        image = bpy.data.images.new(
-            "template", width*resolution, height*resolution, alpha=True
-        )
-        if old_image is not None:
-            # If exists remap users of old image and remove it
-            old_image.user_remap(image)
-            bpy.data.images.remove(old_image)
-            image.name = "template"
-
-
-        # This array represents new texture
-        # DIM0:up axis DIM1:right axis DIM2:rgba axis
-        arr = np.zeros([image.size[1], image.size[0], 4])
+    # Save the pages of the texture used by the objects
+    bone_set_pages: Dict[str, int] = {}
+    for page_index, page in enumerate(pages):
+        for bone_set in page.bone_sets:
+            bone_set_pages[bone_set] = page_index
+    for objprop in object_properties.values():
+        objprop.texture_page = bone_set_pages.get(
+            objprop.root.thisobj.name, 0)
 
-        for uv_cube in mapper.uv_boxes:
-            uv_cube.paint_texture(arr, resolution)
-        image.pixels = arr.ravel()  # Apply texture pixels values
+    if generate_texture:
+        # Faces with identical size and masks share the cached tiles
+        cache = MaskTileCache()
+        for page_index, page in enumerate(pages):
+            arr = _paint_template(
+                width, height, resolution, page.uv_boxes, cache,
+                texture_generation_threads)
+            if template_png_path != '':
+                save_png(
+                    _get_page_path(template_png_path, page_index), arr)
+                if template_png_only:
+                    continue
+            _create_template_image(
+                _get_template_name(page_index), arr, reuse_template_image)
+        for objprop in object_properties.values():
+            objprop.painted_uv_masks = objprop.uv_masks_hash
 
     # Set blender UVs
     converter = CoordinatesConverter(
@@ -146,6 +201,169 @@ def set_uvs(context: bpy_types.Context):
     for curr_uv in mapper.uv_boxes:
         curr_uv.new_uv_layer()
         curr_uv.set_blender_uv(converter)
+    return mapper.shared_area, len(pages)
+
+def repaint_template(
+        context: bpy_types.Context, only_changed: bool = True) -> int:
+    '''
+    Paints the template texture of the selected objects again using their
+    current UV-mapping (read from the UV-layers of the objects). The UVs
+    aren't planned again. If only_changed is True, only the cubes with the
+    masks changed since the last painting are painted on the existing
+    template images and the rest of the images is left unchanged.
+
+    :param context: the execution context.
+    :param only_changed: whether to repaint only the cubes with changed
+        masks.
+    :returns: the number of the repainted cubes.
+    '''
+    width = context.scene.nusiq_mcblend.texture_width
+    height = context.scene.nusiq_mcblend.texture_height
+    resolution = context.scene.nusiq_mcblend.texture_template_resolution
+    texture_generation_threads = (
+        context.scene.nusiq_mcblend.texture_generation_threads)
+    # The pages saved in the objects are used only with the texture atlas
+    texture_atlas = context.scene.nusiq_mcblend.texture_atlas
+
+    # Minecraft UV coordinates from Blender UV coordinates
+    converter = CoordinatesConverter(
+        np.array([[0, 1], [1, 0]]),
+        np.array([[0, width], [0, height]])
+    )
+    object_properties = McblendObjectGroup(context)
+    pages: Dict[int, List[McblendObject]] = {}
+    for objprop in object_properties.values():
+        if (
+                objprop.obj_type != 'MESH' or
+                objprop.mesh_type != MeshType.CUBE or
+                objprop.obj_data.uv_layers.active is None):
+            continue
+        pages.setdefault(
+            objprop.texture_page if texture_atlas else 0, []).append(objprop)
+
+    counter = 0
+    cache = MaskTileCache()
+    for page_index, objprops in pages.items():
+        image_name = _get_template_name(page_index)
+        arr = None
+        if only_changed and image_name in bpy.data.images:
+            arr = _read_template_image(
+                bpy.data.images[image_name], width*resolution,
+                height*resolution)
+        if arr is None:  # Paint the whole page on new image
+            arr = np.zeros(
+                [height*resolution, width*resolution, 4], dtype=np.float32)
+        else:
+            objprops = [
+                objprop for objprop in objprops
+                if objprop.painted_uv_masks != objprop.uv_masks_hash]
+            if len(objprops) == 0:
+                continue
+        uv_boxes: List[McblendObjUvBox] = []
+        for objprop in objprops:
+            uv_cube = UvMcCube(*get_cube_uv_size(objprop), objprop)
+            uv_cube.read_blender_uv(converter)
+            uv_boxes.append(uv_cube)
+        paint_texture(
+            uv_boxes, arr, resolution, cache, texture_generation_threads)
+        _create_template_image(image_name, arr, reuse_image=True)
+        for objprop in objprops:
+            objprop.painted_uv_masks = objprop.uv_masks_hash
+        counter += len(objprops)
+    return counter
+
+def _get_template_name(page_index: int) -> str:
+    '''
+    Returns the name of the template image of a page of the texture.
+    '''
+    return "template" if page_index == 0 else f"template_{page_index}"
+
+def _read_template_image(
+        image: bpy.types.Image, width: int, height: int
+        ) -> Optional[np.ndarray]:
+    '''
+    Returns the RGBA array with the pixels of the image or None if the image
+    doesn't have the expected size.
+
+    :param image: the image.
+    :param width: the expected width of the image in pixels.
+    :param height: the expected height of the image in pixels.
+    '''
+    if tuple(image.size) != (width, height):
+        return None
+    arr = np.empty(height*width*4, dtype=np.float32)
+    image.pixels.foreach_get(arr)
+    return arr.reshape(height, width, 4)
+
+def _paint_template(
+        width: int, height: int, resolution: int,
+        uv_boxes: List[McblendObjUvBox],
+        cache: Optional[MaskTileCache] = None,
+        threads: int = 1) -> np.ndarray:
+    '''
+    Paints the UvBoxes on a new template texture.
+
+    :param width: the width of the texture in Minecraft texture units.
+    :param height: the height of the texture in Minecraft texture units.
+    :param resolution: the number of pixels per Minecraft texture unit.
+    :param uv_boxes: the UvBoxes to paint on the texture.
+    :param cache: optional - the cache of the tiles of the texture created
+        with the masks.
+    :param threads: the number of the threads used for painting the faces
+        of the boxes (0 - the number of the processors).
+    :returns: the RGBA array of the texture.
+    '''
+    # This array represents new texture
+    # DIM0:up axis DIM1:right axis DIM2:rgba axis
+    arr = np.zeros(
+        [height*resolution, width*resolution, 4], dtype=np.float32)
+    paint_texture(uv_boxes, arr, resolution, cache, threads)
+    return arr
+
+def _get_page_path(path: str, page_index: int) -> str:
+    '''
+    Returns the path to the PNG file of a page of the template texture. The
+    first page uses the path without changes, the other pages add the
+    index of the page to the name of the file (e.g. "template_1.png").
+    '''
+    if page_index == 0:
+        return path
+    page_path = Path(path)
+    return str(page_path.with_name(
+        f'{page_path.stem}_{page_index}{page_path.suffix}'))
+
+def _create_template_image(
+        name: str, arr: np.ndarray, reuse_image: bool = False):
+    '''
+    Creates the Blender image with the template texture. Replaces the image
+    with the same name if it already exists.
+
+    :param name: the name of the image.
+    :param arr: the RGBA array of the texture.
+    :param reuse_image: whether to write the pixels into the existing image
+        with the same name (if it has the same size) instead of creating a
+        new one.
+    '''
+    height, width, _ = arr.shape
+    old_image = None
+    if name in bpy.data.images:
+        old_image = bpy.data.images[name]
+    if (
+            reuse_image and old_image is not None and
+            tuple(old_image.size) == (width, height)):
+        image = old_image
+    else:
+        image = bpy.data.images.new(name, width, height, alpha=True)
+        if old_image is not None:
+            # If exists remap users of old image and remove it
+            old_image.user_remap(image)
+            bpy.data.images.remove(old_image)
+            image.name = name
+    # Apply texture pixels values. The foreach_set copies the whole buffer
+    # at once (assigning to image.pixels converts every value separately).
+    image.pixels.foreach_set(
+        np.ascontiguousarray(arr, dtype=np.float32).ravel())
+    image.update()
 
 def round_dimensions(context: bpy_types.Context) -> int:
     '''
@@ -192,24 +410,68 @@ def round_dimensions(context: bpy_types.Context) -> int:
             counter += 1
     return counter
 
+# The exceptions raised by the import of invalid or unsupported models
+IMPORT_EXCEPTIONS = (
+    AssertionError, ValueError, FileIsNotAModelException,
+    ImportingNotImplementedError)
+
 def import_model(
-        data: Dict, geometry_name: str, replace_bones_with_empties: bool,
-        context: bpy_types.Context
+        data: Union[Dict, bytes], geometry_name: str,
+        replace_bones_with_empties: bool, context: bpy_types.Context,
+        share_cube_meshes: bool = False, trusted: bool = False
     ):
     '''
     Import and build model from JSON dict.
 
-    :param data: JSON dict with minecraft model.
+    :param data: JSON dict with minecraft model or the content of the model
+        file. Only the imported geometry is decoded from the content of the
+        file (see :func:`load_indexed_geometry`).
     :param geometry_name: the name of the geometry to load from the model.
     :param replace_bones_with_empties: Whether to import bones as empties
         (True) or as armature and bones (False).
     :param context: the context of running the operator.
+    :param share_cube_meshes: Whether the identical cubes should use the same
+        mesh data-block.
+    :param trusted: Whether to skip the validation of the model (for the
+        files exported by Mcblend).
+    '''
+    for _ in iter_import_model(
+            data, geometry_name, replace_bones_with_empties, context,
+            share_cube_meshes, trusted):
+        pass
+
+def iter_import_model(
+        data: Union[Dict, bytes], geometry_name: str,
+        replace_bones_with_empties: bool, context: bpy_types.Context,
+        share_cube_meshes: bool = False, trusted: bool = False
+    ) -> TaskSteps:
     '''
-    geometry = ImportGeometry(ModelLoader(data, geometry_name))
-    if replace_bones_with_empties:
-        geometry.build_with_empties(context)
+    Imports and builds model from JSON dict in steps (see
+    :class:`ChunkedTask`). Yields the progress of the import. If the import
+    is cancelled (the generator is closed) or fails, the objects created by
+    the import are removed.
+
+    The context is used in the steps that run after the yields so it
+    shouldn't be the context passed to the execute method of an operator
+    which runs the import in the modal mode (use bpy.context instead).
+
+    See :func:`import_model` for the description of the parameters.
+    '''
+    if isinstance(data, bytes):
+        geometry = ImportGeometry(
+            load_indexed_geometry(data, geometry_name, trusted=trusted))
     else:
-        geometry.build_with_armature(context)
+        geometry = ImportGeometry(ModelLoader(data, geometry_name, trusted))
+    try:
+        if replace_bones_with_empties:
+            yield from geometry.iter_build_with_empties(
+                context, share_cube_meshes)
+        else:
+            yield from geometry.iter_build_with_armature(
+                context, share_cube_meshes)
+    except BaseException:
+        geometry.remove_blender_data()
+        raise
 
     context.scene.nusiq_mcblend.texture_width = geometry.texture_width
     context.scene.nusiq_mcblend.texture_height = geometry.texture_height
@@ -222,6 +484,242 @@ def import_model(
     else:
         context.scene.nusiq_mcblend.model_name = geometry.identifier
 
+# The properties of the scene set by the import. They're stored in the custom
+# properties of the cached collections.
+_IMPORT_SCENE_PROPERTIES = (
+    'texture_width', 'texture_height', 'visible_bounds_offset',
+    'visible_bounds_width', 'visible_bounds_height', 'model_name')
+
+def get_import_cache_directory(context: bpy_types.Context) -> Path:
+    '''
+    Returns the directory of the import cache from the scene properties or
+    the default directory if it's not set.
+
+    :param context: the context of running the operator.
+    '''
+    directory = context.scene.nusiq_mcblend.import_cache_directory
+    if directory == '':
+        return get_default_cache_directory()
+    return Path(bpy.path.abspath(directory))
+
+def load_cached_import(
+        path: Path, context: bpy_types.Context, link: bool = False
+    ) -> bpy.types.Collection:
+    '''
+    Loads the collection with the cached model from the .blend file of the
+    import cache and sets the model properties of the scene. The appended
+    collection is added to the active collection. The linked collection is
+    added as a collection instance (an empty object). Returns the loaded
+    collection.
+
+    :param path: the path to the cached file.
+    :param context: the context of running the operator.
+    :param link: whether to link the collection instead of appending it.
+    '''
+    with bpy.data.libraries.load(str(path), link=link) as (
+            data_from, data_to):
+        data_to.collections = data_from.collections[:1]
+    collection = data_to.collections[0]
+    if link:
+        instance = bpy.data.objects.new(collection.name, None)
+        instance.instance_type = 'COLLECTION'
+        instance.instance_collection = collection
+        context.collection.objects.link(instance)
+    else:
+        context.collection.children.link(collection)
+    for name in _IMPORT_SCENE_PROPERTIES:
+        value = collection.get(f'mcblend_{name}')
+        if value is not None:
+            setattr(context.scene.nusiq_mcblend, name, value)
+    touch_cache_file(path)
+    return collection
+
+def iter_import_model_cached(
+        source: bytes, data: Union[Dict, bytes], geometry_name: str,
+        replace_bones_with_empties: bool, context: bpy_types.Context,
+        share_cube_meshes: bool = False, trusted: bool = False,
+        link: bool = False) -> TaskSteps:
+    '''
+    Imports the model using the import cache (see :func:`iter_import_model`).
+    If the cache has the model built from the same source file with the
+    same geometry name and the same options, the model is loaded from the
+    cache. Otherwise the model is imported into a new collection and the
+    collection is saved in the cache. Returns the warning message if the
+    model was imported but it couldn't be saved in the cache (otherwise
+    None).
+
+    :param source: the content of the source JSON file.
+    :param link: whether to link the cached model instead of appending it.
+        The model imported for the first time is always a local collection.
+
+    See :func:`import_model` for the description of the other parameters.
+    '''
+    path = get_cache_path(
+        get_import_cache_directory(context),
+        get_cache_key(source, geometry_name, {
+            'replace_bones_with_empties': replace_bones_with_empties,
+            'share_cube_meshes': share_cube_meshes,
+            'blender_version': list(bpy.app.version),
+        }))
+    if path.is_file():
+        load_cached_import(path, context, link)
+        return None
+
+    # Build the model in a new collection
+    collection = bpy.data.collections.new('model')
+    context.collection.children.link(collection)
+    view_layer = context.view_layer
+    active_layer_collection = view_layer.active_layer_collection
+    view_layer.active_layer_collection = (
+        active_layer_collection.children[collection.name])
+    try:
+        yield from iter_import_model(
+            data, geometry_name, replace_bones_with_empties, context,
+            share_cube_meshes, trusted)
+    except BaseException:
+        bpy.data.collections.remove(collection)
+        raise
+    finally:
+        view_layer.active_layer_collection = active_layer_collection
+    collection.name = context.scene.nusiq_mcblend.model_name
+    for name in _IMPORT_SCENE_PROPERTIES:
+        value = getattr(context.scene.nusiq_mcblend, name)
+        if name == 'visible_bounds_offset':
+            value = tuple(value)
+        collection[f'mcblend_{name}'] = value
+
+    # Save the collection in the cache (the file is renamed after writing
+    # to avoid reading partially written files)
+    temp_path = path.with_name(f'{path.name}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        bpy.data.libraries.write(
+            str(temp_path), {collection}, fake_user=True)
+        os.replace(temp_path, path)
+    except (OSError, RuntimeError) as e:  # bpy reports errors as RuntimeError
+        if temp_path.exists():
+            temp_path.unlink()
+        return f'The model was imported but not saved in the cache: {e}'
+    return None
+
+def import_models(
+        paths: Sequence[Union[str, Path]],
+        geometry_names: Optional[Collection[str]],
+        replace_bones_with_empties: bool, context: bpy_types.Context,
+        share_cube_meshes: bool = False, trusted: bool = False,
+        workers: int = 0) -> Tuple[int, List[str]]:
+    '''
+    Imports and builds multiple geometries from multiple model files. The
+    files are loaded in parallel processes and the geometries are built
+    in Blender one after another. Every geometry is built into its own new
+    collection named after the identifier of the geometry. Unlike
+    import_model, it doesn't change the model properties of the scene.
+    Returns the number of imported geometries and the list of the error
+    messages.
+
+    :param paths: the paths to the model files.
+    :param geometry_names: the identifiers of the geometries to import or
+        None to import all of the geometries from the files. If multiple
+        files have geometries with the same identifier, only the first one is
+        imported.
+    :param replace_bones_with_empties: Whether to import bones as empties
+        (True) or as armature and bones (False).
+    :param context: the context of running the operator.
+    :param share_cube_meshes: Whether the identical cubes should use the same
+        mesh data-block.
+    :param trusted: Whether to skip the validation of the models.
+    :param workers: the number of the processes used for loading the files.
+        The value of 0 uses the number of the processors.
+    '''
+    geometries, load_errors = load_model_files(
+        paths, geometry_names, trusted, workers)
+    errors = [f'{path}: {error}' for path, error in load_errors]
+    imported = 0
+    view_layer = context.view_layer
+    # The objects (and the armatures created with the operators) are added
+    # to the active collection
+    active_layer_collection = view_layer.active_layer_collection
+    try:
+        for identifier, loaded in geometries.items():
+            collection = bpy.data.collections.new(identifier)
+            context.scene.collection.children.link(collection)
+            view_layer.active_layer_collection = (
+                view_layer.layer_collection.children[collection.name])
+            geometry: Optional[ImportGeometry] = None
+            try:
+                geometry = ImportGeometry(loaded)
+                if replace_bones_with_empties:
+                    geometry.build_with_empties(context, share_cube_meshes)
+                else:
+                    geometry.build_with_armature(context, share_cube_meshes)
+            except IMPORT_EXCEPTIONS as e:
+                # Remove the partially built geometry
+                if geometry is not None:
+                    geometry.remove_blender_data()
+                view_layer.active_layer_collection = active_layer_collection
+                bpy.data.collections.remove(collection)
+                errors.append(f'{identifier}: {e}')
+                continue
+            imported += 1
+    finally:
+        view_layer.active_layer_collection = active_layer_collection
+    return imported, errors
+
+def import_animations(
+        data: Dict, context: bpy_types.Context) -> Tuple[int, int, int]:
+    '''
+    Imports all of the animations from the JSON dict with Minecraft
+    animations into the actions of the selected objects and armatures. The
+    objects and the bones must be in their original pose. The actions of the
+    first animation are assigned to the objects. Every animation is added to
+    the animations list of the scene. Returns the number of the imported
+    animations, the number of the animated bones and the number of the
+    skipped keyframes (keyframes that use Molang).
+
+    :param data: the JSON dict with the animations.
+    :param context: the context of running the operator.
+    '''
+    animations = load_animations(data)
+    bone_names = {
+        bone_name for animation in animations
+        for bone_name in animation.bones}
+    targets = get_animation_import_targets(context, bone_names)
+    fps = context.scene.render.fps
+    skipped_keyframes = 0
+    for i, animation in enumerate(animations):
+        skipped_keyframes += animation.skipped_keyframes
+        actions = build_animation_actions(animation, targets, fps)
+        if i == 0:
+            for obj_name, action in actions.items():
+                obj = bpy.data.objects[obj_name]
+                if obj.animation_data is None:
+                    obj.animation_data_create()
+                obj.animation_data.action = action
+
+        # Add the animation to the animations of the scene
+        name = animation.name
+        if name.startswith('animation.'):
+            name = name[10:]
+        for anim in context.scene.nusiq_mcblend_animations:
+            if anim.name == name:
+                break
+        else:
+            anim = context.scene.nusiq_mcblend_animations.add()
+            anim.name = name
+        anim.loop = animation.loop
+        anim.anim_time_update = animation.anim_time_update
+        anim.frame_start = 1
+        anim.frame_current = 1
+        # The exporter uses (frame_end - 1) / fps as the animation length
+        if animation.length is not None:
+            anim.frame_end = round(animation.length * fps) + 1
+        else:
+            anim.frame_end = round(max([
+                timeline.times[-1]
+                for timelines in animation.bones.values()
+                for timeline in timelines.values()], default=0) * fps) + 1
+    return len(animations), len(targets), skipped_keyframes
+
 def separate_mesh_cubes(context: bpy_types.Context):
     '''
     Separate selected object with meshes that use cuboids only by the lose
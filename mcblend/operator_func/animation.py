@@ -1,5 +1,5 @@
 '''
-Functions related to exporting animations.
+Functions related to exporting and importing animations.
 '''
 from __future__ import annotations
 
@@ -10,9 +10,12 @@ from itertools import tee, islice
 
 import bpy
 import bpy_types
+import mathutils
 
 import numpy as np
 from .json_tools import get_vect_json
+from .animation_loader import LoadedAnimation
+from .scheduler import TaskSteps
 from .common import (
     MINECRAFT_SCALE_FACTOR, MCObjType, McblendObjectGroup
 )
@@ -244,6 +247,22 @@ class AnimationExport:
         '''
         Populates the poses dictionary of this object.
 
+        :param object_properties: group of mcblend objects.
+        :param context: the context of running the operator.
+        '''
+        for _ in self.iter_load_poses(object_properties, context):
+            pass
+
+    def iter_load_poses(
+            self, object_properties: McblendObjectGroup,
+            context: bpy_types.Context
+        ) -> TaskSteps:
+        '''
+        Populates the poses dictionary of this object in steps (one frame in
+        every step). Yields the number of the loaded frames and the number of
+        all of the frames. The current frame of the scene is restored at the
+        end (also if the generator is closed before the end).
+
         :param object_properties: group of mcblend objects.
         :param context: the context of running the operator.
         '''
@@ -260,16 +279,17 @@ class AnimationExport:
                 # The frame value in the dictionary key doesn't really matter
                 self.poses[original_frame] = pose
             else:
-                for keyframe in _get_keyframes(context):
-                    if (
-                        keyframe < context.scene.frame_start or
-                        keyframe > context.scene.frame_end
-                    ):
-                        continue  # skip frames out of range
+                keyframes = [
+                    keyframe for keyframe in _get_keyframes(context)
+                    # skip frames out of range
+                    if context.scene.frame_start <= keyframe <=
+                    context.scene.frame_end]
+                for i, keyframe in enumerate(keyframes):
                     context.scene.frame_set(keyframe)
                     curr_pose = Pose()
                     curr_pose.load_poses(object_properties)
                     self.poses[keyframe] = curr_pose
+                    yield i + 1, len(keyframes)
                 # Load sound effects and particle effects
                 for timeline_marker in context.scene.timeline_markers:
                     if timeline_marker.name not in self.effect_events:
@@ -453,3 +473,231 @@ class AnimationExport:
             else:  # this is rest pose
                 del bone['scale']
         return bone
+
+
+# The value of the 'LINEAR' item of the interpolation enum of the keyframes
+# (foreach_set uses the integer values of the enums)
+_KEYFRAME_INTERPOLATION_LINEAR = 1
+
+def _get_local_matrix_prefix(
+        obj: bpy.types.Object,
+        pose_bone: Optional[bpy.types.PoseBone] = None) -> mathutils.Matrix:
+    '''
+    Returns the matrix that transforms the basis matrix of an object or a
+    pose bone into its local matrix relative to its parent (the matrix used
+    by the animation exporter).
+
+    :param obj: the object (the armature of the pose bone).
+    :param pose_bone: optional - the pose bone.
+    '''
+    if pose_bone is None:
+        if obj.parent is None:
+            return mathutils.Matrix()
+        return obj.matrix_parent_inverse.copy()
+    rest = obj.matrix_world @ pose_bone.bone.matrix_local
+    if pose_bone.parent is None:
+        return rest
+    return (
+        obj.matrix_world @ pose_bone.parent.bone.matrix_local
+    ).inverted() @ rest
+
+class AnimationImportTarget:
+    '''
+    A Blender object or a pose bone that represents a Minecraft bone during
+    the animation import. Converts the Minecraft animation values into the
+    values of the properties of the target. The conversion is the inverse of
+    the conversion used by :func:`Pose.load_poses` and
+    :func:`AnimationExport._json_bone` with the current pose of the target
+    as the original pose.
+
+    :param obj: the object (the armature of the pose bone).
+    :param pose_bone: optional - the pose bone.
+    '''
+    def __init__(
+            self, obj: bpy.types.Object,
+            pose_bone: Optional[bpy.types.PoseBone] = None):
+        self.obj = obj
+        self.pose_bone = pose_bone
+        self.target = obj if pose_bone is None else pose_bone
+        self.name: str = self.target.name
+
+        prefix = _get_local_matrix_prefix(obj, pose_bone)
+        rotation_prefix = prefix.to_quaternion()
+        # Objects with unrotated parent space (all of the imported
+        # models) use the XZY euler rotation. The Minecraft rotation is
+        # a simple offset of their rotation.
+        self.direct_rotation = (
+            pose_bone is None and
+            rotation_prefix.rotation_difference(
+                mathutils.Quaternion()).angle < 1e-6)
+        if self.direct_rotation:
+            self.target.rotation_mode = 'XZY'
+        elif self.target.rotation_mode == 'AXIS_ANGLE':
+            self.target.rotation_mode = 'QUATERNION'
+
+        basis = self.target.matrix_basis.copy()
+        self.rest_location = np.array(basis.to_translation())
+        self.rest_scale = np.array(basis.to_scale())
+        if self.direct_rotation:
+            self.rest_rotation = np.array(self.target.rotation_euler)
+        else:
+            self.rest_rotation = np.array(
+                (prefix @ basis).to_quaternion().to_euler('XZY'))
+        self.rotation_prefix_inverted = rotation_prefix.inverted()
+        self.rotation_prefix_matrix_inverted = np.array(
+            self.rotation_prefix_inverted.to_matrix())
+
+        # The scale of the parent in the original pose. The exporter scales
+        # the locations with it.
+        self.parent_scale = np.ones(3)
+        if pose_bone is None and obj.parent is not None:
+            self.parent_scale = np.array(obj.parent.matrix_local.to_scale())
+        elif pose_bone is not None and pose_bone.parent is not None:
+            self.parent_scale = np.array((
+                _get_local_matrix_prefix(obj, pose_bone.parent) @
+                pose_bone.parent.matrix_basis).to_scale())
+
+    def get_data_path(self, prop: str) -> str:
+        '''
+        Returns the data path of the property of the target relative to the
+        object (the owner of the action).
+        '''
+        if self.pose_bone is None:
+            return prop
+        return self.pose_bone.path_from_id(prop)
+
+    def get_keys(
+            self, channel: str, values: np.ndarray
+        ) -> Tuple[str, np.ndarray]:
+        '''
+        Converts the values of the Minecraft animation into the values of a
+        property of the target. Returns the name of the property and the
+        values with shape (n, size of the property).
+
+        :param channel: 'position', 'rotation' or 'scale'.
+        :param values: the values from the animation file (relative to the
+            original pose) with shape (n, 3).
+        '''
+        if channel == 'position':
+            offsets = (
+                values[:, [0, 2, 1]] / MINECRAFT_SCALE_FACTOR /
+                self.parent_scale)
+            return 'location', (
+                self.rest_location +
+                offsets @ self.rotation_prefix_matrix_inverted.T)
+        if channel == 'scale':
+            return 'scale', self.rest_scale * values[:, [0, 2, 1]]
+        # Rotation
+        eulers = self.rest_rotation + np.radians(
+            values[:, [0, 2, 1]] * np.array([1, 1, -1]))
+        if self.direct_rotation:
+            return 'rotation_euler', eulers
+        mode = self.target.rotation_mode
+        result: List = []
+        prev = None
+        for euler in eulers:
+            quaternion = self.rotation_prefix_inverted @ mathutils.Euler(
+                tuple(euler), 'XZY').to_quaternion()
+            if mode == 'QUATERNION':
+                # Keep the shortest path between the keyframes
+                if prev is not None and prev.dot(quaternion) < 0:
+                    quaternion.negate()
+                prev = quaternion
+            elif prev is None:
+                prev = quaternion.to_euler(mode)
+            else:
+                prev = quaternion.to_euler(mode, prev)
+            result.append(tuple(prev))
+        if mode == 'QUATERNION':
+            return 'rotation_quaternion', np.array(result)
+        return 'rotation_euler', np.array(result)
+
+def get_animation_import_targets(
+        context: bpy_types.Context, bone_names: Set[str]
+    ) -> Dict[str, AnimationImportTarget]:
+    '''
+    Returns the targets of the animation import keyed by the names of the
+    bones. The targets are the pose bones of the selected armatures and the
+    selected objects with the names of the animated bones.
+
+    :param context: the context of running the operator.
+    :param bone_names: the names of the animated bones.
+    '''
+    result: Dict[str, AnimationImportTarget] = {}
+    for obj in context.selected_objects:
+        if obj.type == 'ARMATURE':
+            for pose_bone in obj.pose.bones:
+                if (
+                        pose_bone.name in bone_names and
+                        pose_bone.name not in result):
+                    result[pose_bone.name] = AnimationImportTarget(
+                        obj, pose_bone)
+        elif obj.name in bone_names and obj.name not in result:
+            result[obj.name] = AnimationImportTarget(obj)
+    return result
+
+def _add_fcurves(
+        action: bpy.types.Action, data_path: str, group: str,
+        frames: np.ndarray, values: np.ndarray):
+    '''
+    Adds the fcurves with linear interpolation for every component of the
+    property to the action. All of the keyframes of an fcurve are added at
+    once.
+
+    :param action: the action.
+    :param data_path: the data path of the property.
+    :param group: the name of the group of the fcurves.
+    :param frames: the frames of the keyframes, shape (n,).
+    :param values: the values of the keyframes, shape (n, size of the
+        property).
+    '''
+    coordinates = np.empty((len(frames), 2), dtype=np.float32)
+    coordinates[:, 0] = frames
+    interpolation = [_KEYFRAME_INTERPOLATION_LINEAR] * len(frames)
+    for i in range(values.shape[1]):
+        coordinates[:, 1] = values[:, i]
+        fcurve = action.fcurves.new(data_path, index=i, action_group=group)
+        fcurve.keyframe_points.add(len(frames))
+        fcurve.keyframe_points.foreach_set('co', coordinates.ravel())
+        fcurve.keyframe_points.foreach_set('interpolation', interpolation)
+        fcurve.update()
+
+def build_animation_actions(
+        animation: LoadedAnimation,
+        targets: Dict[str, AnimationImportTarget],
+        fps: float) -> Dict[str, bpy.types.Action]:
+    '''
+    Creates the actions with the animation of the targets. Returns the
+    actions keyed by the names of the objects that should use them (the
+    animated objects and the armatures of the animated pose bones).
+
+    The keyframe at time 0 is placed at frame 1 (like in the animation
+    exporter). Frame 0 is keyed with the original pose because the exporter
+    uses it as the base pose of the animation.
+
+    :param animation: the loaded animation.
+    :param targets: the targets of the animation keyed by the names of the
+        bones.
+    :param fps: the frame rate of the scene.
+    '''
+    short_name = animation.name
+    if short_name.startswith('animation.'):
+        short_name = short_name[10:]
+    actions: Dict[str, bpy.types.Action] = {}
+    for bone_name, timelines in animation.bones.items():
+        if bone_name not in targets:
+            continue
+        target = targets[bone_name]
+        if target.obj.name not in actions:
+            action = bpy.data.actions.new(f'{short_name}.{target.obj.name}')
+            action.use_fake_user = True
+            actions[target.obj.name] = action
+        action = actions[target.obj.name]
+        for channel, timeline in timelines.items():
+            rest_value = [1, 1, 1] if channel == 'scale' else [0, 0, 0]
+            frames = np.concatenate(([0.0], timeline.times * fps + 1))
+            values = np.concatenate(([rest_value], timeline.values))
+            prop, keys = target.get_keys(channel, values)
+            _add_fcurves(
+                action, target.get_data_path(prop), target.name, frames, keys)
+    return actions
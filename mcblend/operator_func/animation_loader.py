@@ -0,0 +1,196 @@
+'''
+Loading of the Minecraft animations from the JSON dicts. The module doesn't
+depend on bpy.
+
+The timelines of the position, rotation and scale of the bones are loaded
+into NumPy arrays so they can be written to the Blender fcurves at once.
+Only the numeric values are supported. The keyframes with Molang
+expressions are skipped and counted.
+'''
+from __future__ import annotations
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .exception import FileIsNotAnAnimationException
+
+# The animated properties of the bones
+ANIMATION_CHANNELS = ('position', 'rotation', 'scale')
+
+class AnimationTimeline(NamedTuple):
+    '''
+    The keyframes of one property of a bone sorted by time.
+    '''
+    times: np.ndarray
+    '''the timestamps of the keyframes in seconds, shape (n,)'''
+    values: np.ndarray
+    '''the values of the keyframes in Minecraft coordinates, shape (n, 3)'''
+
+class LoadedAnimation(NamedTuple):
+    '''
+    Animation loaded from the Minecraft animation file.
+    '''
+    name: str
+    '''the name of the animation (with the "animation." prefix)'''
+    length: Optional[float]
+    '''the animation_length property of the animation'''
+    loop: bool
+    anim_time_update: str
+    bones: Dict[str, Dict[str, AnimationTimeline]]
+    '''the timelines of the animated properties of the bones'''
+    skipped_keyframes: int
+    '''the number of keyframes skipped because they use Molang'''
+
+def _path_error(path: List, message: str) -> FileIsNotAnAnimationException:
+    '''
+    Returns the exception with the JSON path and the message.
+    '''
+    return FileIsNotAnAnimationException(f'{path}::{message}')
+
+def _get_number(value: Any) -> Optional[float]:
+    '''
+    Returns the value of a number or a string with a number. Returns None for
+    the other strings (Molang expressions).
+    '''
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+def _get_vector(
+        value: Any, path: List) -> Optional[Tuple[float, float, float]]:
+    '''
+    Returns the value of a keyframe as a vector of three numbers. Returns None
+    if the keyframe uses Molang.
+
+    :param value: the value of the keyframe - a number (the same value for
+        all of the axes), a list of three numbers or a dict with "pre" and
+        "post" values (the "post" value is used).
+    :param path: the JSON path of the value used in the error messages.
+    '''
+    if isinstance(value, dict):
+        if 'post' in value:
+            return _get_vector(value['post'], path + ['post'])
+        if 'pre' in value:
+            return _get_vector(value['pre'], path + ['pre'])
+        raise _path_error(path, 'keyframe is missing "pre" and "post" values')
+    if isinstance(value, list):
+        if len(value) != 3:
+            raise _path_error(
+                path, f'vector has invalid length {len(value)} != 3')
+        x, y, z = (_get_number(i) for i in value)
+        if x is None or y is None or z is None:
+            return None
+        return x, y, z
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        number = _get_number(value)
+        if number is None:
+            return None
+        return number, number, number
+    raise _path_error(path, 'invalid value of the keyframe')
+
+def _load_timeline(
+        value: Any, path: List) -> Tuple[Optional[AnimationTimeline], int]:
+    '''
+    Returns the timeline of a property of a bone (or None if it doesn't have
+    any supported keyframes) and the number of the skipped keyframes.
+
+    :param value: the value of the property - a single value or a dict with
+        the values keyed by the timestamps.
+    :param path: the JSON path of the value used in the error messages.
+    '''
+    if isinstance(value, dict) and not (
+            'pre' in value or 'post' in value):
+        items = []
+        for timestamp, keyframe in value.items():
+            try:
+                time = float(timestamp)
+            except ValueError:
+                raise _path_error(  # pylint: disable=raise-missing-from
+                    path, f'{timestamp} is not a valid timestamp')
+            items.append((time, keyframe, path + [timestamp]))
+        items.sort(key=lambda item: item[0])
+    else:
+        items = [(0.0, value, path)]
+    times: List[float] = []
+    values: List[Tuple[float, float, float]] = []
+    skipped = 0
+    for time, keyframe, keyframe_path in items:
+        vector = _get_vector(keyframe, keyframe_path)
+        if vector is None:
+            skipped += 1
+            continue
+        times.append(time)
+        values.append(vector)
+    if len(times) == 0:
+        return None, skipped
+    return AnimationTimeline(
+        np.array(times, dtype=np.float64),
+        np.array(values, dtype=np.float64).reshape(-1, 3)), skipped
+
+def _load_animation(name: str, animation: Any, path: List) -> LoadedAnimation:
+    '''
+    Loads single animation from the animation file.
+
+    :param name: the name of the animation.
+    :param animation: the JSON dict with the animation.
+    :param path: the JSON path of the animation used in the error messages.
+    '''
+    if not isinstance(animation, dict):
+        raise _path_error(path, 'animation is not a dict')
+    length = animation.get('animation_length')
+    if length is not None and _get_number(length) is None:
+        raise _path_error(
+            path + ['animation_length'], 'animation_length is not a number')
+    anim_time_update = animation.get('anim_time_update', '')
+    if not isinstance(anim_time_update, str):
+        anim_time_update = str(anim_time_update)
+    bones: Dict[str, Dict[str, AnimationTimeline]] = {}
+    skipped_keyframes = 0
+    animation_bones = animation.get('bones', {})
+    if not isinstance(animation_bones, dict):
+        raise _path_error(path + ['bones'], 'bones is not a dict')
+    for bone_name, bone in animation_bones.items():
+        bone_path = path + ['bones', bone_name]
+        if not isinstance(bone, dict):
+            raise _path_error(bone_path, 'bone is not a dict')
+        timelines: Dict[str, AnimationTimeline] = {}
+        for channel in ANIMATION_CHANNELS:
+            if channel not in bone:
+                continue
+            timeline, skipped = _load_timeline(
+                bone[channel], bone_path + [channel])
+            skipped_keyframes += skipped
+            if timeline is not None:
+                timelines[channel] = timeline
+        if len(timelines) > 0:
+            bones[bone_name] = timelines
+    return LoadedAnimation(
+        name=name,
+        length=None if length is None else _get_number(length),
+        loop=animation.get('loop', False) not in (False, 'false'),
+        anim_time_update=anim_time_update,
+        bones=bones,
+        skipped_keyframes=skipped_keyframes)
+
+def load_animations(data: Any) -> List[LoadedAnimation]:
+    '''
+    Loads all of the animations from the JSON dict with the Minecraft
+    animation file. Raises FileIsNotAnAnimationException if the file is not
+    a valid animation file.
+
+    :param data: the JSON dict with the animation file.
+    '''
+    if not isinstance(data, dict) or not isinstance(
+            data.get('animations'), dict):
+        raise _path_error([], 'the file has no "animations" dict')
+    return [
+        _load_animation(name, animation, ['animations', name])
+        for name, animation in data['animations'].items()]
@@ -4,6 +4,8 @@ Functions and objects shared between other modules of Mcblend.
 from __future__ import annotations
 
 from ctypes import c_int
+import hashlib
+import json
 import math
 from enum import Enum
 from typing import (
@@ -15,7 +17,8 @@ import bpy_types
 import bpy
 import mathutils
 
-from .texture_generator import Mask, ColorMask, get_masks_from_side
+from .texture_generator import (
+    Mask, ColorMask, get_masks_from_side, get_random_stream)
 from .exception import NameConflictException, NoCubePolygonsException
 
 MINECRAFT_SCALE_FACTOR = 16
@@ -144,6 +147,40 @@ class McblendObject:
     def uv_group(self, uv_group: str):
         self.thisobj.nusiq_mcblend_object_properties.uv_group = uv_group
 
+    @property
+    def texture_page(self) -> int:
+        '''The page of the texture atlas used by this object.'''
+        return self.thisobj.nusiq_mcblend_object_properties.texture_page
+
+    @texture_page.setter
+    def texture_page(self, texture_page: int):
+        self.thisobj.nusiq_mcblend_object_properties.texture_page = (
+            texture_page)
+
+    @property
+    def painted_uv_masks(self) -> str:
+        '''
+        The hash of the masks used for the last painting of the template
+        texture of this object (see uv_masks_hash).
+        '''
+        return self.thisobj.nusiq_mcblend_object_properties.painted_uv_masks
+
+    @painted_uv_masks.setter
+    def painted_uv_masks(self, painted_uv_masks: str):
+        self.thisobj.nusiq_mcblend_object_properties.painted_uv_masks = (
+            painted_uv_masks)
+
+    @property
+    def root(self) -> McblendObject:
+        '''
+        The top-most ancestor of this object in the Minecraft model (or this
+        object if it doesn't have a parent).
+        '''
+        result = self
+        while result.parent is not None:
+            result = result.parent
+        return result
+
     @property
     def obj_data(self) -> Any:
         '''
@@ -291,6 +328,40 @@ class McblendObject:
         result = result * 180/math.pi  # math.degrees() for array
         return result
 
+    @property
+    def uv_masks_key(self) -> str:
+        '''
+        A string that identifies the stack of masks used for generating the
+        texture of this object. Objects with equal keys use identical masks on
+        every side of the cube (even if they belong to different UV-groups).
+        '''
+        if self.uv_group == '':
+            return ''
+        uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
+        uv_group_json = uv_group.json()
+        del uv_group_json['name']
+        return json.dumps(uv_group_json, sort_keys=True)
+
+    @property
+    def uv_masks_hash(self) -> str:
+        '''
+        A short hash of the masks of this object. Unlike the uv_masks_key it
+        also depends on the name of the object because the RandomMasks
+        create different noise on different objects.
+        '''
+        return hashlib.sha1(
+            json.dumps([self.thisobj.name, self.uv_masks_key]).encode('utf8')
+        ).hexdigest()
+
+    def make_data_single_user(self):
+        '''
+        Replaces the data of this object with its copy if the data is shared
+        with other objects (imported cubes can share meshes). Used before
+        modifying the mesh of the object.
+        '''
+        if self.thisobj.data.users > 1:
+            self.thisobj.data = self.thisobj.data.copy()
+
     def cube_polygons(self) -> CubePolygons:
         '''
         Returns the :class:`CubePolygons` of this object (always new copy of
@@ -307,7 +378,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((0, 1, 0))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        return get_masks_from_side(uv_group.side1)
+        return get_masks_from_side(
+            uv_group.side1, get_random_stream(self.thisobj.name, 1))
 
     @property
     def side2_uv_masks(self) -> Sequence[Mask]:
@@ -318,7 +390,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((1, 0, 1))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        return get_masks_from_side(uv_group.side2)
+        return get_masks_from_side(
+            uv_group.side2, get_random_stream(self.thisobj.name, 2))
 
     @property
     def side3_uv_masks(self) -> Sequence[Mask]:
@@ -329,7 +402,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((1, 0, 0))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        return get_masks_from_side(uv_group.side3)
+        return get_masks_from_side(
+            uv_group.side3, get_random_stream(self.thisobj.name, 3))
 
     @property
     def side4_uv_masks(self) -> Sequence[Mask]:
@@ -340,7 +414,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((0, 1, 1))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        return get_masks_from_side(uv_group.side4)
+        return get_masks_from_side(
+            uv_group.side4, get_random_stream(self.thisobj.name, 4))
 
     @property
     def side5_uv_masks(self) -> Sequence[Mask]:
@@ -351,7 +426,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((0, 0, 1))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        return get_masks_from_side(uv_group.side5)
+        return get_masks_from_side(
+            uv_group.side5, get_random_stream(self.thisobj.name, 5))
 
     @property
     def side6_uv_masks(self) -> Sequence[Mask]:
@@ -362,7 +438,8 @@ class McblendObject:
         if self.uv_group == '':
             return [ColorMask((1, 1, 0))]
         uv_group = bpy.context.scene.nusiq_mcblend_uv_groups[self.uv_group]
-        masks = get_masks_from_side(uv_group.side6)
+        masks = get_masks_from_side(
+            uv_group.side6, get_random_stream(self.thisobj.name, 6))
         return masks
 
     def find_lose_parts(self) -> Tuple[int, ...]:
@@ -417,6 +494,50 @@ _MC_MAPPING_UV_ORDERS = {
     ('down', True) :('++-', '-+-', '---', '+--'),
 }
 
+# key (side) : value (names of the vertices of the side in cyclic order)
+# Used in CubePolygons constructor
+_CUBE_SIDES_VERTICES = {
+    'north': ('---', '+--', '+-+', '--+'),  # Cube Front
+    'east': ('--+', '-++', '-+-', '---'),  # Cube Right
+    'south': ('-++', '+++', '++-', '-+-'),  # Cube Back
+    'west': ('+--', '++-', '+++', '+-+'),  # Cube Left
+    'up': ('--+', '+-+', '+++', '-++'),  # Cube Up
+    'down': ('-+-', '++-', '+--', '---'),  # Cube Down
+}
+
+def get_cube_side(bound_box_vertices: Sequence[str]) -> Optional[str]:
+    '''
+    Returns the name of the side of the cube (north, east, south, west, up or
+    down) with given vertices or None if the vertices don't form a side.
+
+    :param bound_box_vertices: the names of the vertices of the polygon
+        (the names of the closest corners of the bounding box).
+    '''
+    for name, side_vertices in _CUBE_SIDES_VERTICES.items():
+        if cyclic_equiv(list(side_vertices), list(bound_box_vertices)):
+            return name
+    return None
+
+def get_cube_polygon_order(
+        name: str, mirror: bool,
+        bound_box_vertices: Sequence[str]) -> Tuple[int, int, int, int]:
+    '''
+    Gets the order of vertices for given cube polygon (see
+    :class:`CubePolygon`).
+
+    :param name: the name of the side of the cube.
+    :param mirror: whether the order should match Minecraft mirrored mapping
+        format.
+    :param bound_box_vertices: the names of the vertices of the polygon.
+    '''
+    mc_mapping_uv_order = _MC_MAPPING_UV_ORDERS[(name, mirror)]
+    result = []
+    for vertex_name in mc_mapping_uv_order:
+        # Throws ValueError
+        index = list(bound_box_vertices).index(vertex_name)
+        result.append(index)
+    return tuple(result)  # type: ignore
+
 class CubePolygons(NamedTuple):
     '''
     Polygons of blender cube object that correspond to Minecraft cube faces.
@@ -438,19 +559,6 @@ class CubePolygons(NamedTuple):
             :class:`CubePolygons` should match Minecraft mirrored mapping format
             or not.
         '''
-        def get_order(
-            name: str, mirror: bool,
-            bound_box_vertices: Tuple[str, str, str, str]
-        ) -> Tuple[int, int, int, int]:
-            '''Gets the order of vertices for given cube polygon'''
-            mc_mapping_uv_order = _MC_MAPPING_UV_ORDERS[(name, mirror)]
-            result = []
-            for vertex_name in mc_mapping_uv_order:
-                # Throws ValueError
-                index = bound_box_vertices.index(vertex_name)
-                result.append(index)
-            return tuple(result)  # type: ignore
-
         # 1. Check if object has 6 quadrilateral faces
         if len(cube.data.polygons) != 6:
             raise NoCubePolygonsException(
@@ -475,12 +583,6 @@ class CubePolygons(NamedTuple):
             "+++": np.array(ppp), "++-": np.array(ppm)
         }
 
-        north: List[str] = ['---', '+--', '+-+', '--+']  # Cube Front
-        east: List[str] = ['--+', '-++', '-+-', '---']  # Cube Right
-        south: List[str] = ['-++', '+++', '++-', '-+-']  # Cube Back
-        west: List[str] = ['+--', '++-', '+++', '+-+']  # Cube Left
-        up: List[str] = ['--+', '+-+', '+++', '-++']  # Cube Up
-        down: List[str] = ['-+-', '++-', '+--', '---']  # Cube Down
         cube_polygon_builder = {}  # Input for CubePolygons constructor
         for polygon in cube.data.polygons:
             bbv: List[str] = []  # bound box vertices
@@ -501,35 +603,12 @@ class CubePolygons(NamedTuple):
                         closest_bb_point = k
                 bbv.append(closest_bb_point)
 
-            if cyclic_equiv(north, bbv):
-                t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['north'] = CubePolygon(
-                    polygon, t_bbv, get_order('north', mirror, t_bbv)
-                )
-            elif cyclic_equiv(east, bbv):
-                t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['east'] = CubePolygon(
-                    polygon, t_bbv, get_order('east', mirror, t_bbv)
-                )
-            elif cyclic_equiv(south, bbv):
-                t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['south'] = CubePolygon(
-                    polygon, t_bbv, get_order('south', mirror, t_bbv)
-                )
-            elif cyclic_equiv(west, bbv):
-                t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['west'] = CubePolygon(
-                    polygon, t_bbv, get_order('west', mirror, t_bbv)
-                )
-            elif cyclic_equiv(up, bbv):
-                t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['up'] = CubePolygon(
-                    polygon, t_bbv, get_order('up', mirror, t_bbv)
-                )
-            elif cyclic_equiv(down, bbv):
+            side_name = get_cube_side(bbv)
+            if side_name is not None:
                 t_bbv: Tuple[str, str, str, str] = tuple(bbv)  # type: ignore
-                cube_polygon_builder['down'] = CubePolygon(
-                    polygon, t_bbv, get_order('down', mirror, t_bbv)
+                cube_polygon_builder[side_name] = CubePolygon(
+                    polygon, t_bbv,
+                    get_cube_polygon_order(side_name, mirror, t_bbv)
                 )
         try:
             return CubePolygons(**cube_polygon_builder)
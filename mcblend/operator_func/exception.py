@@ -31,6 +31,11 @@ class FileIsNotAModelException(Exception):
     Raised in importer when the loaded file is not a model.
     '''
 
+class FileIsNotAnAnimationException(Exception):
+    '''
+    Raised in animation importer when the loaded file is not an animation.
+    '''
+
 class ImportingNotImplementedError(NotImplementedError):
     '''
     Raised by imported when given property is valid but there is no
@@ -0,0 +1,182 @@
+'''
+Indexing of the geometries of the Minecraft model files. The module doesn't
+depend on bpy.
+
+The index is created by a single pass over the bytes of the file which only
+follows the brackets, the keys and the strings. The values aren't decoded
+and the geometries aren't validated. The index has the identifiers of the
+geometries, their positions in the file and the numbers of their bones and
+cubes, so the import can list the geometries of a file without loading it
+and decode only the selected geometry.
+'''
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, NamedTuple, Optional, Tuple, Union
+
+from .exception import FileIsNotAModelException
+
+# The characters that change the state of the scanner. Everything between
+# them (whitespaces, numbers, colons, true, false and null) is skipped.
+_TOKEN = re.compile(rb'[{}\[\],"/]')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_INLINE_COMMENT = re.compile(rb'//[^\n]*')
+_MULTILINE_COMMENT = re.compile(rb'/\*.*?\*/', re.S)
+
+class GeometryIndexEntry(NamedTuple):
+    '''
+    The position and the size of a geometry in the model file.
+    '''
+    identifier: str
+    key: Union[str, int]
+    '''
+    the key of the geometry in its parent - the index in the
+    "minecraft:geometry" list (format 1.12.0) or the name of the geometry
+    (format 1.8.0)
+    '''
+    start: int
+    '''the byte offset of the opening bracket of the geometry'''
+    end: int
+    '''the byte offset after the closing bracket of the geometry'''
+    bone_count: int
+    cube_count: int
+
+class GeometryIndex(NamedTuple):
+    '''
+    The index of the geometries of the model file.
+    '''
+    format_version: Optional[str]
+    '''the format_version of the file (None if it's not a string)'''
+    root_keys: Tuple[str, ...]
+    '''the keys of the root object of the file'''
+    geometries: List[GeometryIndexEntry]
+
+def _decode_string(source: bytes, start: int, end: int) -> str:
+    '''
+    Returns the value of the JSON string from source[start:end] (including
+    the quotes).
+    '''
+    value = source[start + 1:end - 1]
+    if b'\\' in value:
+        return json.loads(source[start:end])
+    return value.decode('utf8')
+
+def index_geometries(source: bytes) -> GeometryIndex:
+    '''
+    Creates the index of the geometries of the model file (JSON with
+    optional comments) from its content. Raises FileIsNotAModelException if
+    the structure of the file is broken or the identifier of a geometry is
+    missing. The other errors are found when the geometry is loaded.
+
+    :param source: the content of the model file.
+    '''
+    # pylint: disable=too-many-branches, too-many-statements
+    # The open objects and lists: [is object, path, current key or index]
+    stack: List[List[Any]] = []
+    expect_key = False
+    format_version: Optional[str] = None
+    root_keys: List[str] = []
+    geometries: List[GeometryIndexEntry] = []
+    # The geometry which is being scanned: [key, start, path length,
+    # identifier, bone count, cube count]
+    geometry: Optional[List[Any]] = None
+    pos = 0
+    while True:
+        match = _TOKEN.search(source, pos)
+        if match is None:
+            break
+        pos = match.start()
+        char = source[pos:pos + 1]
+        if char == b'"':
+            string_match = _STRING.match(source, pos)
+            if string_match is None:
+                raise FileIsNotAModelException(
+                    f'Unterminated string at byte {pos}')
+            end = string_match.end()
+            if len(stack) == 0:
+                raise FileIsNotAModelException(
+                    f'[]::model file is not an instance of {(dict,)}')
+            top = stack[-1]
+            if top[0] and expect_key:
+                top[2] = _decode_string(source, pos, end)
+                expect_key = False
+                if len(stack) == 1:
+                    root_keys.append(top[2])
+            elif len(stack) == 1 and top[2] == 'format_version':
+                format_version = _decode_string(source, pos, end)
+            elif (
+                    geometry is not None and isinstance(geometry[0], int) and
+                    top[2] == 'identifier' and
+                    len(top[1]) == geometry[2] + 1 and
+                    top[1][-1] == 'description'):
+                geometry[3] = _decode_string(source, pos, end)
+            pos = end
+        elif char in (b'{', b'['):
+            is_object = char == b'{'
+            if len(stack) == 0:
+                if not is_object:
+                    raise FileIsNotAModelException(
+                        f'[]::model file is not an instance of {(dict,)}')
+                path: Tuple = ()
+            else:
+                path = stack[-1][1] + (stack[-1][2],)
+            stack.append([is_object, path, None if is_object else 0])
+            expect_key = is_object
+            if is_object and geometry is None:
+                if (
+                        len(path) == 2 and
+                        path[0] == 'minecraft:geometry' and
+                        isinstance(path[1], int)):  # 1.12.0
+                    geometry = [path[1], pos, len(path), None, 0, 0]
+                elif (
+                        len(path) == 1 and isinstance(path[0], str) and
+                        path[0].startswith('geometry.')):  # 1.8.0
+                    geometry = [path[0], pos, len(path), path[0], 0, 0]
+            elif is_object and geometry is not None:
+                relative_path = path[geometry[2]:]
+                if (
+                        len(relative_path) == 2 and
+                        relative_path[0] == 'bones'):
+                    geometry[4] += 1
+                elif (
+                        len(relative_path) == 4 and
+                        relative_path[0] == 'bones' and
+                        relative_path[2] == 'cubes'):
+                    geometry[5] += 1
+            pos += 1
+        elif char in (b'}', b']'):
+            if len(stack) == 0 or stack[-1][0] != (char == b'}'):
+                raise FileIsNotAModelException(
+                    f'Unexpected {char.decode()} at byte {pos}')
+            _, path, _ = stack.pop()
+            if geometry is not None and len(path) == geometry[2]:
+                key, start, _, identifier, bone_count, cube_count = geometry
+                if identifier is None:
+                    raise FileIsNotAModelException(
+                        f'{list(path)}::description is missing identifier')
+                geometries.append(GeometryIndexEntry(
+                    identifier, key, start, pos + 1, bone_count, cube_count))
+                geometry = None
+            expect_key = False
+            pos += 1
+            if len(stack) == 0:
+                break
+        elif char == b',':
+            if len(stack) > 0:
+                if stack[-1][0]:
+                    expect_key = True
+                else:
+                    stack[-1][2] += 1
+            pos += 1
+        else:  # b'/'
+            comment = (
+                _INLINE_COMMENT.match(source, pos) or
+                _MULTILINE_COMMENT.match(source, pos))
+            if comment is None:
+                raise FileIsNotAModelException(
+                    f'Unexpected / at byte {pos}')
+            pos = comment.end()
+    if len(stack) != 0:
+        raise FileIsNotAModelException('Unexpected end of the file')
+    return GeometryIndex(format_version, tuple(root_keys), geometries)
@@ -0,0 +1,123 @@
+'''
+Management of the files of the import cache. The module doesn't depend on
+bpy.
+
+The import cache stores the models built by the importer in .blend files.
+The names of the files are made of the hash of the content of the source
+JSON file and the hash of the name of the imported geometry and the import
+options, so the cached files of a source file can be found without reading
+them. Changing the source file changes its hash so the old cached files are
+never used again.
+'''
+from __future__ import annotations
+
+import hashlib
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+# Increase when the objects built by the importer change, to stop using the
+# files cached by the older versions of the importer.
+IMPORT_CACHE_VERSION = 1
+
+def get_default_cache_directory() -> Path:
+    '''
+    Returns the directory of the import cache used if the user doesn't
+    specify it.
+    '''
+    return Path(tempfile.gettempdir()) / 'mcblend_import_cache'
+
+def get_source_hash(source: bytes) -> str:
+    '''
+    Returns the hash of the content of the source JSON file used in the
+    names of the cached files.
+
+    :param source: the content of the source file.
+    '''
+    return hashlib.sha256(source).hexdigest()[:32]
+
+def get_cache_key(
+        source: bytes, geometry_name: str, options: Dict[str, Any]) -> str:
+    '''
+    Returns the key of the cached import (the name of the cached file without
+    the extension).
+
+    :param source: the content of the source JSON file.
+    :param geometry_name: the name of the imported geometry.
+    :param options: the import options that affect the imported objects
+        (JSON serializable).
+    '''
+    options_hash = hashlib.sha256(json.dumps(
+        {
+            'version': IMPORT_CACHE_VERSION,
+            'geometry_name': geometry_name,
+            'options': options
+        },
+        sort_keys=True).encode('utf8')).hexdigest()[:16]
+    return f'{get_source_hash(source)}-{options_hash}'
+
+def get_cache_path(directory: Union[str, Path], key: str) -> Path:
+    '''
+    Returns the path of the cached file.
+
+    :param directory: the directory of the cache.
+    :param key: the key of the cached import.
+    '''
+    return Path(directory) / f'{key}.blend'
+
+def list_cache_files(directory: Union[str, Path]) -> List[Path]:
+    '''
+    Returns the list of the cached files.
+
+    :param directory: the directory of the cache.
+    '''
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path for path in directory.glob('*-*.blend') if path.is_file())
+
+def clear_cache(
+        directory: Union[str, Path], max_age_days: float = 0.0) -> int:
+    '''
+    Removes the cached files. Returns the number of the removed files.
+
+    :param directory: the directory of the cache.
+    :param max_age_days: removes only the files older than this number of
+        days (since their last use). The value of 0 removes all of the files.
+    '''
+    min_time = time.time() - max_age_days * 24 * 60 * 60
+    removed = 0
+    for path in list_cache_files(directory):
+        if max_age_days > 0 and path.stat().st_mtime > min_time:
+            continue
+        path.unlink()
+        removed += 1
+    return removed
+
+def invalidate_source(directory: Union[str, Path], source: bytes) -> int:
+    '''
+    Removes all of the cached files created from the source file (all
+    geometries and import options). Returns the number of the removed files.
+
+    :param directory: the directory of the cache.
+    :param source: the content of the source file.
+    '''
+    prefix = f'{get_source_hash(source)}-'
+    removed = 0
+    for path in list_cache_files(directory):
+        if path.name.startswith(prefix):
+            path.unlink()
+            removed += 1
+    return removed
+
+def touch_cache_file(path: Union[str, Path]):
+    '''
+    Marks the cached file as used now (the age of the files is used for
+    removing the unused files from the cache).
+
+    :param path: the path to the cached file.
+    '''
+    Path(path).touch()
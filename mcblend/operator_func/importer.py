@@ -4,7 +4,7 @@ Functions and objects related to importing Minecraft models to Blender.
 from __future__ import annotations
 
 import math
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -13,999 +13,11 @@ import mathutils
 import bpy
 
 from .common import (
-    MINECRAFT_SCALE_FACTOR, CubePolygons, CubePolygon, MeshType)
+    MINECRAFT_SCALE_FACTOR, MeshType, get_cube_side, get_cube_polygon_order)
 from .uv import CoordinatesConverter
-from .exception import FileIsNotAModelException, ImportingNotImplementedError
-
-def _assert(expr: bool, msg: str = ''):
-    '''Used in this module to raise exceptions based on condition.'''
-    if not expr:
-        raise FileIsNotAModelException(msg)
-
-def _assert_is_vector(
-        name: str, obj: Any, length: int, types: Tuple, json_path: List
-    ) -> None:
-    '''
-    Asserts that object is an array of specific length with specific type of
-    items.
-    '''
-    _assert(isinstance(obj, list), f'{json_path}::{name} is not a list')
-    _assert(
-        len(obj) == length,
-        f'{json_path}::{name} has invalid length {len(obj)} != {length}')
-    _assert(
-        all([isinstance(i, types) for i in obj]),
-        f'{json_path}::{name} is not instance of List[{types}]')
-
-def _assert_has_required_keys(
-        what: str, has_keys: Set, required_keys: Set, json_path: List):
-    '''Asserts that object has required keys.'''
-    missing_keys = required_keys - has_keys
-    if len(missing_keys) != 0:
-        raise FileIsNotAModelException(
-            f'{json_path}::{what} is missing properties: {missing_keys}')
-
-def _assert_has_accepted_keys_only(
-        what: str, has_keys: Set, accepted_keys: Set, json_path: List):
-    '''Asserts that object has only keys from accepted set.'''
-    additional_keys = has_keys - accepted_keys
-    if len(additional_keys) != 0:
-        raise FileIsNotAModelException(
-            f'{json_path}::{what} has unexpected properties: {additional_keys}')
-
-def _assert_is_type(
-        name: str, obj: Any, types: Tuple, json_path: List):
-    '''Asserts that object is instance of specific type'''
-    if not isinstance(obj, types):
-        raise FileIsNotAModelException(
-            f'{json_path}::{name} is not an instance of {types}')
-
-def pick_version_parser(parsers: Tuple[str, ...], version: str):
-    '''
-    Picks the earliest possible format_version greater or equal to the known
-    version ot of list of parser names for different format versions.
-
-    :param parsers: The list of format_versions that identify the parser to
-        use for parsing an object.
-    '''
-    def to_tuple(version: str) -> Tuple[int]:
-        try:
-            return tuple(  # type: ignore
-                map(int, version.split('.')))
-        except Exception as e:
-            raise FileIsNotAModelException(
-                f'Unable to parse format version number: {version}') from e
-
-    t_parsers = [to_tuple(parser) for parser in parsers]
-    t_parsers.sort(reverse=True)
-    t_version = to_tuple(version)
-
-    best_choice = None
-    for t_parser in t_parsers:
-        if t_parser <= t_version:
-            best_choice = t_parser
-            break
-    if best_choice is None:
-        raise FileIsNotAModelException(
-            f'Unsupported format version: {version}')
-    return '.'.join([str(i) for i in best_choice])
-
-
-class ModelLoader:
-    '''
-    Interface loads model from a JSON dict with Minecraft model.
-    Fills missing, optional data with default values.
-
-    :param data: The JSON dict with models file.
-    :param geometry_name: Optional - the name of the geometry to load.
-    '''
-    def __init__(self, data: Dict, geometry_name: str = ""):
-        self.data = data
-        self.format_version = self._load_format_version(data)
-        geometry, geometry_path = self._load_geometry(
-            geometry_name, self.data)
-
-        self.description: Dict = self._load_description(
-            geometry, geometry_path)
-        self.bones: List = self._load_bones(
-            geometry['bones'], geometry_path + ['bones'])
-
-    def _load_format_version(self, data: Dict) -> str:
-        '''
-        Returns the version of the model from JSON file loaded into data.
-
-        :param data: JSON dict with model file.
-        '''
-        # pylint: disable=no-self-use
-        _assert_has_required_keys(
-            'model file', set(data.keys()), {'format_version'}, [])
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), data['format_version'])
-        if parser_version == '1.12.0':
-            _assert_has_required_keys(
-                'model file', set(data.keys()),
-
-                {'minecraft:geometry', 'format_version'},
-                [])
-            _assert_has_accepted_keys_only(
-                'model file', set(data.keys()),
-                {'minecraft:geometry', 'format_version', 'cape'}, [])
-            if 'cape' in data.keys():
-                raise ImportingNotImplementedError('cape', [])
-            return data['format_version']
-
-        if parser_version == '1.8.0':
-            # All geometries must start with geometry.
-            for k in data.keys():  # key must be string because its from json
-                _assert(
-                    (
-                        k.startswith('geometry.') or
-                        k in ['debug', 'format_version']
-                    ),
-                    f'{[]}::{k} is invalid geometry name (it should start '
-                    'with "geometry."'
-                )
-            if 'debug' in data.keys():
-                raise ImportingNotImplementedError('debug', [])
-            return data['format_version']
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_geometry(
-            self, geometry_name: str, data: Any) -> Tuple[Dict, List]:
-        '''
-        Finds and returns geometry with specific name from list of geometries
-        from JSON dict with models. Returns the geometry dict with
-        all of the missing default values added and the JSON path to the
-        geometry.
-
-        :param geometry_name: The name of geometry
-        :param data: Root object of the JSON.
-        '''
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version == '1.12.0':
-            geometries = data['minecraft:geometry']
-            path: List = ['minecraft:geometry']
-            _assert_is_type('geometries', geometries, (list,), path)
-            for i, geometry in enumerate(geometries):
-                path = ['minecraft:geometry', i]
-                _assert_is_type('geometry', geometry, (dict,), path)
-                _assert_has_required_keys(
-                    'geometry', set(geometry.keys()), {'description', 'bones'},
-                    path)
-                _assert_has_accepted_keys_only(
-                    'geometry', set(geometry.keys()), {'description', 'bones'},
-                    path)
-                desc = geometry['description']
-                if 'identifier' not in desc:
-                    raise FileIsNotAModelException(
-                        f'{path}::description is missing identifier')
-                identifier = desc['identifier']
-                if geometry_name in (identifier, ''):
-                    return geometry, path
-            raise ValueError(f'Unable to find geometry called geometry.{geometry_name}')
-
-        if parser_version == '1.8.0':
-            geometries = data
-            path = []
-            _assert_is_type('geometries', geometries, (dict,), path)
-            for k, geometry in geometries.items():
-                if k in ['format_version', 'debug']:
-                    continue
-                path = [k]
-                _assert_is_type('geometry', geometry, (dict,), path)
-                _assert_has_accepted_keys_only(
-                    'geometry', set(geometry.keys()),
-                    {
-                        "debug", "visible_bounds_width",
-                        "visible_bounds_height", "visible_bounds_offset",
-                        "texturewidth", "textureheight", "cape", "bones"
-                    }, path)
-                identifier = k
-                if geometry_name in (identifier, ''):
-                    return geometry, path
-            raise ValueError(f'Unable to find geometry called geometry.{geometry_name}')
-        raise FileIsNotAModelException(f'Unsupported format version: {self.format_version}')
-
-    def _load_description(self, geometry: Any, geometry_path: List) -> Dict:
-        '''
-        Returns the description of the geometry.
-
-        :param geometry: The geometry with description.
-        :param geometry_path: The JSON path to the geometry (used for error
-            messages)
-        '''
-        result = {
-            "texture_width" : 64,
-            "texture_height" : 64,
-            "visible_bounds_offset" : [0, 0, 0],
-            "visible_bounds_width" : 1,
-            "visible_bounds_height": 1
-        }
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version == '1.12.0':
-            desc = geometry['description']
-            path = geometry_path + ['description']
-
-            _assert_has_required_keys(
-                'description', set(desc.keys()), {'identifier'}, path)
-            acceptable_keys = {
-                'identifier', 'texture_width', 'texture_height',
-                'visible_bounds_offset', 'visible_bounds_width',
-                'visible_bounds_height'}
-            _assert_has_accepted_keys_only(
-                'description', set(desc.keys()), acceptable_keys, path)
-
-            _assert_is_type(
-                'identifier', desc['identifier'], (str,),
-                geometry_path + ['identifier'])
-            result['identifier'] = desc['identifier']
-            if 'texture_width' in desc:
-                _assert_is_type(
-                    'texture_width', desc['texture_width'], (int, float),
-                    geometry_path + ['texture_width'])
-                result['texture_width'] = int(desc['texture_width'])
-            if 'texture_height' in desc:
-                _assert_is_type(
-                    'texture_height', desc['texture_height'], (int, float),
-                    geometry_path + ['texture_height'])
-                result['texture_height'] = int(desc['texture_height'])
-            if 'visible_bounds_offset' in desc:
-                _assert_is_vector(
-                    'visible_bounds_offset', desc['visible_bounds_offset'], 3,
-                    (int, float), geometry_path + ['visible_bounds_offset'])
-                result['visible_bounds_offset'] = desc['visible_bounds_offset']
-            if 'visible_bounds_width' in desc:
-                _assert_is_type(
-                    'visible_bounds_width', desc['visible_bounds_width'],
-                    (int, float), geometry_path + ['visible_bounds_width'])
-                result['visible_bounds_width'] = desc['visible_bounds_width']
-            if 'visible_bounds_height' in desc:
-                _assert_is_type(
-                    'visible_bounds_height', desc['visible_bounds_height'],
-                    (int, float), geometry_path + ['visible_bounds_height'])
-                result['visible_bounds_height'] = desc['visible_bounds_height']
-            return result
-        if parser_version == '1.8.0':
-            desc = geometry
-            path = geometry_path
-
-            acceptable_keys = {
-                "debug", "visible_bounds_width",
-                "visible_bounds_height", "visible_bounds_offset",
-                "texturewidth", "textureheight", "cape", "bones"}
-            _assert_has_accepted_keys_only(
-                'geometry', set(desc.keys()), acceptable_keys, path)
-
-            _assert_is_type(
-                'identifier', path[-1], (str,),
-                geometry_path + ['identifier'])
-            result['identifier'] = path[-1]
-            if 'debug' in desc:
-                _assert_is_type(
-                    'debug', desc['debug'], (bool,),
-                    geometry_path + ['debug'])
-                raise ImportingNotImplementedError('debug', path + ['debug'])
-            if 'texturewidth' in desc:
-                _assert_is_type(
-                    'texturewidth', desc['texturewidth'], (int, float),
-                    geometry_path + ['texturewidth'])
-                # texture_width not texturewidth (not a bug!!!)
-                result['texture_width'] = int(desc['texturewidth'])
-            if 'textureheight' in desc:
-                _assert_is_type(
-                    'textureheight', desc['textureheight'], (int, float),
-                    geometry_path + ['textureheight'])
-                # texture_height not textureheight (not a bug!!!)
-                result['texture_height'] = int(desc['textureheight'])
-            if 'visible_bounds_offset' in desc:
-                _assert_is_vector(
-                    'visible_bounds_offset', desc['visible_bounds_offset'], 3,
-                    (int, float), geometry_path + ['visible_bounds_offset'])
-                result['visible_bounds_offset'] = desc['visible_bounds_offset']
-            if 'visible_bounds_width' in desc:
-                _assert_is_type(
-                    'visible_bounds_width', desc['visible_bounds_width'],
-                    (int, float), geometry_path + ['visible_bounds_width'])
-                result['visible_bounds_width'] = desc['visible_bounds_width']
-            if 'visible_bounds_height' in desc:
-                _assert_is_type(
-                    'visible_bounds_height', desc['visible_bounds_height'],
-                    (int, float), geometry_path + ['visible_bounds_height'])
-                result['visible_bounds_height'] = desc['visible_bounds_height']
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_bones(
-            self, bones: Any, bones_path: List) -> List[Dict[str, Any]]:
-        '''
-        Returns the bones from a list of bones, adds missing default values.
-
-        :param bones: List of bones.
-        :param bones_path: Path to the bones list (used for error messages).
-        '''
-        result: List = []
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version in ('1.12.0', '1.8.0'):
-            _assert_is_type('bones property', bones, (list,), bones_path)
-            for i, bone in enumerate(bones):
-                bone_path = bones_path + [i]
-                result.append(self._load_bone(bone, bone_path))
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_bone(self, bone: Any, bone_path: List) -> Dict[str, Any]:
-        '''
-        Returns a bone, adds all of the missing default values of the
-        properties.
-
-        :param bone: Part of the json file that has the inforation about the
-            bone.
-        :param bone_path: Path to the bone (used for error messages).
-        '''
-        result: Dict[str, Any] = {
-            "parent": None,  # str
-            "pivot" : [0, 0, 0],  # List[float] len=3
-            "rotation" : [0, 0, 0],  # List[float] len=3
-            "mirror" : False,  # bool
-            "inflate": 0.0,  # float
-            "debug": False,  # bool
-            "render_group_id": 0,  # int >= 0
-            "cubes" : [],  # List[Dict]
-            "locators": {},  # Dict[...]
-            "poly_mesh": None,  # Dict
-            "texture_meshes": []  # List[Dict]
-        }
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version == '1.12.0':
-            _assert_is_type('bone', bone, (dict,), bone_path)
-
-
-            _assert_has_required_keys(
-                'bone', set(bone.keys()), {'name'}, bone_path)
-            acceptable_keys = {
-                'name', 'parent', 'pivot', 'rotation', 'mirror', 'inflate',
-                'debug', 'render_group_id', 'cubes', 'locators', 'poly_mesh',
-                'texture_meshes'}
-            _assert_has_accepted_keys_only(
-                'bone', set(bone.keys()), acceptable_keys, bone_path)
-
-            if 'name' in bone:
-                _assert_is_type(
-                    'name', bone['name'], (str,), bone_path + ['name'])
-                result['name'] = bone['name']
-            if 'parent' in bone:
-                _assert_is_type(
-                    'parent', bone['parent'], (str,), bone_path + ['parent'])
-                result['parent'] = bone['parent']
-            if 'pivot' in bone:
-                _assert_is_vector(
-                    'pivot', bone['pivot'], 3, (int, float),
-                    bone_path + ['pivot'])
-                result['pivot'] = bone['pivot']
-            if 'rotation' in bone:
-                _assert_is_vector(
-                    'rotation', bone['rotation'], 3, (int, float),
-                    bone_path + ['rotation'])
-                result['rotation'] = bone['rotation']
-            if 'mirror' in bone:
-                _assert_is_type(
-                    'mirror', bone['mirror'], (bool,), bone_path + ['mirror'])
-                result['mirror'] = bone['mirror']
-            if 'inflate' in bone:
-                _assert_is_type(
-                    'inflate', bone['inflate'], (float, int),
-                    bone_path + ['inflate'])
-                result['inflate'] = bone['inflate']
-            if 'debug' in bone:
-                _assert_is_type(
-                    'debug', bone['debug'], (bool,), bone_path + ['debug'])
-                raise ImportingNotImplementedError(
-                    'debug', bone_path + ['debug'])
-            if 'render_group_id' in bone:
-                _assert_is_type(
-                    'render_group_id', bone['render_group_id'], (int, float),
-                    bone_path + ['render_group_id'])
-                # int >= 0
-                raise ImportingNotImplementedError(
-                    'render_group_id', bone_path + ['render_group_id'])
-            if 'cubes' in bone:
-                # default mirror for cube is the bones mirror property
-                result['cubes'] = self._load_cubes(
-                    bone['cubes'], bone_path + ['cubes'], result['mirror'],
-                    result['inflate'])
-            if 'locators' in bone:
-                result['locators'] = self._load_locators(
-                    bone['locators'], bone_path + ['locators'])
-            if 'poly_mesh' in bone:
-                result['poly_mesh'] = self._load_poly_mesh(
-                    bone['poly_mesh'], bone_path + ['poly_mesh'])
-            if 'texture_meshes' in bone:
-                # type: list
-                raise ImportingNotImplementedError(
-                    'texture_meshes', bone_path + ['texture_meshes'])
-            return result
-        if parser_version == '1.8.0':
-            _assert_is_type('bone', bone, (dict,), bone_path)
-
-            _assert_has_required_keys(
-                'bone', set(bone.keys()), {'name'}, bone_path)
-            acceptable_keys = {
-                'name', 'reset', 'neverRender', 'parent', 'pivot', 'rotation',
-                'bind_pose_rotation', 'mirror', 'inflate', 'debug',
-                'render_group_id', 'cubes', 'locators', 'poly_mesh',
-                'texture_meshes'}
-            _assert_has_accepted_keys_only(
-                'bone', set(bone.keys()), acceptable_keys, bone_path)
-
-            if 'name' in bone:
-                _assert_is_type(
-                    'name', bone['name'], (str,), bone_path + ['name'])
-                result['name'] = bone['name']
-            if 'reset' in bone:
-                _assert_is_type(
-                    'reset', bone['reset'], (bool,), bone_path + ['reset'])
-                raise ImportingNotImplementedError(
-                    'reset', bone_path + ['reset'])
-            if 'neverRender' in bone:
-                _assert_is_type(
-                    'neverRender', bone['neverRender'], (bool,),
-                    bone_path + ['neverRender'])
-                raise ImportingNotImplementedError(
-                    'neverRender', bone_path + ['neverRender'])
-            if 'parent' in bone:
-                _assert_is_type(
-                    'parent', bone['parent'], (str,), bone_path + ['parent'])
-                result['parent'] = bone['parent']
-            if 'pivot' in bone:
-                _assert_is_vector(
-                    'pivot', bone['pivot'], 3, (int, float),
-                    bone_path + ['pivot'])
-                result['pivot'] = bone['pivot']
-            if 'rotation' in bone:
-                _assert_is_vector(
-                    'rotation', bone['rotation'], 3, (int, float),
-                    bone_path + ['rotation'])
-                result['rotation'] = bone['rotation']
-            if 'bind_pose_rotation' in bone:
-                _assert_is_vector(
-                    'bind_pose_rotation', bone['bind_pose_rotation'], 3,
-                    (int, float), bone_path + ['bind_pose_rotation'])
-                raise ImportingNotImplementedError(
-                    'bind_pose_rotation', bone_path + ['bind_pose_rotation'])
-            if 'mirror' in bone:
-                _assert_is_type(
-                    'mirror', bone['mirror'], (bool,), bone_path + ['mirror'])
-                result['mirror'] = bone['mirror']
-            if 'inflate' in bone:
-                _assert_is_type(
-                    'inflate', bone['inflate'], (float, int),
-                    bone_path + ['inflate'])
-                result['inflate'] = bone['inflate']
-            if 'debug' in bone:
-                _assert_is_type(
-                    'debug', bone['debug'], (bool,), bone_path + ['debug'])
-                raise ImportingNotImplementedError(
-                    'debug', bone_path + ['debug'])
-            if 'render_group_id' in bone:
-                _assert_is_type(
-                    'render_group_id', bone['render_group_id'], (int, float),
-                    bone_path + ['render_group_id'])
-                # int >= 0
-                raise ImportingNotImplementedError(
-                    'render_group_id', bone_path + ['render_group_id'])
-            if 'cubes' in bone:
-                # default mirror for cube is the bones mirror property
-                result['cubes'] = self._load_cubes(
-                    bone['cubes'], bone_path + ['cubes'], result['mirror'],
-                    result['inflate'])
-            if 'locators' in bone:
-                result['locators'] = self._load_locators(
-                    bone['locators'], bone_path + ['locators'])
-            if 'poly_mesh' in bone:
-                result['poly_mesh'] = self._load_poly_mesh(
-                    bone['poly_mesh'], bone_path + ['poly_mesh'])
-            if 'texture_meshes' in bone:
-                # type: list
-                raise ImportingNotImplementedError(
-                    'texture_meshes', bone_path + ['texture_meshes'])
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_cubes(
-            self, cubes: Any, cubes_path: List[Any], default_mirror: bool,
-            default_inflate: float) -> List[Dict[str, Any]]:
-        '''
-        Returns the cubes from the list of cubes, add missing default values.
-
-        :param cubes: List of cubes.
-        :param cubes_path: Path to the cubes list (used for error messages).
-        :param default_mirror: Mirror value of a bone that owns this list
-            of cubes.
-        '''
-        result = []
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version in ('1.12.0', '1.8.0'):
-            _assert_is_type('cubes property', cubes, (list,), cubes_path)
-            for i, cube in enumerate(cubes):
-                cube_path = cubes_path + [i]
-                result.append(
-                    self._load_cube(
-                        cube, cube_path, default_mirror,
-                        default_inflate))
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _create_default_uv(
-            self, size: Tuple[float, float, float], mirror: bool,
-            uv: Tuple[float, float] = (0.0, 0.0)) -> Dict:
-        '''
-        Creates default UV dictionary (in per-face UV-mapping format) based on
-        some other properties of a cube.
-
-        :param size: The size of the cube.
-        :param mirror: The mirror property of the cube.
-        :param uv: Optional - the UV property of the cube (if the cube uses the
-            standard Minecraft UV-mapping format).
-        '''
-        # pylint: disable=no-self-use
-        width, height, depth = (int(i) for i in size)
-
-        def _face(size: Tuple[float, float], uv: Tuple[float, float]):
-            return {"uv_size": size, "uv": uv, "material_instance": ""}
-
-        face1 = _face((depth, height), (uv[0], uv[1] + depth))
-        face2 = _face((width, height), (uv[0]+depth, uv[1] + depth))
-        face3 = _face((depth, height), (uv[0]+depth + width, uv[1] + depth))
-        face4 = _face((width, height), (uv[0]+2*depth + width, uv[1] + depth))
-        face5 = _face((width, depth), (uv[0]+depth, uv[1]))
-        face6 = _face((width, -depth), (uv[0]+depth + width, uv[1] + depth))
-        if mirror:
-            face_west, face_east = face1, face3
-        else:
-            face_east, face_west = face1, face3
-        # No mirror: | # Mirror:
-        #   5 6      | #   5 6
-        # 1 2 3 4    | # 3 2 1 4
-        result: Dict = {
-            "north": face2, "south": face4, "east": face_east,
-            "west": face_west, "up": face5, "down": face6}
-        return result
-
-    def _load_cube(
-            self, cube: Any, cube_path: List, default_mirror: bool,
-            default_inflate: float) -> Dict[str, Any]:
-        '''
-        Returns a cube with added all of the missing default values of the
-        properties.
-
-        :param cube: Part of the JSON dict that has the inforation about the
-            cube.
-        :param cube_path: JSON path to the cube (used for error messages).
-        :param default_mirror: Mirror value of a bone that owns this cube.
-        '''
-        result = {
-            "origin" : (0, 0, 0),  # Listfloat] len=3
-            "size" : (0, 0, 0),  # Listfloat] len=3
-            "rotation" : (0, 0, 0),  # Listfloat] len=3
-            "pivot" : (0, 0, 0),  # Listfloat] len=3
-            "inflate" : default_inflate,  # float
-            "mirror" : default_mirror,  # mirror
-
-            # Default UV value is based on the size and mirror of the cube
-            # before return statement
-            "uv": None
-        }
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version == '1.12.0':
-            _assert_is_type('cube', cube, (dict,), cube_path)
-            # There is no required keys {} is a valid cube
-            acceptable_keys = {
-                "mirror", "inflate", "pivot", "rotation", "origin",
-                "size", "uv"}
-            _assert_has_accepted_keys_only(
-                'cube', set(cube.keys()), acceptable_keys, cube_path)
-            if 'origin' in cube:
-                _assert_is_vector(
-                    'origin', cube['origin'], 3, (int, float),
-                    cube_path + ['origin'])
-                result['origin'] = cube['origin']
-            if 'size' in cube:
-                _assert_is_vector(
-                    'size', cube['size'], 3, (int, float),
-                    cube_path + ['size'])
-                result['size'] = cube['size']
-            if 'rotation' in cube:
-                _assert_is_vector(
-                    'rotation', cube['rotation'], 3, (int, float),
-                    cube_path + ['rotation'])
-                result['rotation'] = cube['rotation']
-            if 'pivot' in cube:
-                _assert_is_vector(
-                    'pivot', cube['pivot'], 3, (int, float),
-                    cube_path + ['pivot'])
-                result['pivot'] = cube['pivot']
-            if 'inflate' in cube:
-                _assert_is_type(
-                    'inflate', cube['inflate'], (int, float), cube_path + ['inflate'])
-                result['inflate'] = cube['inflate']
-            if 'mirror' in cube:
-                _assert_is_type(
-                    'mirror', cube['mirror'], (bool,), cube_path + ['mirror'])
-                result['mirror'] = cube['mirror']
-            if 'uv' in cube:
-                _assert_is_type(
-                    'uv', cube['uv'], (list, dict), cube_path + ['uv'])
-                if isinstance(cube['uv'], dict):
-                    result['uv'] = self._load_uv(
-                        cube['uv'], cube_path + ['uv'],
-                        tuple(result['size'])  # type: ignore
-                    )
-                elif isinstance(cube['uv'], list):
-                    _assert_is_vector(
-                        'uv', cube['uv'], 2, (int, float), cube_path + ['uv'])
-                    result['uv'] = self._create_default_uv(
-                        tuple(result['size']),  # type: ignore
-                        result['mirror'],  # type: ignore
-                        tuple(cube['uv']))  # type: ignore
-                else:
-                    raise FileIsNotAModelException(
-                        f'{cube_path + ["uv"]}::{"uv"} is not an '
-                        f'instance of {(list, dict)}')
-            # Create default UV based on size and mirror
-            if result['uv'] is None:
-                result['uv'] = result['uv'] = self._create_default_uv(
-                    tuple(result['size']),  # type: ignore
-                    result['mirror'])  # type: ignore
-            return result
-        if parser_version == '1.8.0':
-            _assert_is_type('cube', cube, (dict,), cube_path)
-            # There is no required keys {} is a valid cube
-            acceptable_keys = {"origin", "size", "uv", "inflate", "mirror"}
-            _assert_has_accepted_keys_only(
-                'cube', set(cube.keys()), acceptable_keys, cube_path)
-            if 'origin' in cube:
-                _assert_is_vector(
-                    'origin', cube['origin'], 3, (int, float),
-                    cube_path + ['origin'])
-                result['origin'] = cube['origin']
-            if 'size' in cube:
-                _assert_is_vector(
-                    'size', cube['size'], 3, (int, float),
-                    cube_path + ['size'])
-                result['size'] = cube['size']
-            if 'inflate' in cube:
-                _assert_is_type(
-                    'inflate', cube['inflate'], (int, float), cube_path + ['inflate'])
-                result['inflate'] = cube['inflate']
-            if 'mirror' in cube:
-                _assert_is_type(
-                    'mirror', cube['mirror'], (bool,), cube_path + ['mirror'])
-                result['mirror'] = cube['mirror']
-            if 'uv' in cube:
-                _assert_is_type(
-                    'uv', cube['uv'], (list,), cube_path + ['uv'])
-                _assert_is_vector(
-                    'uv', cube['uv'], 2, (int, float), cube_path + ['uv'])
-                result['uv'] = self._create_default_uv(
-                    tuple(result['size']),  # type: ignore
-                    result['mirror'],  # type: ignore
-                    tuple(cube['uv']))  # type: ignore
-            # Create default UV based on size and mirror
-            if result['uv'] is None:
-                result['uv'] = result['uv'] = self._create_default_uv(
-                    tuple(result['size']),  # type: ignore
-                    result['mirror'])  # type: ignore
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_poly_mesh(
-            self, poly_mesh: Any, poly_mesh_path: List) -> Dict[str, Any]:
-        '''
-        Returns a cube with added all of the missing default values of the
-        properties.
-
-        :param cube: Part of the JSON dict that has the inforation about the
-            cube.
-        :param cube_path: JSON path to the cube (used for error messages).
-        :param default_mirror: Mirror value of a bone that owns this cube.
-        '''
-        result = {
-            'normalized_uvs': False,
-            'positions': [],
-            'normals': [],
-            'uvs': [],
-            'polys': [],  # 'tri_list' or 'quad_list" or list with data
-        }
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version in ['1.12.0', '1.8.0']:
-            _assert_is_type('poly_mesh', poly_mesh, (dict,), poly_mesh_path)
-            # There is no required keys {} is a valid poly_mesh
-            _assert_has_required_keys(
-                'poly_mesh', set(poly_mesh.keys()), {'polys'}, poly_mesh_path)
-            acceptable_keys = {
-                "normalized_uvs", "positions", "normals", "uvs", "polys"}
-            _assert_has_accepted_keys_only(
-                'poly_mesh', set(poly_mesh.keys()), acceptable_keys,
-                poly_mesh_path)
-            # Acceptable keys
-            if 'normalized_uvs' in poly_mesh:
-                _assert_is_type(
-                    'normalized_uvs', poly_mesh['normalized_uvs'], (bool,),
-                    poly_mesh_path + ['normalized_uvs'])
-                result['normalized_uvs'] = poly_mesh['normalized_uvs']
-            if 'positions' in poly_mesh:
-                positions = poly_mesh['positions']
-                positions_path = poly_mesh_path + ['position']
-                _assert_is_type('positions', positions, (list,), positions_path)
-                for position_id, position in enumerate(positions):
-                    _assert_is_vector(
-                        'position', position, 3, (float, int,),
-                        positions_path + [position_id])
-                    result['positions'].append(tuple(position))  # type: ignore
-            if 'normals' in poly_mesh:
-                normals = poly_mesh['normals']
-                normals_path = poly_mesh_path + ['normal']
-                _assert_is_type('normals', normals, (list,), normals_path)
-                for normal_id, normal in enumerate(normals):
-                    _assert_is_vector(
-                        'normal', normal, 3, (float, int,),
-                        normals_path + [normal_id])
-                    result['normals'].append(tuple(normal))  # type: ignore
-            if 'uvs' in poly_mesh:
-                uvs = poly_mesh['uvs']
-                uvs_path = poly_mesh_path + ['uv']
-                _assert_is_type('uvs', uvs, (list,), uvs_path)
-                for uv_id, uv in enumerate(uvs):
-                    _assert_is_vector(
-                        'uv', uv, 2, (float, int,),
-                        uvs_path + [uv_id])
-                    result['uvs'].append(tuple(uv))  # type: ignore
-            # Required keys
-            _assert_is_type(
-                'polys', poly_mesh['polys'], (str, list),
-                poly_mesh_path + ['polys'])
-            if isinstance(poly_mesh['polys'], str):
-                result['polys'] = self._create_default_polys(
-                    poly_mesh['polys'],
-                    result['positions'],  # type: ignore
-                    result['normals'],  # type: ignore
-                    result['uvs'],  # type: ignore
-                    poly_mesh_path)
-            elif isinstance(poly_mesh['polys'], list):
-                polys_path = poly_mesh_path + ['polys']
-                for poly_id, poly in enumerate(poly_mesh['polys']):
-                    curr_result_poly: List[Tuple[int, int, int]] = []
-                    result['polys'].append(curr_result_poly)  # type: ignore
-                    poly_path = polys_path + [poly_id]
-                    _assert_is_type(
-                        'poly', poly, (list,), poly_path)
-                    for poly_vertex_id, poly_vertex in enumerate(poly):
-                        _assert_is_vector(
-                            'vertex', poly_vertex, 3, (int,),
-                            poly_path + [poly_vertex_id])
-                        curr_result_poly.append(
-                            tuple(poly_vertex))  # type: ignore
-            else:
-                raise FileIsNotAModelException(
-                    f'{poly_mesh_path + ["polys"]}::{"polys"} is not an '
-                    f'instance of {(str, list)}')
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _create_default_polys(
-            self, grouping_mode: str, positions: List[List[float]],
-            normals: List[List[float]], uvs: List[List[float]],
-            poly_mesh_path: List[str]
-            ) -> List[List[List[int]]]:
-        '''
-        Creates default "polys" property of a polymesh for "tri_list" or
-        "quad_list" mode. Checks if positions, normals and uv are the same
-        length and can be divided by 3 (for tri_list mode) or 4 (for quad_list
-        mode). Rises an exception if the creating default polys list is
-        impossible with input data.
-
-        :param grouping_mode: a string with grouping mode. It should be either
-            'tri_list' or 'quad_list' otherwise an exception is risen.
-        :param positions: list of positions of the vertices.
-        :param normals: list of normals of the loops.
-        :param uvs: list of the uv coordinates of the loops.
-        :parma poly_mesh_path: the JSON path to the poly_mesh that contains
-            this polys property.
-        '''
-        # Get polygon group size (three or four items)
-        if grouping_mode == 'tri_list':
-            group_size = 3
-        elif grouping_mode == 'quad_list':
-            group_size = 4
-        else:
-            raise FileIsNotAModelException(
-                f'{poly_mesh_path + ["polys"]}::{"polys"} is not an a list of polys or a '
-                'literal string "quad_list" or "tri_list"')
-        # Check if positions, normals and uvs are the same lengths
-        pos_length = len(positions)
-        if not pos_length == len(normals) == len(uvs):
-            raise FileIsNotAModelException(
-                f'{poly_mesh_path}::"positions", "normals" and "uvs" are not '
-                'the same lengths. They must be the same lengths in "tri_list"'
-                ' and "quad_list" polys grouping mode.')
-        # Check if list length is divisible by the group_size
-        if not pos_length % group_size == 0:
-            raise FileIsNotAModelException(
-                f'{poly_mesh_path}::"positions" list length must be '
-                f'divisible by {group_size} in {grouping_mode}.')
-        # Build default polys property in list format
-        result = np.repeat(
-            range(pos_length), 3
-        ).reshape(
-            -1, group_size, 3
-        ).tolist()
-        return result
-
-    def _load_uv(
-            self, uv: Any, uv_path: List,
-            cube_size: Tuple[float, float, float]) -> Dict[str, Any]:
-        '''
-        Returns UV and adds all of the missing default values of its
-        properties.
-
-        :param uv: Part of the JSON dict that has the inforation about the uv.
-        :param uv_path: Path to the UV (used for error messages).
-        :param cube_size: Size of the cube which is being mapped (used for
-            getting default UV values).
-        '''
-        width, height, depth = cube_size
-        def _face(size: Tuple[float, float], uv: Tuple[float, float]):
-            return {"uv_size": size, "uv": uv, "material_instance": ""}
-        result = {
-            # Faces outside of the texture are invisible and should be skipped
-            # on export
-            "north": _face((0, 0), (0, -1)),
-            "south": _face((0, 0), (0, -1)),
-            "east": _face((0, 0), (0, -1)),
-            "west": _face((0, 0), (0, -1)),
-            "up": _face((0, 0), (0, -1)),
-            "down": _face((0, 0), (0, -1))
-        }
-
-        parser_version = pick_version_parser(
-            ('1.12.0',), self.format_version)
-        if parser_version == '1.12.0':
-            _assert_is_type('uv', uv, (dict,), uv_path)
-            # There is no required keys {} is a valid UV
-            acceptable_keys = {"north", "south", "east", "west", "up", "down"}
-            _assert_has_accepted_keys_only(
-                'uv', set(uv.keys()), acceptable_keys, uv_path)
-            if "north" in uv:
-                _assert_is_type(
-                    'north', uv['north'], (dict,), uv_path + ['north'])
-                result["north"] = self._load_uv_face(
-                    uv["north"], uv_path + ["north"], (depth, height))
-            if "south" in uv:
-                _assert_is_type(
-                    'south', uv['south'], (dict,), uv_path + ['south'])
-                result["south"] = self._load_uv_face(
-                    uv["south"], uv_path + ["south"], (width, height))
-            if "east" in uv:
-                _assert_is_type(
-                    'east', uv['east'], (dict,), uv_path + ['east'])
-                result["east"] = self._load_uv_face(
-                    uv["east"], uv_path + ["east"], (depth, height))
-            if "west" in uv:
-                _assert_is_type(
-                    'west', uv['west'], (dict,), uv_path + ['west'])
-                result["west"] = self._load_uv_face(
-                    uv["west"], uv_path + ["west"], (width, height))
-            if "up" in uv:
-                _assert_is_type(
-                    'up', uv['up'], (dict,), uv_path + ['up'])
-                result["up"] = self._load_uv_face(
-                    uv["up"], uv_path + ["up"], (width, depth))
-            if "down" in uv:
-                _assert_is_type(
-                    'down', uv['down'], (dict,), uv_path + ['down'])
-                result["down"] = self._load_uv_face(
-                    uv["down"], uv_path + ["down"], (width, depth))
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_uv_face(
-            self, uv_face: Any, uv_face_path: List,
-            default_size: Tuple[float, float]) -> Dict[str, Any]:
-        '''
-        Returns UV and adds all of the missing default values of its
-        properties.
-
-        :param uv_face: Part of the JSON dict that has the inforation about the
-          uv face.
-        :param uv_face_path: Path to the uv face (used for error messages).
-        :param default_size: Default size of the UV face.
-        '''
-        result = {
-            "uv_size": default_size, "uv": [0, 0], "material_instance": ""
-        }
-        parser_version = pick_version_parser(
-            ('1.12.0',), self.format_version)
-        if parser_version == '1.12.0':
-            _assert_is_type('uv_face', uv_face, (dict,), uv_face_path)
-            _assert_has_required_keys(
-                'uv', set(uv_face.keys()), {'uv'}, uv_face_path)
-            _assert_has_accepted_keys_only(
-                'uv_face', set(uv_face.keys()),
-                {"uv", "uv_size", "material_instance"}, uv_face_path)
-
-
-            _assert_is_vector(
-                'uv', uv_face['uv'], 2, (int, float),
-                uv_face_path + ['uv'])
-            result["uv"] = uv_face["uv"]
-            if "uv_size" in uv_face:
-                _assert_is_vector(
-                    'uv_size', uv_face['uv_size'], 2, (int, float),
-                    uv_face_path + ['uv_size'])
-                result["uv_size"] = uv_face["uv_size"]
-            if "material_instance" in uv_face:
-                _assert_is_type(
-                    'material_instance', uv_face['material_instance'], (str,),
-                    uv_face_path + ['material_instance'])
-                raise ImportingNotImplementedError(
-                    'material_instance', uv_face_path + ['material_instance'])
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_locators(
-            self, locators: Any, locators_path: List) -> Dict[str, Any]:
-        '''
-        Returns the locators from the list of locators with added missing
-        default values.
-
-        :param locators: List of the locators.
-        :param locators_path: Path to the locators list (used for error
-            messages)
-        '''
-        result = {}
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version in ['1.12.0', '1.8.0']:
-            _assert_is_type(
-                'locators property', locators, (dict,), locators_path)
-            for i, locator in locators.items():
-                locator_path = locators_path + [i]
-                result[i] = self._load_locator(locator, locator_path)
-            return result
-        raise FileIsNotAModelException('Unsupported format version')
-
-    def _load_locator(self, locator: Any, locator_path: List) -> Any:
-        '''
-        Returns the locator with added missing default values.
-
-        :param locator: The locator
-        :param locator_path: Path to the locator
-        '''
-        parser_version = pick_version_parser(
-            ('1.12.0', '1.8.0'), self.format_version)
-        if parser_version == '1.12.0':
-            if isinstance(locator, list):
-                _assert_is_vector('locator', locator, 3, (int, float), locator_path)
-                return locator
-
-            if isinstance(locator, dict):
-                raise ImportingNotImplementedError('locator', locator_path)
-            raise FileIsNotAModelException(
-                f'{locator_path + ["locator"]}::{"locator"} is not an '
-                f'instance of {(list, dict)}')
-        if parser_version == '1.8.0':
-            _assert_is_type('locator', locator, (list,), locator_path)
-            _assert_is_vector('locator', locator, 3, (int, float), locator_path)
-            return locator
-        raise FileIsNotAModelException('Unsupported format version')
-
+from .exception import FileIsNotAModelException
+from .model_loader import ModelLoader, LoadedGeometry
+from .scheduler import TaskSteps
 
 class ImportLocator:
     '''
@@ -1108,6 +120,52 @@ class ImportPolyMesh:
             blender_polygons.append(curr_polygon)
         return blender_polygons, self.positions, blender_normals, blender_uvs
 
+    def get_blender_mesh_data(
+            self) -> Tuple[
+                np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        Converts the poly_mesh to arrays used for creating Blender mesh (with
+        axes and scale of Blender). The loops that use the same vertex
+        more than once in a polygon are removed. The exporter sometimes adds
+        vertex twice to exported meshes because Minecraft can't handle
+        triangles properly and a polygon that uses same vertex twice won't
+        work in Blender.
+
+        :returns: the coordinates of the vertices, the vertex indices of the
+            loops, the number of the loops of every polygon, normalized
+            normals of the loops and the UVs of the loops.
+        '''
+        vertices = np.array(self.positions, dtype=np.float64).reshape(-1, 3)
+        vertices = vertices[:, [0, 2, 1]] / MINECRAFT_SCALE_FACTOR
+        normals = np.array(self.normals, dtype=np.float64).reshape(-1, 3)
+        normals = normals[:, [0, 2, 1]]
+        uvs = np.array(self.uvs, dtype=np.float64).reshape(-1, 2)
+
+        # Loops of all polygons: vertex ID, normal ID, uv ID
+        loops = np.array(
+            [loop for poly in self.polys for loop in poly],
+            dtype=np.int64).reshape(-1, 3)
+        loops_polygons = np.repeat(
+            np.arange(len(self.polys)), [len(poly) for poly in self.polys])
+        # Keep only the first occurrence of every vertex in a polygon
+        _, first_loops = np.unique(
+            np.stack([loops_polygons, loops[:, 0]], axis=1),
+            axis=0, return_index=True)
+        is_first = np.zeros(len(loops), dtype=bool)
+        is_first[first_loops] = True
+        loops = loops[is_first]
+        polygon_sizes = np.bincount(
+            loops_polygons[is_first], minlength=len(self.polys))
+
+        loop_normals = normals[loops[:, 1]]
+        lengths = np.linalg.norm(loop_normals, axis=1, keepdims=True)
+        # Zero-length normals stay unchanged
+        np.divide(
+            loop_normals, lengths, out=loop_normals, where=lengths != 0)
+        return (
+            vertices, loops[:, 0], polygon_sizes, loop_normals,
+            uvs[loops[:, 2]])
+
 
 class ImportBone:
     '''
@@ -1146,9 +204,10 @@ class ImportGeometry:
     '''
     Represents whole Minecraft geometry during import operation.
 
-    :param loader: Loader object with all of the required model properties.
+    :param loader: Loader object with all of the required model properties
+        or a geometry loaded by the loader.
     '''
-    def __init__(self, loader: ModelLoader):
+    def __init__(self, loader: Union[ModelLoader, LoadedGeometry]):
         # Set the values
         self.identifier = loader.description['identifier']
         self.texture_width = int(loader.description['texture_width'])
@@ -1166,93 +225,156 @@ class ImportGeometry:
         for bone in loader.bones:
             import_bone = ImportBone(bone)
             self.bones[import_bone.name] = import_bone
-
-    def build_with_empties(self, context: bpy_types.Context):
+        # The objects and the data created by building the geometry
+        self.blender_data: List[bpy.types.ID] = []
+
+    def remove_blender_data(self):
+        '''
+        Removes the objects and the data created by building the geometry.
+        Used for rolling back the cancelled import.
+        '''
+        for data in reversed(self.blender_data):
+            try:
+                if isinstance(data, bpy.types.Object):
+                    bpy.data.objects.remove(data)
+                elif isinstance(data, bpy.types.Mesh):
+                    bpy.data.meshes.remove(data)
+                elif isinstance(data, bpy.types.Armature):
+                    bpy.data.armatures.remove(data)
+            except ReferenceError:  # Already removed
+                pass
+        self.blender_data.clear()
+
+    def build_with_empties(
+            self, context: bpy_types.Context,
+            share_cube_meshes: bool = False):
         '''
         Builds the geometry in Blender. Uses empties to represent Minecraft
         bones.
 
         :param context: The context of running the operator.
+        :param share_cube_meshes: whether the cubes with the same size,
+            inflate, UV and mirror should use the same mesh data-block (see
+            :func:`iter_build_with_empties`).
         '''
+        for _ in self.iter_build_with_empties(context, share_cube_meshes):
+            pass
+
+    def iter_build_with_empties(
+            self, context: bpy_types.Context,
+            share_cube_meshes: bool = False) -> TaskSteps:
+        '''
+        Builds the geometry in Blender in steps (one bone in every step).
+        Uses empties to represent Minecraft bones. Yields the progress - the
+        number of the created objects and the number of all of the objects
+        (+1 for the last step which links, parents and rotates the objects).
+        The objects are linked to the scene in the last step.
+
+        :param context: The context of running the operator.
+        :param share_cube_meshes: whether the cubes with the same size,
+            inflate, UV and mirror should use the same mesh data-block. The
+            shared meshes of the cubes without rotation are centered and the
+            objects are placed in the centers of the cubes (their pivots
+            don't affect the model). The rotated cubes share the meshes
+            only if they also have the same offset from the pivot.
+        '''
+        # The vertices and the UVs of all of the cubes are computed at once
+        cubes = [cube for bone in self.bones.values() for cube in bone.cubes]
+        cubes_data = zip(
+            *_get_cubes_vertices(cubes),
+            _get_cubes_uvs(cubes, self.uv_converter))
+        # The objects are linked to the scene after creating all of them
+        new_objects: List[bpy.types.Object] = []
+        # The meshes of the cubes (used if share_cube_meshes is True)
+        cube_meshes: Dict[Tuple, bpy.types.Mesh] = {}
+        total = 1 + sum(
+            1 + len(bone.cubes) + len(bone.locators) +
+            (bone.poly_mesh is not None)
+            for bone in self.bones.values())
+
         # Create objects - and set their pivots
         for bone in self.bones.values():
+            first_new_object = len(new_objects)
             # 1. Spawn bone (empty)
-            bpy.ops.object.empty_add(type='SPHERE', location=(0, 0, 0), radius=0.2)
             bone_obj: bpy.types.Object
-            bone_obj = bone.blend_empty = context.object
+            bone_obj = bone.blend_empty = _new_empty(bone.name, 0.2)
             _mc_pivot(bone_obj, bone.pivot)  # 2. Apply translation
-            bone_obj.name = bone.name  # 3. Apply custom properties
+            # 3. Apply custom properties
             bone_obj.nusiq_mcblend_object_properties.is_bone = True
+            new_objects.append(bone_obj)
             for cube in bone.cubes:
                 cube_obj: bpy.types.Object
-                # 1. Spawn cube
-                bpy.ops.mesh.primitive_cube_add(
-                    size=1, enter_editmode=False, location=(0, 0, 0)
-                )
-                cube_obj = cube.blend_cube = context.object
-
-                # 2. Set uv
-                # warning! Moving this code below cube transformation would
-                # break it because bound_box is not getting updated properly
-                # before the end of running of the opperator.
+                # 1. Spawn cube with its size, inflate, translation and UV
+                centered_vertices, translation, uvs = next(cubes_data)
+                # The translation of the object from the pivot
+                object_translation = None
+                if not share_cube_meshes:
+                    mesh = _new_cube_mesh(
+                        'Cube', centered_vertices + translation, uvs)
+                    self.blender_data.append(mesh)
+                else:
+                    mesh_key: Tuple = (
+                        tuple(cube.size), cube.inflate, bool(cube.mirror),
+                        uvs.tobytes())
+                    if any(cube.rotation):
+                        # Rotated cubes rotate around the pivot so the
+                        # translation must stay in the mesh
+                        mesh_key += (translation.tobytes(),)
+                        vertices = centered_vertices + translation
+                    else:
+                        object_translation = translation
+                        vertices = centered_vertices
+                    if mesh_key not in cube_meshes:
+                        cube_meshes[mesh_key] = _new_cube_mesh(
+                            'Cube', vertices, uvs)
+                        self.blender_data.append(cube_meshes[mesh_key])
+                    mesh = cube_meshes[mesh_key]
+                cube_obj = cube.blend_cube = bpy.data.objects.new(
+                    'Cube', mesh)
+                # 2. Set custom properties
                 cube_obj.nusiq_mcblend_object_properties.mirror = cube.mirror
-                _set_uv(
-                    self.uv_converter,
-                    CubePolygons.build(cube_obj, cube.mirror),
-                    cube.uv, cube_obj.data.uv_layers.active)
-
-                # 3. Set size & inflate
-                cube.blend_cube.nusiq_mcblend_object_properties.inflate = (
+                cube_obj.nusiq_mcblend_object_properties.inflate = (
                     cube.inflate)
-                _mc_set_size(cube_obj, cube.size, inflate=cube.inflate)
-                _mc_pivot(cube_obj, cube.pivot)  # 4. Move pivot
-                # 5. Apply translation
-                _mc_translate(cube_obj, cube.origin, cube.size, cube.pivot)
+                _mc_pivot(cube_obj, cube.pivot)  # 3. Move pivot
+                if object_translation is not None:
+                    # Move the origin of the object to the center of the cube
+                    cube_obj.location += mathutils.Vector(object_translation)
+                new_objects.append(cube_obj)
 
             if bone.poly_mesh is not None:
                 # 1. Unpack the data to format suitable for creating Blender
                 # mesh
-                blender_polygons: List[List[int]] = []
-                blender_normals: List[mathutils.Vector] = []
-                blender_uvs: List[Tuple[float, float]] = []
-                blender_vertices: List[Tuple[float, float, float]] = []
-
-                for vertex in bone.poly_mesh.positions:
-                    blender_vertices.append((
-                            vertex[0] / MINECRAFT_SCALE_FACTOR,
-                            vertex[2] / MINECRAFT_SCALE_FACTOR,
-                            vertex[1] / MINECRAFT_SCALE_FACTOR))
-                for poly in bone.poly_mesh.polys:
-                    curr_polygon: List[int] = []
-                    for vertex_id, normal_id, uv_id in poly:
-                        if vertex_id in curr_polygon:
-                            # vertex can appear only once per polygon. The
-                            # exporter sometimes adds vertex twice to exported
-                            # meshes because Minecraft can't handle triangles
-                            # properly. A polygon that uses same vertex twice
-                            # won't work in Blender.
-                            continue
-                        curr_polygon.append(vertex_id)
-                        curr_normal = bone.poly_mesh.normals[normal_id]
-                        blender_normals.append(
-                            mathutils.Vector((
-                                curr_normal[0],
-                                curr_normal[2],
-                                curr_normal[1])
-                            ).normalized()
-                        )
-                        blender_uvs.append(bone.poly_mesh.uvs[uv_id])
-                    blender_polygons.append(curr_polygon)
+                (
+                    vertices, loop_vertices, polygon_sizes, loop_normals,
+                    loop_uvs
+                ) = bone.poly_mesh.get_blender_mesh_data()
 
                 # 2. Create mesh
                 mesh = bpy.data.meshes.new(name='poly_mesh')
-                mesh.from_pydata(blender_vertices, [], blender_polygons)
+                self.blender_data.append(mesh)
+                mesh.vertices.add(len(vertices))
+                mesh.vertices.foreach_set(
+                    'co', vertices.astype(np.float32).ravel())
+                mesh.loops.add(len(loop_vertices))
+                mesh.loops.foreach_set(
+                    'vertex_index', loop_vertices.astype(np.int32))
+                mesh.polygons.add(len(polygon_sizes))
+                polygon_sizes = polygon_sizes.astype(np.int32)
+                # The int properties need int32 arrays (np.cumsum of int32
+                # returns int64)
+                loop_starts = np.cumsum(polygon_sizes, dtype=np.int32)
+                loop_starts -= polygon_sizes
+                mesh.polygons.foreach_set('loop_start', loop_starts)
+                if bpy.app.version < (4, 0, 0):
+                    # Since Blender 4.0 the sizes are defined by loop_start
+                    mesh.polygons.foreach_set('loop_total', polygon_sizes)
+                mesh.update(calc_edges=True)
 
                 if not mesh.validate():  # Valid geometry
                     # 3. Create an object and connect mesh to it, mark as
                     # polymesh
                     poly_mesh_obj = bpy.data.objects.new('poly_mesh', mesh)
-                    context.collection.objects.link(poly_mesh_obj)
+                    new_objects.append(poly_mesh_obj)
                     bone.poly_mesh.blend_object = poly_mesh_obj
                     poly_mesh_obj.nusiq_mcblend_object_properties.mesh_type = (
                         MeshType.POLY_MESH.value)
@@ -1260,12 +382,12 @@ class ImportGeometry:
                     # 4. Set mesh normals and UVs
                     mesh.create_normals_split()
                     mesh.use_auto_smooth = True
-                    mesh.normals_split_custom_set(blender_normals)
+                    mesh.normals_split_custom_set(loop_normals.tolist())
                     if mesh.uv_layers.active is None:
                         mesh.uv_layers.new()
                     uv_layer = mesh.uv_layers.active.data  # type: ignore
-                    for i, uv in enumerate(blender_uvs):
-                        uv_layer[i].uv = uv
+                    uv_layer.foreach_set(
+                        'uv', loop_uvs.astype(np.float32).ravel())
                 else:
                     del mesh
                     raise FileIsNotAModelException('Invalid poly_mesh geometry!')
@@ -1273,13 +395,21 @@ class ImportGeometry:
             for locator in bone.locators:
                 # 1. Spawn locator (empty)
                 locator_obj: bpy.types.Object
-                bpy.ops.object.empty_add(type='SPHERE', location=(0, 0, 0), radius=0.1)
-                locator_obj = locator.blend_empty = context.object
+                locator_obj = locator.blend_empty = _new_empty(
+                    locator.name, 0.1)
                 _mc_pivot(locator_obj, locator.position)  # 2. Apply translation
-                # 3. Apply custom properties
-                locator_obj.name = locator.name
+                new_objects.append(locator_obj)
+            self.blender_data.extend(new_objects[first_new_object:])
+            yield len(new_objects), total
+
+        for obj in new_objects:
+            context.collection.objects.link(obj)
 
         # Parent objects (keep offset)
+        # The objects aren't rotated yet and the world matrix of every object
+        # is a translation to its pivot. The parent inverse matrix is the
+        # inverted translation of the parent so there is no need for updating
+        # the view layer to read the world matrices.
         for bone in self.bones.values():
             bone_obj = bone.blend_empty
             # 1. Parent bone keep transform
@@ -1287,55 +417,67 @@ class ImportGeometry:
                 parent_obj: bpy.types.Object = self.bones[
                     bone.parent
                 ].blend_empty
-                context.view_layer.update()
                 bone_obj.parent = parent_obj
-                bone_obj.matrix_parent_inverse = (
-                    parent_obj.matrix_world.inverted()
-                )
+                bone_obj.matrix_parent_inverse = mathutils.Matrix.Translation(
+                    -parent_obj.location)
+            parent_inverse = mathutils.Matrix.Translation(-bone_obj.location)
+            children: List[bpy.types.Object] = []
             # 2. Parent cubes keep transform
-            for cube in bone.cubes:
-                cube_obj = cube.blend_cube
-                context.view_layer.update()
-                cube_obj.parent = bone_obj
-                cube_obj.matrix_parent_inverse = (
-                    bone_obj.matrix_world.inverted()
-                )
+            children.extend(cube.blend_cube for cube in bone.cubes)
             # 3. Parent poly_mesh keep transform
             if bone.poly_mesh is not None:
-                poly_mesh_obj = bone.poly_mesh.blend_object
-                context.view_layer.update()
-                poly_mesh_obj.parent = bone_obj
-                poly_mesh_obj.matrix_parent_inverse = (
-                    bone_obj.matrix_world.inverted()
-                )
-
+                children.append(bone.poly_mesh.blend_object)
             # 4. Parent locators keep transform
-            for locator in bone.locators:
-                locator_obj = locator.blend_empty
-                context.view_layer.update()
-                locator_obj.parent = bone_obj
-                locator_obj.matrix_parent_inverse = (
-                    bone_obj.matrix_world.inverted()
-                )
+            children.extend(locator.blend_empty for locator in bone.locators)
+            for child_obj in children:
+                child_obj.parent = bone_obj
+                child_obj.matrix_parent_inverse = parent_inverse
 
         # Rotate objects
         for bone in self.bones.values():
-            bone_obj = bone.blend_empty
-            context.view_layer.update()
-            _mc_rotate(bone_obj, bone.rotation)
+            _mc_rotate(bone.blend_empty, bone.rotation)
             for cube in bone.cubes:
-                cube_obj = cube.blend_cube
-                _mc_rotate(cube_obj, cube.rotation)
+                _mc_rotate(cube.blend_cube, cube.rotation)
+        yield total, total
 
-    def build_with_armature(self, context: bpy_types.Context):
+    def build_with_armature(
+            self, context: bpy_types.Context,
+            share_cube_meshes: bool = False):
         '''
         Builds the geometry in Blender. Uses armature and bones to represent
         the Minecraft bones.
 
         :param context: The context of running the operator.
+        :param share_cube_meshes: whether the cubes with the same size,
+            inflate, UV and mirror should use the same mesh data-block (see
+            :func:`iter_build_with_empties`).
+        '''
+        for _ in self.iter_build_with_armature(context, share_cube_meshes):
+            pass
+
+    def iter_build_with_armature(
+            self, context: bpy_types.Context,
+            share_cube_meshes: bool = False) -> TaskSteps:
+        '''
+        Builds the geometry in Blender in steps. Uses armature and bones to
+        represent the Minecraft bones. Yields the progress like
+        :func:`iter_build_with_empties` with one more step for creating the
+        armature.
+
+        :param context: The context of running the operator.
+        :param share_cube_meshes: whether the cubes with the same size,
+            inflate, UV and mirror should use the same mesh data-block (see
+            :func:`iter_build_with_empties`).
         '''
         # Build everything using empties
-        self.build_with_empties(context)
+        total = 0
+        for done, total in self.iter_build_with_empties(
+                context, share_cube_meshes):
+            yield done, total + 1
+        # The only update of the view layer during the import. The bones
+        # copy the world matrices of the empties.
+        context.view_layer.update()
+        bone_length = 0.3
 
         # Build armature
         # Create empty armature and enter edit mode:
@@ -1344,10 +486,11 @@ class ImportGeometry:
         bpy.ops.armature.delete()
         # Save the armature
         armature = context.object
+        self.blender_data.extend((armature, armature.data))
         edit_bones = armature.data.edit_bones
         # Create bones
         for bone in self.bones.values():
-            add_bone(edit_bones, 0.3, bone)
+            add_bone(edit_bones, bone_length, bone)
 
         # Parent bones
         for bone in self.bones.values():
@@ -1365,8 +508,6 @@ class ImportGeometry:
             '''
             Used for replacing empty parent with new bone parent
             '''
-            context.view_layer.update()
-
             # Copy matrix_parent_inverse from previous parent
             # It can be copied because old parent (locator) has the same
             # transformation as the new one (bone)
@@ -1380,17 +521,10 @@ class ImportGeometry:
 
             obj.matrix_parent_inverse = parent_inverse  # type: ignore
 
-            # Correct parenting to tail of the bone instead of head
-            context.view_layer.update()
-            blend_bone = armature.pose.bones[bone.name]
-            # pylint: disable=no-member
-            correction = mathutils.Matrix.Translation(
-                blend_bone.head-blend_bone.tail
-            )
-            obj.matrix_world = (  # type: ignore
-                correction @
-                obj.matrix_world  # type: ignore
-            )
+            # Correct parenting to tail of the bone instead of head. The
+            # parent inverse matrix is a translation so the Y axis of the
+            # parent space of the object is the Y axis of the bone.
+            obj.location.y -= bone_length  # type: ignore
 
         # Replace empties with bones
         for bone in self.bones.values():
@@ -1410,66 +544,124 @@ class ImportGeometry:
 
             # remove the locators
             bpy.data.objects.remove(bone_obj)
+        yield total + 1, total + 1
 
 
-def _mc_translate(
-        obj: bpy.types.Object, mctranslation: Tuple[float, float, float],
-        mcsize: Tuple[float, float, float],
-        mcpivot: Tuple[float, float, float]
-    ):
+# 0. ---; 1. --+; 2. -+-; 3. -++; 4. +--; 5. +-+; 6. ++- 7. +++
+_CUBE_VERTICES_SIGNS = np.array([
+    [-1, -1, -1], [-1, -1, 1], [-1, 1, -1], [-1, 1, 1],
+    [1, -1, -1], [1, -1, 1], [1, 1, -1], [1, 1, 1]])
+# The polygons of the cube (the same as in the cube added by Blender)
+_CUBE_POLYGONS = (
+    (0, 1, 3, 2), (2, 3, 7, 6), (6, 7, 5, 4), (4, 5, 1, 0), (2, 6, 4, 0),
+    (7, 3, 1, 5))
+
+def _get_cube_uv_loops(mirror: bool) -> Dict[str, Tuple[int, int, int, int]]:
     '''
-    Translates a Blender object using a translation vector written in Minecraft
-    coordinates system.
+    Returns the indices of the loops of the mesh with the _CUBE_POLYGONS in
+    the order of the corners of the UV faces (left down, right down, right up,
+    left up) for every side of the cube.
 
-    :param obj: Blender object to transform..
-    :param mctranslation: Minecraft translation.
-    :param mcsize: Minecraft size.
-    :param mcpivot: Minecraft pivot.
+    :param mirror: whether the order should match Minecraft mirrored mapping
+        format.
     '''
-    pivot_offset = mathutils.Vector(
-        np.array(mcpivot)[[0, 2, 1]] / MINECRAFT_SCALE_FACTOR
-    )
-    size_offset = mathutils.Vector(
-        (np.array(mcsize)[[0, 2, 1]] / 2) / MINECRAFT_SCALE_FACTOR
-    )
-    translation = mathutils.Vector(
-        np.array(mctranslation)[[0, 2, 1]] / MINECRAFT_SCALE_FACTOR
-    )
-    for vertex in obj.data.vertices:
-        vertex.co += (translation - pivot_offset + size_offset)
+    result = {}
+    for polygon_index, polygon in enumerate(_CUBE_POLYGONS):
+        bound_box_vertices = [
+            ''.join('+' if i > 0 else '-' for i in _CUBE_VERTICES_SIGNS[v])
+            for v in polygon]
+        side = get_cube_side(bound_box_vertices)
+        order = get_cube_polygon_order(side, mirror, bound_box_vertices)
+        result[side] = tuple(polygon_index*4 + i for i in order)
+    return result  # type: ignore
+
+# The topology of the cubes is always the same so the loops can be found once
+_CUBE_UV_LOOPS = {
+    mirror: _get_cube_uv_loops(mirror) for mirror in (False, True)}
+
+def _get_cubes_vertices(
+        cubes: List[ImportCube]) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Returns the coordinates of the vertices of the Blender meshes of the cubes
+    (with applied size and inflate) relative to the centers of the cubes and
+    the translations of the centers of the cubes from their pivots. The sums
+    of the vertices and the translations are the coordinates in the local
+    space of the objects with the origins in the pivots of the cubes.
+
+    :param cubes: the cubes.
+    :returns: array with shape (number of cubes, 8, 3) with the vertices in
+        the order used by _CUBE_POLYGONS and array with shape
+        (number of cubes, 3) with the translations.
+    '''
+    def get_blender_vectors(vectors: List[Tuple[float, float, float]]):
+        return np.array(vectors, dtype=np.float64).reshape(-1, 3)[:, [0, 2, 1]]
+    size = get_blender_vectors([c.size for c in cubes])
+    origin = get_blender_vectors([c.origin for c in cubes])
+    pivot = get_blender_vectors([c.pivot for c in cubes])
+    inflate = np.array([c.inflate for c in cubes], dtype=np.float64)
+
+    pos_delta = (size/2 + inflate[:, np.newaxis]) / MINECRAFT_SCALE_FACTOR
+    translation = (origin - pivot + size/2) / MINECRAFT_SCALE_FACTOR
+    return pos_delta[:, np.newaxis] * _CUBE_VERTICES_SIGNS, translation
+
+def _get_cubes_uvs(
+        cubes: List[ImportCube],
+        uv_converter: CoordinatesConverter) -> np.ndarray:
+    '''
+    Returns the UVs of the loops of the Blender meshes of the cubes.
 
-def _mc_set_size(
-        obj: bpy.types.Object, mcsize: Tuple[float, float, float],
-        inflate: Optional[float]=None):
+    :param cubes: the cubes.
+    :param uv_converter: converter used for converting from Minecraft UV
+        coordinates (dependent on the scale of the texture) to Blender UV
+        coordinates (values from 0 to 1).
+    :returns: array with shape (number of cubes, 24, 2).
     '''
-    Scales a Blender object using scale vector written in Minecraft coordinates
-    system.
+    result = np.zeros((len(cubes), 24, 2), dtype=np.float64)
+    # Left down, right down, right up and left up corner of the UV face
+    corners = np.array([[0, 1], [1, 1], [1, 0], [0, 0]], dtype=np.float64)
+    for mirror, uv_loops in _CUBE_UV_LOOPS.items():
+        indices = [i for i, c in enumerate(cubes) if bool(c.mirror) == mirror]
+        if len(indices) == 0:
+            continue
+        for side, loops in uv_loops.items():
+            uv = np.array(
+                [cubes[i].uv[side]['uv'] for i in indices], dtype=np.float64)
+            uv_size = np.array(
+                [cubes[i].uv[side]['uv_size'] for i in indices],
+                dtype=np.float64)
+            result[np.ix_(indices, loops)] = (
+                uv[:, np.newaxis] + corners * uv_size[:, np.newaxis])
+    return uv_converter.convert_array(result)
+
+def _new_cube_mesh(
+        name: str, vertices: np.ndarray, uvs: np.ndarray) -> bpy.types.Mesh:
+    '''
+    Creates a Blender mesh of a cube.
 
-    :param obj: Blender object
-    :param mcsize: Minecraft object size.
+    :param name: the name of the mesh.
+    :param vertices: the coordinates of the vertices of the cube (see
+        :func:`_get_cubes_vertices`).
+    :param uvs: the UVs of the loops of the cube (see :func:`_get_cubes_uvs`).
     '''
-    # cube_obj.dimensions = (
-    #     np.array(cube_obj.dimensions) +
-    #     (2*-cube.inflate/MINECRAFT_SCALE_FACTOR)
-    # )
-    effective_inflate: float = 0.0
-    if inflate is not None:
-        effective_inflate = inflate/MINECRAFT_SCALE_FACTOR
-
-    pos_delta = (
-        (np.array(mcsize)[[0, 2, 1]] / 2) / MINECRAFT_SCALE_FACTOR
-    )
-    pos_delta += effective_inflate
-    data = obj.data
-    # 0. ---; 1. --+; 2. -+-; 3. -++; 4. +--; 5. +-+; 6. ++- 7. +++
-    data.vertices[0].co = mathutils.Vector(pos_delta * np.array([-1, -1, -1]))
-    data.vertices[1].co = mathutils.Vector(pos_delta * np.array([-1, -1, 1]))
-    data.vertices[2].co = mathutils.Vector(pos_delta * np.array([-1, 1, -1]))
-    data.vertices[3].co = mathutils.Vector(pos_delta * np.array([-1, 1, 1]))
-    data.vertices[4].co = mathutils.Vector(pos_delta * np.array([1, -1, -1]))
-    data.vertices[5].co = mathutils.Vector(pos_delta * np.array([1, -1, 1]))
-    data.vertices[6].co = mathutils.Vector(pos_delta * np.array([1, 1, -1]))
-    data.vertices[7].co = mathutils.Vector(pos_delta * np.array([1, 1, 1]))
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices.tolist(), [], _CUBE_POLYGONS)
+    uv_layer = mesh.uv_layers.new(name='UVMap')
+    uv_layer.data.foreach_set('uv', uvs.astype(np.float32).ravel())
+    mesh.update()
+    return mesh
+
+def _new_empty(name: str, size: float) -> bpy.types.Object:
+    '''
+    Creates an empty object with spherical shape (not linked to any
+    collection).
+
+    :param name: the name of the object.
+    :param size: the display size of the empty.
+    '''
+    obj = bpy.data.objects.new(name, None)
+    obj.empty_display_type = 'SPHERE'
+    obj.empty_display_size = size
+    return obj
 
 def _mc_pivot(obj: bpy.types.Object, mcpivot: Tuple[float, float, float]):
     '''
@@ -1501,52 +693,6 @@ def _mc_rotate(
     )
     obj.rotation_euler.rotate(rotation)
 
-def _set_uv(
-        uv_converter: CoordinatesConverter, cube_polygons: CubePolygons,
-        uv: Dict, uv_layer: bpy.types.MeshUVLoopLayer):
-    '''
-    Sets the UV of a face of a Blender cube mesh based on some Minecraft
-    properties.
-
-    :param uv_converter: converter used for converting from Minecraft UV
-        coordinates (dependent on the scale of the texture) to Blender UV
-        coordinates (values from 0 to 1).
-    :param cube_polygons: CubePolygons object created from the mesh.
-    :param uv: UV mapping for each face.
-    :param uv_layer: UV layer of the mesh.
-    '''
-    uv_data = uv_layer.data
-
-    def set_uv(
-            cube_polygon: CubePolygon, size: Tuple[float, float],
-            uv: Tuple[float, float]):
-        cp_loop_indices = cube_polygon.side.loop_indices
-        cp_order = cube_polygon.order
-
-        left_down = cp_loop_indices[cp_order[0]]
-        right_down = cp_loop_indices[cp_order[1]]
-        right_up = cp_loop_indices[cp_order[2]]
-        left_up = cp_loop_indices[cp_order[3]]
-
-        uv_data[left_down].uv = uv_converter.convert((uv[0], uv[1] + size[1]))
-        uv_data[right_down].uv = uv_converter.convert(
-            (uv[0] + size[0], uv[1] + size[1]))
-        uv_data[right_up].uv = uv_converter.convert((uv[0] + size[0], uv[1]))
-        uv_data[left_up].uv = uv_converter.convert((uv[0], uv[1]))
-
-    # right/left
-    set_uv(cube_polygons.east, uv["east"]["uv_size"], uv["east"]["uv"])
-    # front
-    set_uv(cube_polygons.north, uv["north"]["uv_size"], uv["north"]["uv"])
-    # left/right
-    set_uv(cube_polygons.west, uv["west"]["uv_size"], uv["west"]["uv"])
-    # back
-    set_uv(cube_polygons.south, uv["south"]["uv_size"], uv["south"]["uv"])
-    # top
-    set_uv(cube_polygons.up, uv["up"]["uv_size"], uv["up"]["uv"])
-    # bottom
-    set_uv(cube_polygons.down, uv["down"]["uv_size"], uv["down"]["uv"])
-
 def add_bone(
         edit_bones: bpy.types.bpy_prop_collection,
         length: float, import_bone: ImportBone):
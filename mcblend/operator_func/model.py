@@ -36,6 +36,9 @@ class ModelExport:
         visible_bounds_height.
     :param bones: Optional - list of :class:`BoneExport` objects that represent
         the bones of this model.
+    :param texture_atlas: Optional - whether the bones that use different
+        pages of the texture atlas should be exported as separate geometries.
+        The pages saved in the objects are ignored if it's False.
     '''
     model_name: str
     texture_width: int
@@ -44,6 +47,7 @@ class ModelExport:
     visible_bounds_width: float
     visible_bounds_height: float
     bones: List[BoneExport] = field(default_factory=list)
+    texture_atlas: bool = False
 
     def load(self, object_properties: McblendObjectGroup):
         '''
@@ -57,31 +61,46 @@ class ModelExport:
 
     def json(self) -> Dict:
         '''
-        Creates a dict that represents the Minecraft model JSON file.
+        Creates a dict that represents the Minecraft model JSON file. If the
+        texture atlas is enabled, the bones that use different pages of the
+        texture atlas are exported as separate geometries (the geometries of
+        the pages other than the first one have "_page_<number>" suffix in
+        their identifiers).
 
         :returns: Minecraft model JSON dict.
         '''
-        result: Dict = {
+        pages: Dict[int, List[BoneExport]] = {}
+        for bone in self.bones:
+            page = bone.texture_page if self.texture_atlas else 0
+            if page not in pages:
+                pages[page] = []
+            pages[page].append(bone)
+        if len(pages) == 0:
+            pages[0] = []
+
+        geometries: List[Dict] = []
+        for page_index in sorted(pages):
+            identifier = f"geometry.{self.model_name}"
+            if page_index != 0:
+                identifier += f"_page_{page_index}"
+            geometry: Dict = {
+                "description": {
+                    "identifier": identifier,
+                    "visible_bounds_width": round(self.visible_bounds_width, 3),
+                    "visible_bounds_height": round(self.visible_bounds_height, 3),
+                    "visible_bounds_offset": get_vect_json(self.visible_bounds_offset)
+                },
+                "bones": [bone.json() for bone in pages[page_index]]
+            }
+            if self.texture_width > 0:  # Don't export invalid values
+                geometry["description"]["texture_width"] = self.texture_width
+            if self.texture_height > 0:  # Don't export invalid values
+                geometry["description"]["texture_height"] = self.texture_height
+            geometries.append(geometry)
+        return {
             "format_version": "1.12.0",
-            "minecraft:geometry": [
-                {
-                    "description": {
-                        "identifier": f"geometry.{self.model_name}",
-                        "visible_bounds_width": round(self.visible_bounds_width, 3),
-                        "visible_bounds_height": round(self.visible_bounds_height, 3),
-                        "visible_bounds_offset": get_vect_json(self.visible_bounds_offset)
-                    },
-                    "bones": [bone.json() for bone in self.bones]
-                }
-            ]
+            "minecraft:geometry": geometries
         }
-        if self.texture_width > 0:  # Don't export invalid values
-            result["minecraft:geometry"][0]["description"][
-                "texture_width"] = self.texture_width
-        if self.texture_height > 0:  # Don't export invalid values
-            result["minecraft:geometry"][0]["description"][
-                "texture_height"] = self.texture_height
-        return result
 
 class BoneExport:
     '''
@@ -96,6 +115,7 @@ class BoneExport:
     - `cubes: List[CubeExport]` - list of cubes to export.
     - `locators: Dict[str, LocatorExport]` - list of locators to export.
       (if exists) or None
+    - `texture_page: int` - the page of the texture atlas used by this bone.
 
     '''
     def __init__(self, bone: McblendObject, model: ModelExport):
@@ -122,6 +142,7 @@ class BoneExport:
                 locators.append(child)
 
         self.name: str = bone.obj_name
+        self.texture_page: int = bone.texture_page
         self.parent: Optional[str] = (
             None if bone.parent is None else bone.parent.obj_name)
         self.rotation: np.ndarray = bone.get_mcrotation(bone.parent)
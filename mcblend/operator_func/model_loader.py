@@ -0,0 +1,923 @@
+'''
+Loading of the Minecraft models from the JSON dicts. The module doesn't
+depend on bpy.
+
+The models are validated with the validators compiled from the schemas of
+the supported format versions. The validators are created once per format
+version. The JSON paths used in the error messages are stored as linked
+tuples (parent path, key) and converted to lists only when an error is
+raised.
+
+The load_model_file function loads all of the geometries of a file (or only
+the requested ones) and returns them indexed by their identifiers. It doesn't
+use Blender so the load_model_files function can run it in the worker
+processes of the batch import.
+
+The load_indexed_geometry function loads a single geometry using the index
+of the file (see the geometry_index module). Only the selected geometry is
+decoded and validated.
+'''
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from pathlib import Path
+from typing import (
+    Any, Callable, Collection, Dict, Iterator, List, NamedTuple, Optional,
+    Sequence, Tuple, Union)
+
+import numpy as np
+
+from .exception import FileIsNotAModelException, ImportingNotImplementedError
+from .jsonc_decoder import JSONCDecoder
+from .geometry_index import GeometryIndex, index_geometries
+
+# JSON path stored as linked tuples: (parent path, key). None is the root.
+JsonPath = Optional[Tuple[Any, Union[str, int]]]
+
+# The validators take the value, the path of its parent and its key.
+Validator = Callable[[Any, JsonPath, Union[str, int]], None]
+
+def get_json_path(path: JsonPath) -> List[Union[str, int]]:
+    '''
+    Converts the JSON path stored as linked tuples into a list of keys.
+
+    :param path: the path.
+    '''
+    result: List[Union[str, int]] = []
+    while path is not None:
+        path, key = path
+        result.append(key)
+    result.reverse()
+    return result
+
+def _type_error(
+        name: Union[str, int], types: Tuple, path: JsonPath
+    ) -> FileIsNotAModelException:
+    '''Returns the exception about the invalid type of an object.'''
+    return FileIsNotAModelException(
+        f'{get_json_path(path)}::{name} is not an instance of {types}')
+
+def pick_version_parser(parsers: Tuple[str, ...], version: str):
+    '''
+    Picks the earliest possible format_version greater or equal to the known
+    version ot of list of parser names for different format versions.
+
+    :param parsers: The list of format_versions that identify the parser to
+        use for parsing an object.
+    '''
+    def to_tuple(version: str) -> Tuple[int]:
+        try:
+            return tuple(  # type: ignore
+                map(int, version.split('.')))
+        except Exception as e:
+            raise FileIsNotAModelException(
+                f'Unable to parse format version number: {version}') from e
+
+    t_parsers = [to_tuple(parser) for parser in parsers]
+    t_parsers.sort(reverse=True)
+    t_version = to_tuple(version)
+
+    best_choice = None
+    for t_parser in t_parsers:
+        if t_parser <= t_version:
+            best_choice = t_parser
+            break
+    if best_choice is None:
+        raise FileIsNotAModelException(
+            f'Unsupported format version: {version}')
+    return '.'.join([str(i) for i in best_choice])
+
+
+# Validators of the parts of the schema
+def _is_type(types: Tuple, name: Optional[str] = None) -> Validator:
+    '''
+    Creates validator that checks if the object is an instance of specific
+    type.
+    '''
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if not isinstance(value, types):
+            raise _type_error(
+                key if name is None else name, types, (parent_path, key))
+    return validate
+
+def _is_vector(
+        length: int, types: Tuple, name: Optional[str] = None) -> Validator:
+    '''
+    Creates validator that checks if the object is a list of specific length
+    with specific type of items.
+    '''
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if (
+                isinstance(value, list) and len(value) == length and
+                all(isinstance(i, types) for i in value)):
+            return
+        json_path = get_json_path((parent_path, key))
+        curr_name = key if name is None else name
+        if not isinstance(value, list):
+            raise FileIsNotAModelException(
+                f'{json_path}::{curr_name} is not a list')
+        if len(value) != length:
+            raise FileIsNotAModelException(
+                f'{json_path}::{curr_name} has invalid length {len(value)} '
+                f'!= {length}')
+        raise FileIsNotAModelException(
+            f'{json_path}::{curr_name} is not instance of List[{types}]')
+    return validate
+
+def _is_list_of(item_validator: Validator, name: str) -> Validator:
+    '''Creates validator of a list with items validated by item_validator.'''
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if not isinstance(value, list):
+            raise _type_error(name, (list,), (parent_path, key))
+        path = (parent_path, key)
+        for i, item in enumerate(value):
+            item_validator(item, path, i)
+    return validate
+
+def _is_dict_of(item_validator: Validator, name: str) -> Validator:
+    '''
+    Creates validator of a dictionary with values validated by
+    item_validator.
+    '''
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if not isinstance(value, dict):
+            raise _type_error(name, (dict,), (parent_path, key))
+        path = (parent_path, key)
+        for item_key, item in value.items():
+            item_validator(item, path, item_key)
+    return validate
+
+def _is_one_of(
+        validators: Sequence[Tuple[type, Validator]], name: str) -> Validator:
+    '''
+    Creates validator that picks the validator based on the type of the
+    object.
+    '''
+    types = tuple(t for t, _ in validators)
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        for value_type, validator in validators:
+            if isinstance(value, value_type):
+                validator(value, parent_path, key)
+                return
+        raise _type_error(name, types, (parent_path, key))
+    return validate
+
+def _is_not_implemented(validator: Optional[Validator] = None) -> Validator:
+    '''
+    Creates validator of a valid property that can't be imported. Raises
+    ImportingNotImplementedError after validating the property with the
+    validator.
+    '''
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if validator is not None:
+            validator(value, parent_path, key)
+        raise ImportingNotImplementedError(
+            str(key), get_json_path((parent_path, key)))
+    return validate
+
+def _is_object(
+        name: str, properties: Sequence[Tuple[str, Optional[Validator]]],
+        required: Sequence[str] = ()) -> Validator:
+    '''
+    Creates validator of a dictionary with specific properties.
+
+    :param name: the name of the object used in the error messages.
+    :param properties: the accepted properties and their validators
+        (None for properties accepted without validation). The properties
+        are validated in this order.
+    :param required: the names of the required properties.
+    '''
+    accepted_keys = frozenset(k for k, _ in properties)
+    required_keys = frozenset(required)
+    validators = [(k, v) for k, v in properties if v is not None]
+    def validate(value: Any, parent_path: JsonPath, key: Union[str, int]):
+        if not isinstance(value, dict):
+            raise _type_error(name, (dict,), (parent_path, key))
+        if not required_keys.issubset(value):
+            raise FileIsNotAModelException(
+                f'{get_json_path((parent_path, key))}::{name} is missing '
+                f'properties: {set(required_keys - value.keys())}')
+        if not accepted_keys.issuperset(value):
+            raise FileIsNotAModelException(
+                f'{get_json_path((parent_path, key))}::{name} has unexpected '
+                f'properties: {set(value.keys() - accepted_keys)}')
+        path = (parent_path, key)
+        for property_key, property_validator in validators:
+            if property_key in value:
+                property_validator(value[property_key], path, property_key)
+    return validate
+
+
+# Schemas of the geometries
+_NUMBER = (int, float)
+
+def _compile_geometry_validator_1_12_0() -> Validator:
+    '''Creates validator of a geometry in format version 1.12.0.'''
+    vector3 = _is_vector(3, _NUMBER)
+    vector2 = _is_vector(2, _NUMBER)
+    uv_face = _is_object('uv_face', [
+        ('uv', vector2),
+        ('uv_size', vector2),
+        ('material_instance', _is_not_implemented(_is_type((str,)))),
+    ], required=['uv'])
+    uv = _is_object('uv', [
+        (side, uv_face)
+        for side in ('north', 'south', 'east', 'west', 'up', 'down')])
+    cube = _is_object('cube', [
+        ('origin', vector3),
+        ('size', vector3),
+        ('rotation', vector3),
+        ('pivot', vector3),
+        ('inflate', _is_type(_NUMBER)),
+        ('mirror', _is_type((bool,))),
+        ('uv', _is_one_of([(dict, uv), (list, vector2)], 'uv')),
+    ])
+    locator = _is_one_of([
+        (list, _is_vector(3, _NUMBER, 'locator')),
+        (dict, _is_not_implemented()),
+    ], 'locator')
+    poly_mesh = _is_object('poly_mesh', [
+        ('normalized_uvs', _is_type((bool,))),
+        ('positions', _is_list_of(_is_vector(3, _NUMBER, 'position'), 'positions')),
+        ('normals', _is_list_of(_is_vector(3, _NUMBER, 'normal'), 'normals')),
+        ('uvs', _is_list_of(_is_vector(2, _NUMBER, 'uv'), 'uvs')),
+        # The string ('tri_list' or 'quad_list') is checked while loading
+        ('polys', _is_one_of([
+            (str, _is_type((str,))),
+            (list, _is_list_of(
+                _is_list_of(_is_vector(3, (int,), 'vertex'), 'poly'),
+                'polys')),
+        ], 'polys')),
+    ], required=['polys'])
+    bone = _is_object('bone', [
+        ('name', _is_type((str,))),
+        ('parent', _is_type((str,))),
+        ('pivot', vector3),
+        ('rotation', vector3),
+        ('mirror', _is_type((bool,))),
+        ('inflate', _is_type(_NUMBER)),
+        ('debug', _is_not_implemented(_is_type((bool,)))),
+        ('render_group_id', _is_not_implemented(_is_type(_NUMBER))),
+        ('cubes', _is_list_of(cube, 'cubes property')),
+        ('locators', _is_dict_of(locator, 'locators property')),
+        ('poly_mesh', poly_mesh),
+        ('texture_meshes', _is_not_implemented()),
+    ], required=['name'])
+    description = _is_object('description', [
+        ('identifier', _is_type((str,))),
+        ('texture_width', _is_type(_NUMBER)),
+        ('texture_height', _is_type(_NUMBER)),
+        ('visible_bounds_offset', vector3),
+        ('visible_bounds_width', _is_type(_NUMBER)),
+        ('visible_bounds_height', _is_type(_NUMBER)),
+    ], required=['identifier'])
+    return _is_object('geometry', [
+        ('description', description),
+        ('bones', _is_list_of(bone, 'bones property')),
+    ], required=['description', 'bones'])
+
+def _compile_geometry_validator_1_8_0() -> Validator:
+    '''Creates validator of a geometry in format version 1.8.0.'''
+    vector3 = _is_vector(3, _NUMBER)
+    cube = _is_object('cube', [
+        ('origin', vector3),
+        ('size', vector3),
+        ('inflate', _is_type(_NUMBER)),
+        ('mirror', _is_type((bool,))),
+        ('uv', _is_vector(2, _NUMBER)),
+    ])
+    locator = _is_vector(3, _NUMBER, 'locator')
+    poly_mesh = _is_object('poly_mesh', [
+        ('normalized_uvs', _is_type((bool,))),
+        ('positions', _is_list_of(_is_vector(3, _NUMBER, 'position'), 'positions')),
+        ('normals', _is_list_of(_is_vector(3, _NUMBER, 'normal'), 'normals')),
+        ('uvs', _is_list_of(_is_vector(2, _NUMBER, 'uv'), 'uvs')),
+        ('polys', _is_one_of([
+            (str, _is_type((str,))),
+            (list, _is_list_of(
+                _is_list_of(_is_vector(3, (int,), 'vertex'), 'poly'),
+                'polys')),
+        ], 'polys')),
+    ], required=['polys'])
+    bone = _is_object('bone', [
+        ('name', _is_type((str,))),
+        ('reset', _is_not_implemented(_is_type((bool,)))),
+        ('neverRender', _is_not_implemented(_is_type((bool,)))),
+        ('parent', _is_type((str,))),
+        ('pivot', vector3),
+        ('rotation', vector3),
+        ('bind_pose_rotation', _is_not_implemented(vector3)),
+        ('mirror', _is_type((bool,))),
+        ('inflate', _is_type(_NUMBER)),
+        ('debug', _is_not_implemented(_is_type((bool,)))),
+        ('render_group_id', _is_not_implemented(_is_type(_NUMBER))),
+        ('cubes', _is_list_of(cube, 'cubes property')),
+        ('locators', _is_dict_of(locator, 'locators property')),
+        ('poly_mesh', poly_mesh),
+        ('texture_meshes', _is_not_implemented()),
+    ], required=['name'])
+    return _is_object('geometry', [
+        ('debug', _is_not_implemented(_is_type((bool,)))),
+        ('texturewidth', _is_type(_NUMBER)),
+        ('textureheight', _is_type(_NUMBER)),
+        ('visible_bounds_offset', vector3),
+        ('visible_bounds_width', _is_type(_NUMBER)),
+        ('visible_bounds_height', _is_type(_NUMBER)),
+        ('cape', None),
+        ('bones', _is_list_of(bone, 'bones property')),
+    ], required=['bones'])
+
+_GEOMETRY_VALIDATOR_COMPILERS: Dict[str, Callable[[], Validator]] = {
+    '1.12.0': _compile_geometry_validator_1_12_0,
+    '1.8.0': _compile_geometry_validator_1_8_0,
+}
+_GEOMETRY_VALIDATORS: Dict[str, Validator] = {}
+
+def get_geometry_validator(parser_version: str) -> Validator:
+    '''
+    Returns the validator of the geometries of given format version (the
+    validator is created on the first use).
+
+    :param parser_version: the format version of the parser (see
+        :func:`pick_version_parser`).
+    '''
+    if parser_version not in _GEOMETRY_VALIDATORS:
+        _GEOMETRY_VALIDATORS[parser_version] = _GEOMETRY_VALIDATOR_COMPILERS[
+            parser_version]()
+    return _GEOMETRY_VALIDATORS[parser_version]
+
+class LoadedGeometry(NamedTuple):
+    '''
+    Geometry loaded by the ModelLoader with the missing default values
+    filled. It has the same properties as the ModelLoader so it can be used
+    to create the ImportGeometry.
+    '''
+    description: Dict
+    bones: List
+
+
+class ModelLoader:
+    '''
+    Interface loads model from a JSON dict with Minecraft model.
+    Fills missing, optional data with default values.
+
+    :param data: The JSON dict with models file.
+    :param geometry_name: Optional - the name of the geometry to load. If
+        it's None, no geometry is loaded (the description and the bones are
+        empty) and the geometries can be loaded with load_geometries.
+    :param trusted: Optional - skips the validation of the geometry. Use only
+        for the files exported by Mcblend. The missing default values are
+        added anyway.
+    '''
+    def __init__(
+            self, data: Dict, geometry_name: Optional[str] = "",
+            trusted: bool = False):
+        self.data = data
+        self.format_version = self._load_format_version(data)
+        self.parser_version = pick_version_parser(
+            ('1.12.0', '1.8.0'), self.format_version)
+        self.description: Dict = {}
+        self.bones: List = []
+        if geometry_name is not None:
+            geometry, geometry_path = self._load_geometry(
+                geometry_name, self.data)
+            self.description, self.bones = self._load_geometry_content(
+                geometry, geometry_path, trusted)
+
+    def load_geometries(
+            self, geometry_names: Optional[Collection[str]] = None,
+            trusted: bool = False) -> Dict[str, LoadedGeometry]:
+        '''
+        Loads the geometries of the model file and returns them indexed by
+        their identifiers. If the file has multiple geometries with the same
+        identifier, only the first one is loaded.
+
+        :param geometry_names: Optional - the identifiers of the geometries
+            to load. All of the geometries are loaded if it's None. The
+            identifiers missing in the file are ignored.
+        :param trusted: Optional - skips the validation of the geometries.
+        '''
+        result: Dict[str, LoadedGeometry] = {}
+        for identifier, geometry, geometry_path in self._iter_geometries(
+                self.data):
+            if identifier in result or (
+                    geometry_names is not None and
+                    identifier not in geometry_names):
+                continue
+            result[identifier] = self._load_geometry_content(
+                geometry, geometry_path, trusted)
+        return result
+
+    def _load_geometry_content(
+            self, geometry: Dict,
+            geometry_path: Tuple[JsonPath, Union[str, int]],
+            trusted: bool) -> LoadedGeometry:
+        '''
+        Validates the geometry (unless it's trusted) and returns its
+        description and bones with the missing default values.
+
+        :param geometry: The geometry.
+        :param geometry_path: The path of the parent of the geometry and the
+            key of the geometry.
+        :param trusted: Whether to skip the validation.
+        '''
+        if not trusted:
+            get_geometry_validator(self.parser_version)(
+                geometry, *geometry_path)  # type: ignore
+        return LoadedGeometry(
+            self._load_description(geometry, geometry_path),
+            self._load_bones(geometry['bones']))
+
+    def _load_format_version(self, data: Dict) -> str:
+        '''
+        Returns the version of the model from JSON file loaded into data.
+
+        :param data: JSON dict with model file.
+        '''
+        # pylint: disable=no-self-use
+        if not isinstance(data, dict):
+            raise _type_error('model file', (dict,), None)
+        if 'format_version' not in data:
+            raise FileIsNotAModelException(
+                "[]::model file is missing properties: {'format_version'}")
+        parser_version = pick_version_parser(
+            ('1.12.0', '1.8.0'), data['format_version'])
+        if parser_version == '1.12.0':
+            missing_keys = {'minecraft:geometry', 'format_version'} - set(data)
+            if len(missing_keys) != 0:
+                raise FileIsNotAModelException(
+                    f'[]::model file is missing properties: {missing_keys}')
+            additional_keys = set(data) - {
+                'minecraft:geometry', 'format_version', 'cape'}
+            if len(additional_keys) != 0:
+                raise FileIsNotAModelException(
+                    f'[]::model file has unexpected properties: '
+                    f'{additional_keys}')
+            if 'cape' in data.keys():
+                raise ImportingNotImplementedError('cape', [])
+            return data['format_version']
+
+        if parser_version == '1.8.0':
+            # All geometries must start with geometry.
+            for k in data.keys():  # key must be string because its from json
+                if not (
+                        k.startswith('geometry.') or
+                        k in ['debug', 'format_version']):
+                    raise FileIsNotAModelException(
+                        f'{[]}::{k} is invalid geometry name (it should '
+                        'start with "geometry."')
+            if 'debug' in data.keys():
+                raise ImportingNotImplementedError('debug', [])
+            return data['format_version']
+        raise FileIsNotAModelException('Unsupported format version')
+
+    def _load_geometry(
+            self, geometry_name: str, data: Any
+        ) -> Tuple[Dict, Tuple[JsonPath, Union[str, int]]]:
+        '''
+        Finds and returns geometry with specific name from list of geometries
+        from JSON dict with models. Returns the geometry dict and the path of
+        its parent and its key.
+
+        :param geometry_name: The name of geometry
+        :param data: Root object of the JSON.
+        '''
+        for identifier, geometry, geometry_path in self._iter_geometries(data):
+            if geometry_name in (identifier, ''):
+                return geometry, geometry_path
+        raise ValueError(
+            f'Unable to find geometry called geometry.{geometry_name}')
+
+    def _iter_geometries(
+            self, data: Any
+        ) -> Iterator[Tuple[str, Dict, Tuple[JsonPath, Union[str, int]]]]:
+        '''
+        Yields the identifiers of the geometries from the JSON dict with
+        models, the geometry dicts and the paths of their parents and their
+        keys. The bodies of the geometries aren't validated.
+
+        :param data: Root object of the JSON.
+        '''
+        if self.parser_version == '1.12.0':
+            geometries = data['minecraft:geometry']
+            geometries_path: JsonPath = (None, 'minecraft:geometry')
+            if not isinstance(geometries, list):
+                raise _type_error('geometries', (list,), geometries_path)
+            for i, geometry in enumerate(geometries):
+                if not isinstance(geometry, dict):
+                    raise _type_error('geometry', (dict,), (geometries_path, i))
+                if not isinstance(geometry.get('description'), dict):
+                    raise FileIsNotAModelException(
+                        f'{get_json_path((geometries_path, i))}::geometry '
+                        'has invalid description')
+                desc = geometry['description']
+                if 'identifier' not in desc:
+                    raise FileIsNotAModelException(
+                        f'{get_json_path((geometries_path, i))}::description '
+                        'is missing identifier')
+                yield desc['identifier'], geometry, (geometries_path, i)
+        elif self.parser_version == '1.8.0':
+            for k, geometry in data.items():
+                if k in ['format_version', 'debug']:
+                    continue
+                if not isinstance(geometry, dict):
+                    raise _type_error('geometry', (dict,), (None, k))
+                yield k, geometry, (None, k)
+        else:
+            raise FileIsNotAModelException(
+                f'Unsupported format version: {self.format_version}')
+
+    def _load_description(
+            self, geometry: Any,
+            geometry_path: Tuple[JsonPath, Union[str, int]]) -> Dict:
+        '''
+        Returns the description of the geometry.
+
+        :param geometry: The geometry with description.
+        :param geometry_path: The path of the parent of the geometry and the
+            key of the geometry.
+        '''
+        result = {
+            "texture_width" : 64,
+            "texture_height" : 64,
+            "visible_bounds_offset" : [0, 0, 0],
+            "visible_bounds_width" : 1,
+            "visible_bounds_height": 1
+        }
+        if self.parser_version == '1.12.0':
+            desc = geometry['description']
+            result['identifier'] = desc['identifier']
+            if 'texture_width' in desc:
+                result['texture_width'] = int(desc['texture_width'])
+            if 'texture_height' in desc:
+                result['texture_height'] = int(desc['texture_height'])
+        else:  # 1.8.0
+            desc = geometry
+            result['identifier'] = geometry_path[1]
+            # texture_width not texturewidth (not a bug!!!)
+            if 'texturewidth' in desc:
+                result['texture_width'] = int(desc['texturewidth'])
+            if 'textureheight' in desc:
+                result['texture_height'] = int(desc['textureheight'])
+        for k in (
+                'visible_bounds_offset', 'visible_bounds_width',
+                'visible_bounds_height'):
+            if k in desc:
+                result[k] = desc[k]
+        return result
+
+    def _load_bones(self, bones: List) -> List[Dict[str, Any]]:
+        '''
+        Returns the bones from a list of bones, adds missing default values.
+
+        :param bones: List of bones.
+        '''
+        return [self._load_bone(bone) for bone in bones]
+
+    def _load_bone(self, bone: Dict) -> Dict[str, Any]:
+        '''
+        Returns a bone, adds all of the missing default values of the
+        properties.
+
+        :param bone: Part of the json file that has the inforation about the
+            bone.
+        '''
+        result: Dict[str, Any] = {
+            "parent": None,  # str
+            "pivot" : [0, 0, 0],  # List[float] len=3
+            "rotation" : [0, 0, 0],  # List[float] len=3
+            "mirror" : False,  # bool
+            "inflate": 0.0,  # float
+            "debug": False,  # bool
+            "render_group_id": 0,  # int >= 0
+            "cubes" : [],  # List[Dict]
+            "locators": {},  # Dict[...]
+            "poly_mesh": None,  # Dict
+            "texture_meshes": []  # List[Dict]
+        }
+        for k in ('name', 'parent', 'pivot', 'rotation', 'mirror', 'inflate'):
+            if k in bone:
+                result[k] = bone[k]
+        if 'cubes' in bone:
+            # default mirror for cube is the bones mirror property
+            result['cubes'] = [
+                self._load_cube(cube, result['mirror'], result['inflate'])
+                for cube in bone['cubes']]
+        if 'locators' in bone:
+            result['locators'] = dict(bone['locators'])
+        if 'poly_mesh' in bone:
+            result['poly_mesh'] = self._load_poly_mesh(bone['poly_mesh'])
+        return result
+
+    def _create_default_uv(
+            self, size: Tuple[float, float, float], mirror: bool,
+            uv: Tuple[float, float] = (0.0, 0.0)) -> Dict:
+        '''
+        Creates default UV dictionary (in per-face UV-mapping format) based on
+        some other properties of a cube.
+
+        :param size: The size of the cube.
+        :param mirror: The mirror property of the cube.
+        :param uv: Optional - the UV property of the cube (if the cube uses the
+            standard Minecraft UV-mapping format).
+        '''
+        # pylint: disable=no-self-use
+        width, height, depth = (int(i) for i in size)
+
+        def _face(size: Tuple[float, float], uv: Tuple[float, float]):
+            return {"uv_size": size, "uv": uv, "material_instance": ""}
+
+        face1 = _face((depth, height), (uv[0], uv[1] + depth))
+        face2 = _face((width, height), (uv[0]+depth, uv[1] + depth))
+        face3 = _face((depth, height), (uv[0]+depth + width, uv[1] + depth))
+        face4 = _face((width, height), (uv[0]+2*depth + width, uv[1] + depth))
+        face5 = _face((width, depth), (uv[0]+depth, uv[1]))
+        face6 = _face((width, -depth), (uv[0]+depth + width, uv[1] + depth))
+        if mirror:
+            face_west, face_east = face1, face3
+        else:
+            face_east, face_west = face1, face3
+        # No mirror: | # Mirror:
+        #   5 6      | #   5 6
+        # 1 2 3 4    | # 3 2 1 4
+        result: Dict = {
+            "north": face2, "south": face4, "east": face_east,
+            "west": face_west, "up": face5, "down": face6}
+        return result
+
+    def _load_cube(
+            self, cube: Dict, default_mirror: bool,
+            default_inflate: float) -> Dict[str, Any]:
+        '''
+        Returns a cube with added all of the missing default values of the
+        properties.
+
+        :param cube: Part of the JSON dict that has the inforation about the
+            cube.
+        :param default_mirror: Mirror value of a bone that owns this cube.
+        :param default_inflate: Inflate value of a bone that owns this cube.
+        '''
+        result = {
+            "origin" : (0, 0, 0),  # Listfloat] len=3
+            "size" : (0, 0, 0),  # Listfloat] len=3
+            "rotation" : (0, 0, 0),  # Listfloat] len=3
+            "pivot" : (0, 0, 0),  # Listfloat] len=3
+            "inflate" : default_inflate,  # float
+            "mirror" : default_mirror,  # mirror
+
+            # Default UV value is based on the size and mirror of the cube
+            # before return statement
+            "uv": None
+        }
+        for k in ('origin', 'size', 'rotation', 'pivot', 'inflate', 'mirror'):
+            if k in cube:
+                result[k] = cube[k]
+        size: Tuple[float, float, float] = tuple(result['size'])  # type: ignore
+        uv = cube.get('uv')
+        if isinstance(uv, dict):
+            result['uv'] = self._load_uv(uv, size)
+        elif isinstance(uv, list):
+            result['uv'] = self._create_default_uv(
+                size, result['mirror'], tuple(uv))  # type: ignore
+        else:  # Create default UV based on size and mirror
+            result['uv'] = self._create_default_uv(
+                size, result['mirror'])  # type: ignore
+        return result
+
+    def _load_poly_mesh(self, poly_mesh: Dict) -> Dict[str, Any]:
+        '''
+        Returns a poly_mesh with added all of the missing default values of
+        the properties.
+
+        :param poly_mesh: Part of the JSON dict that has the inforation about
+            the poly_mesh.
+        '''
+        result = {
+            'normalized_uvs': poly_mesh.get('normalized_uvs', False),
+            'positions': [tuple(i) for i in poly_mesh.get('positions', [])],
+            'normals': [tuple(i) for i in poly_mesh.get('normals', [])],
+            'uvs': [tuple(i) for i in poly_mesh.get('uvs', [])],
+            'polys': [],  # 'tri_list' or 'quad_list" or list with data
+        }
+        if isinstance(poly_mesh['polys'], str):
+            result['polys'] = self._create_default_polys(
+                poly_mesh['polys'],
+                result['positions'],  # type: ignore
+                result['normals'],  # type: ignore
+                result['uvs'])  # type: ignore
+        else:
+            result['polys'] = [
+                [tuple(poly_vertex) for poly_vertex in poly]
+                for poly in poly_mesh['polys']]
+        return result
+
+    def _create_default_polys(
+            self, grouping_mode: str, positions: List[List[float]],
+            normals: List[List[float]], uvs: List[List[float]]
+            ) -> List[List[List[int]]]:
+        '''
+        Creates default "polys" property of a polymesh for "tri_list" or
+        "quad_list" mode. Checks if positions, normals and uv are the same
+        length and can be divided by 3 (for tri_list mode) or 4 (for quad_list
+        mode). Rises an exception if the creating default polys list is
+        impossible with input data.
+
+        :param grouping_mode: a string with grouping mode. It should be either
+            'tri_list' or 'quad_list' otherwise an exception is risen.
+        :param positions: list of positions of the vertices.
+        :param normals: list of normals of the loops.
+        :param uvs: list of the uv coordinates of the loops.
+        '''
+        # pylint: disable=no-self-use
+        # Get polygon group size (three or four items)
+        if grouping_mode == 'tri_list':
+            group_size = 3
+        elif grouping_mode == 'quad_list':
+            group_size = 4
+        else:
+            raise FileIsNotAModelException(
+                'poly_mesh::polys is not an a list of polys or a '
+                'literal string "quad_list" or "tri_list"')
+        # Check if positions, normals and uvs are the same lengths
+        pos_length = len(positions)
+        if not pos_length == len(normals) == len(uvs):
+            raise FileIsNotAModelException(
+                'poly_mesh::"positions", "normals" and "uvs" are not '
+                'the same lengths. They must be the same lengths in "tri_list"'
+                ' and "quad_list" polys grouping mode.')
+        # Check if list length is divisible by the group_size
+        if not pos_length % group_size == 0:
+            raise FileIsNotAModelException(
+                f'poly_mesh::"positions" list length must be '
+                f'divisible by {group_size} in {grouping_mode}.')
+        # Build default polys property in list format
+        result = np.repeat(
+            range(pos_length), 3
+        ).reshape(
+            -1, group_size, 3
+        ).tolist()
+        return result
+
+    def _load_uv(
+            self, uv: Dict,
+            cube_size: Tuple[float, float, float]) -> Dict[str, Any]:
+        '''
+        Returns UV and adds all of the missing default values of its
+        properties.
+
+        :param uv: Part of the JSON dict that has the inforation about the uv.
+        :param cube_size: Size of the cube which is being mapped (used for
+            getting default UV values).
+        '''
+        width, height, depth = cube_size
+        def _face(size: Tuple[float, float], uv: Tuple[float, float]):
+            return {"uv_size": size, "uv": uv, "material_instance": ""}
+        # Faces outside of the texture are invisible and should be skipped
+        # on export
+        result = {
+            side: _face((0, 0), (0, -1))
+            for side in ('north', 'south', 'east', 'west', 'up', 'down')
+        }
+        default_sizes = {
+            "north": (depth, height), "south": (width, height),
+            "east": (depth, height), "west": (width, height),
+            "up": (width, depth), "down": (width, depth)
+        }
+        for side, uv_face in uv.items():
+            result[side] = _face(
+                uv_face.get('uv_size', default_sizes[side]), uv_face['uv'])
+        return result
+
+def load_model_file(
+        path: Union[str, Path],
+        geometry_names: Optional[Collection[str]] = None,
+        trusted: bool = False) -> Dict[str, LoadedGeometry]:
+    '''
+    Reads the model file (JSON with optional comments) and returns its
+    geometries indexed by their identifiers. Used by the batch import in the
+    worker processes so it only uses picklable arguments and results.
+
+    :param path: the path to the model file.
+    :param geometry_names: Optional - the identifiers of the geometries to
+        load. All of the geometries are loaded if it's None.
+    :param trusted: Optional - skips the validation of the geometries.
+    '''
+    with open(path, 'r') as f:
+        data = json.load(f, cls=JSONCDecoder)
+    return ModelLoader(data, geometry_name=None).load_geometries(
+        geometry_names, trusted)
+
+def _try_load_model_file(
+        path: Union[str, Path], geometry_names: Optional[Collection[str]],
+        trusted: bool) -> Tuple[Dict[str, LoadedGeometry], Optional[str]]:
+    '''
+    Runs load_model_file and returns its result and None or an empty dict and
+    the error message if the file is not a valid model. The errors are
+    returned as strings because some of the exceptions can't be pickled.
+    '''
+    try:
+        return load_model_file(path, geometry_names, trusted), None
+    except (
+            FileIsNotAModelException, ImportingNotImplementedError,
+            ValueError, LookupError, TypeError, OSError) as e:
+        return {}, f'{e}'
+
+def load_model_files(
+        paths: Sequence[Union[str, Path]],
+        geometry_names: Optional[Collection[str]] = None,
+        trusted: bool = False, workers: int = 1
+    ) -> Tuple[Dict[str, LoadedGeometry], List[Tuple[str, str]]]:
+    '''
+    Loads the geometries from multiple model files and indexes them by their
+    identifiers. If multiple files have geometries with the same identifier,
+    the geometry from the first file is used. Returns the geometries and the
+    list of the paths of the invalid files with the error messages.
+
+    :param paths: the paths to the model files.
+    :param geometry_names: Optional - the identifiers of the geometries to
+        load. All of the geometries are loaded if it's None.
+    :param trusted: Optional - skips the validation of the geometries.
+    :param workers: the number of the processes used for loading the files.
+        The value of 0 uses the number of the processors. If the processes
+        can't be started, the files are loaded in the current process.
+    '''
+    if geometry_names is not None:
+        geometry_names = frozenset(geometry_names)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    results: Optional[List[Tuple[Dict[str, LoadedGeometry], Optional[str]]]]
+    results = None
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _try_load_model_file, paths, repeat(geometry_names),
+                    repeat(trusted)))
+        except (BrokenProcessPool, OSError):
+            # E.g. the worker processes can't import this module
+            results = None
+    if results is None:
+        results = [
+            _try_load_model_file(path, geometry_names, trusted)
+            for path in paths]
+
+    geometries: Dict[str, LoadedGeometry] = {}
+    errors: List[Tuple[str, str]] = []
+    for path, (loaded, error) in zip(paths, results):
+        if error is not None:
+            errors.append((str(path), error))
+            continue
+        for identifier, geometry in loaded.items():
+            geometries.setdefault(identifier, geometry)
+    return geometries, errors
+
+def load_indexed_geometry(
+        source: bytes, geometry_name: str = '',
+        index: Optional[GeometryIndex] = None,
+        trusted: bool = False) -> LoadedGeometry:
+    '''
+    Loads single geometry from the content of the model file using the index
+    of its geometries. Only the selected geometry is decoded and validated.
+    The keys of the root object of the file are checked the same way as in
+    the ModelLoader.
+
+    :param source: the content of the model file.
+    :param geometry_name: Optional - the identifier of the geometry. The
+        first geometry is loaded if it's empty.
+    :param index: Optional - the index of the geometries of the file. It's
+        created if it's not provided.
+    :param trusted: Optional - skips the validation of the geometry.
+    '''
+    if index is None:
+        index = index_geometries(source)
+    entry = next(
+        (
+            entry for entry in index.geometries
+            if geometry_name in (entry.identifier, '')),
+        None)
+    # Only the keys of the root object are needed to check the file
+    root: Dict[str, Any] = {key: {} for key in index.root_keys}
+    if index.format_version is not None:
+        root['format_version'] = index.format_version
+    if 'minecraft:geometry' in root:
+        root['minecraft:geometry'] = []
+    loader = ModelLoader(root, geometry_name=None)
+    if entry is None:
+        raise ValueError(
+            f'Unable to find geometry called geometry.{geometry_name}')
+    geometry = json.loads(source[entry.start:entry.end], cls=JSONCDecoder)
+    if loader.parser_version == '1.12.0':
+        geometries_path: JsonPath = (None, 'minecraft:geometry')
+        if not isinstance(geometry.get('description'), dict):
+            raise FileIsNotAModelException(
+                f'{get_json_path((geometries_path, entry.key))}::geometry '
+                'has invalid description')
+        return loader._load_geometry_content(  # pylint: disable=protected-access
+            geometry, (geometries_path, entry.key), trusted)
+    return loader._load_geometry_content(  # pylint: disable=protected-access
+        geometry, (None, entry.key), trusted)
@@ -0,0 +1,81 @@
+'''
+Functions for saving the textures as PNG files without using Blender images
+(so the textures can be saved by scripts that run without the user
+interface).
+'''
+from __future__ import annotations
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def quantize_image(arr: np.ndarray) -> np.ndarray:
+    '''
+    Converts the image with values in range 0-1 into an array of 8-bit
+    integers (values from outside of the range are clipped).
+
+    :param arr: the image array.
+    '''
+    result = np.clip(arr, 0.0, 1.0)
+    result *= 255
+    result += 0.5  # round to the nearest integer
+    return result.astype(np.uint8)
+
+def _get_png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    '''
+    Returns the PNG chunk with the length, the type, the data and the CRC.
+    '''
+    return (
+        struct.pack('>I', len(data)) + chunk_type + data +
+        struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+def encode_png(arr: np.ndarray, compression_level: int = 6) -> bytes:
+    '''
+    Encodes the RGBA image as the content of a PNG file.
+
+    :param arr: the image array with shape (height, width, 4) and values in
+        range 0-1. The first row of the array is the bottom row of the image
+        (like in the pixels of the Blender images).
+    :param compression_level: the zlib compression level (0-9).
+    :returns: the content of the PNG file.
+    '''
+    if arr.ndim != 3 or arr.shape[2] != 4:
+        raise ValueError(
+            f'Expected RGBA image with shape (height, width, 4), got '
+            f'{arr.shape}')
+    height, width, _ = arr.shape
+    # PNG stores the rows from top to bottom
+    pixels = quantize_image(arr[::-1])
+    # Every row starts with a filter type byte (0 - no filter)
+    rows = np.zeros((height, width*4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width*4)
+
+    # 8-bit depth, color type 6 (RGBA), compression, filter and interlace
+    # methods 0
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (
+        PNG_SIGNATURE +
+        _get_png_chunk(b'IHDR', ihdr) +
+        _get_png_chunk(
+            b'IDAT', zlib.compress(rows.tobytes(), compression_level)) +
+        _get_png_chunk(b'IEND', b''))
+
+def save_png(
+        path: Union[str, Path], arr: np.ndarray,
+        compression_level: int = 6):
+    '''
+    Saves the RGBA image to a PNG file.
+
+    :param path: the path to the file.
+    :param arr: the image array with shape (height, width, 4) and values in
+        range 0-1. The first row of the array is the bottom row of the
+        image.
+    :param compression_level: the zlib compression level (0-9).
+    '''
+    with open(path, 'wb') as f:
+        f.write(encode_png(arr, compression_level))
@@ -0,0 +1,77 @@
+'''
+Running long tasks in small chunks. The module doesn't depend on bpy.
+
+The tasks are generators that yield their progress between the small steps
+of the work. The modal operators run one chunk of the task in every timer
+event so Blender stays responsive and the task can be cancelled between the
+chunks.
+'''
+from __future__ import annotations
+
+import time
+from typing import Any, Generator, Tuple
+
+# The generators of the tasks yield the progress - the amount of the done
+# work and the total amount of the work - and return the result.
+TaskSteps = Generator[Tuple[float, float], None, Any]
+
+class ChunkedTask:
+    '''
+    A task that runs in chunks limited by time.
+
+    The task is a generator that yields its progress (the amount of the done
+    work and the total amount of the work) between the steps and returns the
+    result. Cancelling the task closes the generator, so the generator can
+    clean up the partial results of the work when it gets GeneratorExit.
+
+    :param steps: the generator with the steps of the task.
+    :param time_budget: the time of running one chunk in seconds. Every
+        chunk runs at least one step.
+    '''
+    def __init__(self, steps: TaskSteps, time_budget: float = 0.05):
+        self.steps = steps
+        self.time_budget = time_budget
+        self.progress: float = 0.0
+        '''the progress of the task (0-1)'''
+        self.finished = False
+        self.result: Any = None
+
+    def run_chunk(self) -> bool:
+        '''
+        Runs the steps of the task until the time budget is used. Returns
+        True if the task is finished. The exceptions raised by the steps are
+        propagated (the generator is closed by them).
+        '''
+        if self.finished:
+            return True
+        end_time = time.perf_counter() + self.time_budget
+        try:
+            while True:
+                done, total = next(self.steps)
+                self.progress = min(done / total, 1.0) if total > 0 else 0.0
+                if time.perf_counter() >= end_time:
+                    return False
+        except StopIteration as e:
+            self.finished = True
+            self.progress = 1.0
+            self.result = e.value
+            return True
+        except BaseException:
+            self.finished = True
+            raise
+
+    def run(self) -> Any:
+        '''
+        Runs the whole task at once and returns its result.
+        '''
+        while not self.run_chunk():
+            pass
+        return self.result
+
+    def cancel(self):
+        '''
+        Cancels the unfinished task.
+        '''
+        if not self.finished:
+            self.finished = True
+            self.steps.close()
@@ -1,14 +1,21 @@
 '''
 Set of various image filters used for generating textures for models.
 Uses numpy arrays with colors with colors encoded with values in range 0-1.
+
+The images are float32 arrays modified in-place. The masks return arrays
+that can be broadcasted to the shape of the image (e.g. the ColorMask returns
+(1, 1, 3) array) to avoid allocating full size arrays for constant values.
 '''
 # pylint: disable=invalid-name
 from __future__ import annotations
 
 from itertools import cycle, accumulate
-from typing import Tuple, Iterable, NamedTuple, List, Optional, Sequence
+from typing import (
+    Tuple, Iterable, NamedTuple, List, Optional, Sequence, Dict, Hashable)
 from abc import ABC, abstractmethod
 from enum import Enum
+from threading import Lock
+import zlib
 
 import numpy as np
 
@@ -61,6 +68,29 @@ class Mask(ABC):
         :param image: The image filtered by the mask.
         '''
 
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        '''
+        A hashable value that identifies the effect of this mask. Masks
+        with equal keys give the same results for the same images. None
+        means that the result of the mask can't be cached (e.g. masks with
+        random values).
+        '''
+        return None
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        '''
+        Returns True if applying this mask to an image with given resolution
+        (number of pixels per texel of Minecraft texture) gives the same
+        result as applying it to the image scaled down to resolution 1 and
+        scaling the result up (for images that are constant in every
+        texel). Such masks can be evaluated on the smaller image.
+
+        :param resolution: the resolution of the image.
+        '''
+        # pylint: disable=unused-argument
+        return False
+
 
 class Color(NamedTuple):
     '''Color palette color.'''
@@ -95,6 +125,17 @@ class ColorPaletteMask(Mask):
         self.interpolate = interpolate
         self.normalize = normalize
 
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return (
+            'ColorPaletteMask', tuple(tuple(c) for c in self.colors),
+            self.interpolate, self.normalize)
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        # Every pixel is mapped separately. Scaling up the image doesn't
+        # change its min and max values used for normalization.
+        return True
+
     def apply(self, image: np.ndarray):
         # xp and fp for np.interp
         if self.interpolate:
@@ -125,11 +166,10 @@ class ColorPaletteMask(Mask):
             gray = np.interp(
                 gray, [np.min(gray), np.max(gray)], [0, 1]
             )
-        image[:,:,:] = np.stack([gray for _ in range(3)], axis=2)
-        # Apply filters
-        image[:,:,0] = np.interp(image[:,:,0], xp, fp_r)
-        image[:,:,1] = np.interp(image[:,:,1], xp, fp_g)
-        image[:,:,2] = np.interp(image[:,:,2], xp, fp_b)
+        # Apply filters (every channel of the image is the gray image)
+        image[:,:,0] = np.interp(gray, xp, fp_r)
+        image[:,:,1] = np.interp(gray, xp, fp_g)
+        image[:,:,2] = np.interp(gray, xp, fp_b)
 
 
 class MultiplicativeMask(Mask):
@@ -139,11 +179,28 @@ class MultiplicativeMask(Mask):
     '''
     def apply(self, image: np.ndarray):
         mask = self.get_mask(image)
-        image[:,:,:] = image*mask
+        np.multiply(image, mask, out=image)
 
     @abstractmethod
     def get_mask(self, image: np.ndarray) -> np.ndarray:
-        '''Returns 2D matrix with the filter array.'''
+        '''
+        Returns 3D matrix with the filter array. The matrix can have the
+        size of the image or it can be broadcastable to the shape of the image
+        (e.g. (1, 1, 3) for a constant color).
+        '''
+
+    def get_texel_mask(
+            self, image: np.ndarray, resolution: int) -> np.ndarray:
+        '''
+        Returns the mask for the image scaled down to resolution 1. Used
+        only for the masks that are constant in every texel (see
+        is_texel_constant).
+
+        :param image: the scaled down image.
+        :param resolution: the resolution of the original image.
+        '''
+        # pylint: disable=unused-argument
+        return self.get_mask(image)
 
 
 class DummyMask(MultiplicativeMask):
@@ -151,8 +208,17 @@ class DummyMask(MultiplicativeMask):
     A multiplicative mask that always return a white image.
     '''
     def get_mask(self, image):
-        w, h, _ = image.shape
-        return np.ones((w, h))[:,:, np.newaxis]
+        return np.ones((1, 1, 1), dtype=np.float32)
+
+    def apply(self, image: np.ndarray):
+        pass  # Multiplying by 1 doesn't change the image
+
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return ('DummyMask',)
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        return True
 
 
 class Stripe(NamedTuple):
@@ -163,10 +229,33 @@ class Stripe(NamedTuple):
     width: float
     strength: float
 
+_INTERP_BLOCK_SIZE = 2**12
+'''The number of the values interpolated at once by _interp_in_place.'''
+
+def _interp_in_place(
+        mask: np.ndarray, xp: Sequence[float], fp: Sequence[float]):
+    '''
+    Same as mask[...] = np.interp(mask, xp, fp) but without promoting the
+    whole mask to float64 (np.interp always returns float64 arrays). The
+    rows of the mask are interpolated in small blocks.
+
+    :param mask: the 2D float32 array modified in place.
+    :param xp: the x-coordinates of the data points (increasing).
+    :param fp: the y-coordinates of the data points.
+    '''
+    rows = max(1, _INTERP_BLOCK_SIZE // max(1, mask.shape[1]))
+    for i in range(0, mask.shape[0], rows):
+        mask[i:i+rows] = np.interp(mask[i:i+rows], xp, fp)
+
 class TwoPointSurfaceMask(MultiplicativeMask):
     '''
     Abstract class for masks that require two points on the textures to define
     which area should be affected.
+
+    The get_mask method of the two-point masks accepts an optional out
+    argument - a float32 array with shape (width, height, 1) of the image
+    to write the mask to. The MaskGraph uses it to reuse the buffers of the
+    released results.
     '''
     def __init__(
             self, p1: Tuple[float, float],
@@ -215,6 +304,22 @@ class TwoPointSurfaceMask(MultiplicativeMask):
             v1, v2 = min(v1, v2), max(v1, v2)
         return w, h, u1, u2, v1, v2
 
+    @staticmethod
+    def get_buffer(
+            w: int, h: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        '''
+        Returns the 2D float32 array for the mask with given width and
+        height. The array is a view of out (if provided) or a new array.
+
+        :param out: optional - the (w, h, 1) array to write the mask to.
+        '''
+        if out is None:
+            return np.empty((w, h), dtype=np.float32)
+        if out.shape != (w, h, 1) or out.dtype != np.float32:
+            raise ValueError(
+                f'Invalid buffer for the mask: {out.shape}, {out.dtype}')
+        return out[:, :, 0]
+
 class GradientMask(TwoPointSurfaceMask):
     '''
     Uses stripes with different widths and strenghts to create a grayscale
@@ -241,7 +346,14 @@ class GradientMask(TwoPointSurfaceMask):
         self.stripe_width = np.array(stripe_width)/np.sum(stripe_width)
         self.expotent=expotent
 
-    def get_mask(self, image):
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return (
+            'GradientMask', tuple(self.p1), tuple(self.p2),
+            self.relative_boundaries, tuple(self.stripe_width),
+            tuple(self.stripe_strength), self.expotent)
+
+    def get_mask(self, image, out=None):
         w, h, u1, u2, v1, v2 = self.get_surface_properties(
             image, sort_points=False)
         def split_complex(c):
@@ -260,21 +372,22 @@ class GradientMask(TwoPointSurfaceMask):
             # Standard form parameters: 0 = A*x + B*y + C
             abc = np.array([slope, -1, -slope*b_prime[0] + b_prime[1]])
 
-        crds = np.indices((w, h), dtype=float)
-        # Add one more dimension for C (assign "1" for every pixel)
-        crds = np.stack([crds[0], crds[1], np.ones((w, h))], axis=2)
+        # Row and column coordinates broadcasted to (w, h) only in the
+        # result array
+        x, y = np.ogrid[0:w, 0:h]
 
         # https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line
-        mask = np.abs(
-            np.sum(abc*crds, axis=2))/((np.sum(abc[:2]**2))**0.5
-        )
+        mask = self.get_buffer(w, h, out)
+        np.add(abc[0]*x.astype(float), abc[1]*y.astype(float), out=mask)
+        mask += abc[2]
+        np.abs(mask, out=mask)
+        mask /= (np.sum(abc[:2]**2))**0.5
         interp_len = np.linalg.norm(b-a)
 
         xp = list(accumulate(self.stripe_width*interp_len))
         fp = self.stripe_strength
-        mask = np.interp(
-            mask, xp, fp)
-        mask=mask**self.expotent
+        _interp_in_place(mask, xp, fp)
+        mask **= self.expotent
 
         return mask[:, :, np.newaxis]
 
@@ -294,7 +407,14 @@ class EllipseMask(TwoPointSurfaceMask):
         self.hard_edge = hard_edge
         self.expotent=expotent
 
-    def get_mask(self, image):
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return (
+            'EllipseMask', tuple(self.p1), tuple(self.p2),
+            self.relative_boundaries, tuple(self.strength), self.hard_edge,
+            self.expotent)
+
+    def get_mask(self, image, out=None):
         w, h, u1, u2, v1, v2 = self.get_surface_properties(image)
         # img = np.ones((w, h, 3), dtype=np.float)
         a = (u2-u1)/2
@@ -303,27 +423,25 @@ class EllipseMask(TwoPointSurfaceMask):
         b = b if b >= 1 else 1
         offset_x = np.mean([u1, u2])
         offset_y = np.mean([v1, v2])
-        crds = np.indices((w, h), dtype=float)+0.5
-        crds[0] -= offset_x
-        crds[1] -= offset_y
-        mask = crds[0]**2/a**2 + crds[1]**2/b**2
+        x, y = np.ogrid[0:w, 0:h]
+        x = (x + 0.5 - offset_x)**2/a**2
+        y = (y + 0.5 - offset_y)**2/b**2
+        mask = self.get_buffer(w, h, out)
+        np.add(x, y, out=mask)
         inside = mask <= 1
-        outside = mask > 1
-
 
         if self.hard_edge:
-            mask[outside] = self.strength[1]
+            mask[...] = self.strength[1]
             mask[inside] = self.strength[0]
         else:
+            # The min and max values of the pixels outside of the ellipse
+            min_outside = np.min(mask, where=~inside, initial=np.inf)
+            max_outside = np.max(mask, where=~inside, initial=-np.inf)
             mask[inside] = self.strength[1]
-            try:
-                mask = np.interp(mask,
-                    [np.min(mask[outside]), np.max(mask[outside])],
-                    self.strength
-                )
-            except ValueError:  # when mask[outside] or is empty
-                pass
-        mask=mask**self.expotent
+            if min_outside != np.inf:  # Some pixels are outside
+                _interp_in_place(
+                    mask, [min_outside, max_outside], self.strength)
+        mask **= self.expotent
         return mask[:, :, np.newaxis]
 
 class RectangleMask(TwoPointSurfaceMask):
@@ -343,63 +461,61 @@ class RectangleMask(TwoPointSurfaceMask):
         self.expotent = expotent
         self.hard_edge = hard_edge
 
-    def get_mask(self, image: np.ndarray):
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return (
+            'RectangleMask', tuple(self.p1), tuple(self.p2),
+            self.relative_boundaries, tuple(self.strength), self.hard_edge,
+            self.expotent)
+
+    def get_mask(self, image: np.ndarray, out: Optional[np.ndarray] = None):
         w, h, u1, u2, v1, v2 = self.get_surface_properties(image)
 
         # Create basic mask array
-        mask = np.zeros((w, h))
+        mask = self.get_buffer(w, h, out)
 
         if self.hard_edge or (u1 == 0 and v1 == 0 and w == u2+1 and h == v2+1):
             mask[:,:] = self.strength[1]
             mask[u1:u2+1, v1:v2+1] = self.strength[0]
             return mask[:, :, np.newaxis]
         # Else:
-        # Set values of 9 segments
+        # Set values of 9 segments. The distances from the rectangle are
+        # calculated from the distances of the rows (dist_top, dist_bottom)
+        # and the columns (dist_left, dist_right) broadcasted to the shapes
+        # of the segments.
+        dist_top = np.arange(u1, -1, -1, dtype=np.float32)[:, np.newaxis]
+        dist_bottom = np.arange(w-u2, dtype=np.float32)[:, np.newaxis]
+        dist_left = np.arange(v1, -1, -1, dtype=np.float32)[np.newaxis, :]
+        dist_right = np.arange(h-v2, dtype=np.float32)[np.newaxis, :]
+        zero = np.zeros((1, 1), dtype=np.float32)
+
+        def distance(segment, dist_rows, dist_columns):
+            # Computed directly in the segment of the mask
+            np.add(
+                dist_rows*dist_rows, dist_columns*dist_columns, out=segment)
+            np.sqrt(segment, out=segment)
+
         # Left top
-        segment_shape = mask[:u1+1,:v1+1].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([np.flipud(idx1), np.fliplr(idx2)])
-        mask[:u1+1,:v1+1] = np.linalg.norm(dist, axis=0)
+        distance(mask[:u1+1,:v1+1], dist_top, dist_left)
         # Top
-        segment_shape = mask[:u1+1,v1:v2+1].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([np.flipud(idx1), np.zeros(segment_shape)])
-        mask[:u1+1,v1:v2+1] = np.linalg.norm(dist, axis=0)
+        distance(mask[:u1+1,v1:v2+1], dist_top, zero)
         # Right top
-        segment_shape = mask[:u1+1,v2:].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([np.flipud(idx1), idx2])
-        mask[:u1+1,v2:] = np.linalg.norm(dist, axis=0)
+        distance(mask[:u1+1,v2:], dist_top, dist_right)
         # # Left mid
-        segment_shape = mask[u1:u2+1,:v1+1].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([np.zeros(segment_shape), np.fliplr(idx2)])
-        mask[u1:u2+1,:v1+1] = np.linalg.norm(dist, axis=0)
+        distance(mask[u1:u2+1,:v1+1], zero, dist_left)
         # # Mid
-        # # Already filled with zeros
+        mask[u1:u2+1,v1:v2+1] = 0
         # Right mid
-        segment_shape = mask[u1:u2+1,v2:].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([np.zeros(segment_shape), idx2])
-        mask[u1:u2+1,v2:] = np.linalg.norm(dist, axis=0)
+        distance(mask[u1:u2+1,v2:], zero, dist_right)
         # Left bottom
-        segment_shape = mask[u2:,:v1+1].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([idx1, np.fliplr(idx2)])
-        mask[u2:,:v1+1] = np.linalg.norm(dist, axis=0)
+        distance(mask[u2:,:v1+1], dist_bottom, dist_left)
         # Bottom
-        segment_shape = mask[u2:,v1:v2+1].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([idx1, np.zeros(segment_shape)])
-        mask[u2:,v1:v2+1] = np.linalg.norm(dist, axis=0)
+        distance(mask[u2:,v1:v2+1], dist_bottom, zero)
         # Right bottom
-        segment_shape = mask[u2:,v2:].shape
-        idx1, idx2 = np.indices(segment_shape)
-        dist = np.array([idx1, idx2])
-        mask[u2:,v2:] = np.linalg.norm(dist, axis=0)
+        distance(mask[u2:,v2:], dist_bottom, dist_right)
 
-        mask = np.interp(mask, (mask.min(), mask.max()), self.strength)
-        mask = mask**self.expotent
+        _interp_in_place(mask, (mask.min(), mask.max()), self.strength)
+        mask **= self.expotent
         return mask[:, :, np.newaxis]
 
 class StripesMask(MultiplicativeMask):
@@ -421,13 +537,36 @@ class StripesMask(MultiplicativeMask):
         self.horizontal = horizontal
         self.relative_boundaries = relative_boundaries
 
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return (
+            'StripesMask', tuple(self.stripe_width),
+            tuple(self.stripe_strength), self.horizontal,
+            self.relative_boundaries)
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        # The absolute widths are in pixels. The boundaries of the stripes
+        # match the boundaries of the texels only if all of the widths are
+        # multiples of the resolution.
+        return not self.relative_boundaries and all(
+            width % resolution == 0 for width in self.stripe_width)
+
     def get_mask(self, image: np.ndarray) -> np.ndarray:
+        return self._get_mask(image, 1)
+
+    def get_texel_mask(
+            self, image: np.ndarray, resolution: int) -> np.ndarray:
+        return self._get_mask(image, resolution)
+
+    def _get_mask(self, image: np.ndarray, resolution: int) -> np.ndarray:
         w, h, _ = image.shape
-        mask = np.ones((w, h))
+        mask = np.ones((w, h), dtype=np.float32)
 
-        stripe_width = np.array(self.stripe_width)
+        stripe_width = np.array(self.stripe_width, dtype=float)
         if self.relative_boundaries:
             stripe_width *= w if self.horizontal else h
+        else:
+            stripe_width /= resolution
 
         # One pixel is minimal stripe width
         stripe_width[stripe_width < 1] = 1
@@ -452,21 +591,42 @@ class StripesMask(MultiplicativeMask):
 class RandomMask(MultiplicativeMask):
     '''
     Creates randomly colored grayscale pixels.
+
+    The random numbers are generated by a numpy.random.Generator created
+    from the seed and the stream (see get_random_stream), so the masks with
+    the same seed create different noise on every face of the model. The
+    result doesn't depend on the order of painting the faces.
     '''
     def __init__(
             self, *, strength: Tuple[float, float]=(0.0, 1.0),
-            expotent: float=1.0, seed: Optional[int]=None):
+            expotent: float=1.0, seed: Optional[int]=None,
+            stream: Tuple[int, ...]=()):
         self.strength = strength
         self.expotent = expotent
         self.seed = seed
+        self.stream = stream
+
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        if self.seed is None:  # Every call gives different result
+            return None
+        return (
+            'RandomMask', tuple(self.strength), self.expotent, self.seed,
+            tuple(self.stream))
 
     def get_mask(self, image):
         # Get the shape of the image
         w, h, _ = image.shape
-        np.random.seed(self.seed)
-        mask = np.random.rand(w, h)
-        mask = np.interp(mask, (0.0, 1.0), self.strength)
-        mask = mask**self.expotent
+        if self.seed is None:
+            rng = np.random.default_rng()
+        else:
+            # SeedSequence accepts only non-negative integers
+            rng = np.random.default_rng([self.seed % 2**32, *self.stream])
+        mask = rng.random((w, h), dtype=np.float32)
+        # Scale the values from range 0-1 to the strength range in place
+        mask *= self.strength[1] - self.strength[0]
+        mask += self.strength[0]
+        mask **= self.expotent
         return mask[:,:,np.newaxis]
 
 class ColorMask(MultiplicativeMask):
@@ -476,14 +636,16 @@ class ColorMask(MultiplicativeMask):
     def __init__(self, color: Tuple[float, float, float]):
         self.r, self.g, self.b = color
 
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        return ('ColorMask', self.r, self.g, self.b)
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        return True
+
     def get_mask(self, image):
-        # Get the shape of the image
-        w, h, _ = image.shape
-        mask = np.zeros((w, h, 3))
-        mask[:,:,0] = self.r
-        mask[:,:,1] = self.g
-        mask[:,:,2] = self.b
-        return mask[:,:,:]
+        # Constant color is broadcasted to the shape of the image
+        return np.array([[[self.r, self.g, self.b]]], dtype=np.float32)
 
 class MixMask(MultiplicativeMask):
     '''
@@ -499,44 +661,372 @@ class MixMask(MultiplicativeMask):
         self.masks = masks
         self.mode = mode
 
+    @property
+    def cache_key(self) -> Optional[Hashable]:
+        masks_keys = tuple(m.cache_key for m in self.masks)
+        if None in masks_keys:
+            return None
+        return (
+            'MixMask', masks_keys, tuple(self.strength), self.expotent,
+            self.mode)
+
+    def is_texel_constant(self, resolution: int) -> bool:
+        return all(m.is_texel_constant(resolution) for m in self.masks)
+
     def get_mask(self, image):
-        # Get the shape of the image
-        w, h, _ = image.shape
+        return self.mix([m.get_mask(image) for m in self.masks])
+
+    def get_texel_mask(self, image, resolution):
+        return self.mix([
+            m.get_texel_mask(image, resolution) for m in self.masks])
 
+    def mix(self, mask_arrays: Sequence[np.ndarray]) -> np.ndarray:
+        '''
+        Mixes the arrays returned by the masks of this MixMask (used by
+        get_mask and by the MaskGraph, which evaluates the child masks on its
+        own).
+
+        :param mask_arrays: the results of get_mask of the masks of this
+            MixMask (in the same order).
+        '''
         # If there is no masks on the list than return blank mask
-        if len(self.masks) == 0:
-            mask = np.ones((w, h))
-            return mask[:,:,np.newaxis]
-
-        is_rgb = False
-        for m in self.masks:
-            if len(m.get_mask(image).shape) == 3:
-                is_rgb = True
-                break
-        mask_arrays = []
-        for m in self.masks:
-            mask_array = m.get_mask(image)
-            if is_rgb:
-                if len(mask_array.shape) == 2:  # Convert grayscale to RGB
-                    mask_array = np.stack(
-                        [mask_array for _ in range(3)], axis=2)
-            mask_arrays.append(mask_array)
+        if len(mask_arrays) == 0:
+            return np.ones((1, 1, 1), dtype=np.float32)
+
+        # The masks can have different shapes (grayscale, RGB or constant
+        # values). They're broadcasted to common shape and copied into
+        # preallocated stacked buffer.
+        stacked = np.empty(
+            (len(mask_arrays),) +
+            _broadcast_shape([m.shape for m in mask_arrays]),
+            dtype=np.float32)
+        for i, mask_array in enumerate(mask_arrays):
+            stacked[i] = mask_array
 
         if self.mode == 'mean':
-            mask = np.mean(mask_arrays, axis=0)
+            mask = np.mean(stacked, axis=0)
         elif self.mode == 'min':
-            mask = np.min(mask_arrays, axis=0)
+            mask = np.min(stacked, axis=0)
         elif self.mode == 'max':
-            mask = np.max(mask_arrays, axis=0)
+            mask = np.max(stacked, axis=0)
         elif self.mode == 'median':
-            mask = np.median(mask_arrays, axis=0)
+            # The buffer is temporary so it can be modified
+            mask = np.median(stacked, axis=0, overwrite_input=True)
         else:
             raise Exception(f"Unknown mix mode! {self.mode}")
 
-        mask = np.interp(mask, (0.0, 1.0), self.strength)
-        mask = mask**self.expotent
+        # Scale the mask to the strength range in place (same as np.interp
+        # without the promotion to float64)
+        np.clip(mask, 0.0, 1.0, out=mask)
+        mask *= self.strength[1] - self.strength[0]
+        mask += self.strength[0]
+        mask **= self.expotent
         return mask
 
+def _broadcast_shape(shapes: Sequence[Tuple[int, ...]]) -> Tuple[int, ...]:
+    '''
+    Returns the shape of the result of broadcasting arrays with given shapes.
+    Raises ValueError if the shapes can't be broadcasted.
+    '''
+    ndim = max(len(shape) for shape in shapes)
+    result = [1] * ndim
+    for shape in shapes:
+        for i, dim in enumerate((1,) * (ndim - len(shape)) + tuple(shape)):
+            if dim == 1:
+                continue
+            if result[i] not in (1, dim):
+                raise ValueError(
+                    f'Unable to broadcast masks with shapes {shapes}')
+            result[i] = dim
+    return tuple(result)
+
+class MaskGraph:
+    '''
+    A stack of masks compiled into a directed acyclic graph. The masks with
+    equal cache keys (on the stack and inside of the MixMasks) and the masks
+    used multiple times are represented by a single node, so every mask is
+    evaluated only once per image. The results of the nodes are released
+    after their last use.
+
+    The results of the multiplicative masks depend only on the shape of the
+    image so all of the nodes can be evaluated using the input image.
+
+    The nodes are identified by their indices. The MixMask nodes are
+    described by the indices of their children instead of the (nested) cache
+    keys of the masks, so building the graph takes linear time even for the
+    deep trees of MixMasks that reuse their masks.
+
+    :param masks: the stack of masks.
+    '''
+    def __init__(self, masks: Sequence[Mask]):
+        self.masks = masks
+        self.steps: List[Tuple[Mask, Optional[int], List[int]]] = []
+        '''
+        The masks from the stack, the indices of their nodes (None for the
+        masks that aren't multiplicative) and the indices of the nodes
+        evaluated for the first time in this step (in topological order).
+        '''
+        self.nodes: List[MultiplicativeMask] = []
+        '''The masks of the nodes of the graph.'''
+        self.node_keys: List[Hashable] = []
+        '''
+        The keys of the nodes. The cache keys for the simple masks and tuples
+        with the indices of the children for the MixMasks.
+        '''
+        self.children: Dict[int, List[int]] = {}
+        '''The indices of the children of the nodes (the MixMask nodes).'''
+        self.uses: List[int] = []
+        '''How many times the results of the nodes are used.'''
+        self.is_cacheable = True
+        '''False if any of the masks doesn't have a cache key.'''
+        self._node_by_key: Dict[Hashable, int] = {}
+        self._node_by_id: Dict[int, int] = {}
+
+        for mask in masks:
+            new_nodes: List[int] = []
+            node: Optional[int] = None
+            if isinstance(mask, MultiplicativeMask):
+                node = self._add_node(mask, new_nodes)
+                self.uses[node] += 1
+            elif mask.cache_key is None:
+                self.is_cacheable = False
+            self.steps.append((mask, node, new_nodes))
+
+    def _add_node(
+            self, mask: MultiplicativeMask, new_nodes: List[int]) -> int:
+        '''
+        Adds the mask and its children to the graph (if they aren't already
+        added) and returns the index of the node of the mask. The indices of
+        the added nodes are appended to new_nodes.
+        '''
+        if id(mask) in self._node_by_id:
+            return self._node_by_id[id(mask)]
+        children: List[int] = []
+        node_key: Hashable
+        if isinstance(mask, MixMask):
+            children = [
+                self._add_node(child, new_nodes) for child in mask.masks]
+            node_key = (
+                'MixMask', tuple(children), tuple(mask.strength),
+                mask.expotent, mask.mode)
+        else:
+            node_key = mask.cache_key
+            if node_key is None:
+                self.is_cacheable = False
+                node_key = ('id', id(mask))
+        if node_key in self._node_by_key:
+            node = self._node_by_key[node_key]
+        else:
+            node = len(self.nodes)
+            self.nodes.append(mask)
+            self.node_keys.append(node_key)
+            self.uses.append(0)
+            self._node_by_key[node_key] = node
+            if isinstance(mask, MixMask):
+                self.children[node] = children
+                for child in children:
+                    self.uses[child] += 1
+            new_nodes.append(node)
+        self._node_by_id[id(mask)] = node
+        return node
+
+    @property
+    def stack_key(self) -> Optional[Hashable]:
+        '''
+        A hashable value that identifies the effect of applying the stack of
+        masks or None if the result can't be cached. Equal stacks of masks
+        produce equal graphs, so the key is made out of the keys of the nodes
+        and the steps.
+        '''
+        if not self.is_cacheable:
+            return None
+        return (
+            tuple(self.node_keys),
+            tuple(
+                mask.cache_key if node is None else node
+                for mask, node, _ in self.steps))
+
+    def apply(self, image: np.ndarray, resolution: int = 1):
+        '''
+        Applies the stack of masks to the image.
+
+        The masks that are constant in every texel (see
+        Mask.is_texel_constant) are evaluated on the image scaled down to
+        resolution 1 and their results are scaled up. If all of the masks
+        are constant in every texel, the whole stack is applied to the
+        scaled down image. The result is the same as evaluating all of the
+        masks with full resolution.
+
+        :param image: The image filtered by the masks. The image must be
+            constant in every texel (e.g. white).
+        :param resolution: the number of pixels per texel of Minecraft
+            texture in the image.
+        '''
+        w, h, _ = image.shape
+        if w % resolution != 0 or h % resolution != 0:
+            resolution = 1
+        if resolution > 1 and all(
+                mask.is_texel_constant(resolution) for mask in self.masks):
+            small_image = np.ascontiguousarray(
+                image[::resolution, ::resolution])
+            self._apply(small_image, resolution, [True]*len(self.nodes))
+            _get_texel_view(image, resolution)[...] = (
+                small_image[:, np.newaxis, :, np.newaxis])
+            return
+        self._apply(image, resolution, [
+            resolution > 1 and node.is_texel_constant(resolution)
+            for node in self.nodes])
+
+    def _apply(
+            self, image: np.ndarray, resolution: int,
+            scaled_down: List[bool]):
+        '''
+        Applies the stack of masks to the image.
+
+        :param image: The image filtered by the masks (scaled down if all of
+            the nodes are scaled down).
+        :param resolution: the resolution of the original image.
+        :param scaled_down: whether the nodes should be evaluated on the
+            scaled down image (indexed with the indices of the nodes).
+        '''
+        is_small_image = all(scaled_down)
+        small_image = image if is_small_image else (
+            image[::resolution, ::resolution])
+        results: Dict[int, np.ndarray] = {}
+        uses = list(self.uses)
+        # The released results of the two-point masks. All of them have the
+        # shape of the image so they're reused as the buffers of the next
+        # two-point masks.
+        free_buffers: List[np.ndarray] = []
+
+        def _use_full_size(node: int) -> np.ndarray:
+            result = _use(node)
+            if scaled_down[node] and not is_small_image:
+                return _scale_up(result, resolution)
+            return result
+
+        def _use(node: int) -> np.ndarray:
+            result = results[node]
+            uses[node] -= 1
+            if uses[node] == 0:
+                del results[node]
+                if isinstance(self.nodes[node], TwoPointSurfaceMask):
+                    free_buffers.append(result)
+            return result
+
+        for mask, node, new_nodes in self.steps:
+            for new_node in new_nodes:
+                node_mask = self.nodes[new_node]
+                if isinstance(node_mask, MixMask):
+                    get_child = (
+                        _use if scaled_down[new_node] else _use_full_size)
+                    results[new_node] = node_mask.mix([
+                        get_child(child)
+                        for child in self.children[new_node]])
+                elif scaled_down[new_node]:
+                    results[new_node] = node_mask.get_texel_mask(
+                        small_image, resolution)
+                elif isinstance(node_mask, TwoPointSurfaceMask):
+                    results[new_node] = node_mask.get_mask(
+                        image, out=free_buffers.pop() if free_buffers else None)
+                else:
+                    results[new_node] = node_mask.get_mask(image)
+            if node is None:
+                mask.apply(image)
+            elif scaled_down[node] and not is_small_image:
+                # Multiply every pixel of the texels without scaling up
+                # the mask
+                texel_view = _get_texel_view(image, resolution)
+                np.multiply(
+                    texel_view, _use(node)[:, np.newaxis, :, np.newaxis],
+                    out=texel_view)
+            else:
+                np.multiply(image, _use(node), out=image)
+
+def _get_texel_view(image: np.ndarray, resolution: int) -> np.ndarray:
+    '''
+    Returns a view of the image with shape (width/resolution, resolution,
+    height/resolution, resolution, channels). The scaled down masks can be
+    broadcasted to the texels of this view.
+    '''
+    w, h, c = image.shape
+    # Splitting the axes doesn't require copying the data
+    return image.reshape(
+        (w//resolution, resolution, h//resolution, resolution, c))
+
+def _scale_up(mask: np.ndarray, resolution: int) -> np.ndarray:
+    '''
+    Scales up the mask evaluated on scaled down image. The axes with size 1
+    aren't scaled, they're broadcasted.
+    '''
+    for axis in (0, 1):
+        if mask.shape[axis] != 1:
+            mask = np.repeat(mask, resolution, axis=axis)
+    return mask
+
+class MaskTileCache:
+    '''
+    Cache of the textures (tiles) created by applying stacks of masks to
+    white images. The tiles are identified by the key of the stack of masks
+    and the shape of the tile.
+
+    The cache can be shared by multiple threads. The tiles are evaluated
+    outside of the lock, so two threads can evaluate the same tile at the
+    same time (both of them count it as a miss).
+    '''
+    def __init__(self):
+        self._lock = Lock()
+        self.tiles: Dict[Tuple[Hashable, Tuple[int, ...]], np.ndarray] = {}
+        self.hits = 0
+        '''The number of tiles copied from the cache.'''
+        self.misses = 0
+        '''The number of tiles evaluated and added to the cache.'''
+        self.uncached = 0
+        '''The number of tiles evaluated without using the cache.'''
+
+    def paint(
+            self, masks: Sequence[Mask], image: np.ndarray,
+            resolution: int = 1):
+        '''
+        Fills the RGBA image with white color and applies the masks to its
+        RGB channels. Uses the cached result if possible.
+
+        :param masks: the stack of masks.
+        :param image: the RGBA image to paint on.
+        :param resolution: the number of pixels per texel of Minecraft
+            texture in the image.
+        '''
+        image[...] = 1.0  # Set RGBA white
+        rgb = image[..., :3]  # No alpha channel filters yet
+        graph = MaskGraph(masks)
+        stack_key = graph.stack_key
+        if stack_key is None:
+            with self._lock:
+                self.uncached += 1
+            graph.apply(rgb, resolution)
+            return
+        key = (stack_key, rgb.shape)
+        with self._lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if tile is not None:
+            rgb[...] = tile
+            return
+        graph.apply(rgb, resolution)
+        with self._lock:
+            self.tiles[key] = rgb.copy()
+
+    @property
+    def hit_ratio(self) -> float:
+        '''The ratio of the tiles copied from the cache to all tiles.'''
+        total = self.hits + self.misses + self.uncached
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
 def _get_color_from_gui_color(color) -> Color:
     '''
     Returns Color object from definition created with the GUI.
@@ -550,9 +1040,25 @@ def _get_color_from_gui_color(color) -> Color:
     rgb[selector == False] = 1.055 * rgb[selector == False]**(1/2.4) - 0.055
     return Color(*rgb)
 
-def get_masks_from_side(side) -> Sequence[Mask]:
+def get_random_stream(object_name: str, side: int) -> Tuple[int, ...]:
+    '''
+    Returns the identifier of the stream of random numbers of the RandomMasks
+    used on one of the faces of an object.
+
+    :param object_name: the name of the object.
+    :param side: the number of the side of the cube (1-6).
+    '''
+    # The hash() of strings changes between the Python sessions
+    return (zlib.crc32(object_name.encode('utf8')), side)
+
+def get_masks_from_side(
+        side, stream: Tuple[int, ...]=()) -> Sequence[Mask]:
     '''
     Returns tuple of Masks from one masks side definition created in GUI.
+
+    :param side: the masks side definition.
+    :param stream: the identifier of the stream of random numbers passed to
+        the RandomMasks (see get_random_stream).
     '''
 
     def _get_masks_from_side(side: Iterable, n_steps: int) -> Sequence[Mask]:
@@ -620,7 +1126,7 @@ def get_masks_from_side(side) -> Sequence[Mask]:
                     seed = s_props.seed
                 mask = RandomMask(
                     strength=tuple(s_props.strength),  # type: ignore
-                    expotent=s_props.expotent, seed=seed)
+                    expotent=s_props.expotent, seed=seed, stream=stream)
             elif s_props.mask_type == UvMaskTypes.COLOR_MASK.value:
                 mask = ColorMask(_get_color_from_gui_color(s_props.color))
             elif s_props.mask_type == UvMaskTypes.MIX_MASK.value:
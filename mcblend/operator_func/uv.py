@@ -4,18 +4,25 @@ Functions related to creating UV map.
 from __future__ import annotations
 
 from typing import (
-    Dict, Tuple, List, Iterator, Collection, NamedTuple, Sequence)
+    Dict, Tuple, List, Iterator, Collection, NamedTuple, Sequence, Optional,
+    Set, TYPE_CHECKING)
 from enum import Enum
 from dataclasses import dataclass, field
 from itertools import filterfalse
+from concurrent.futures import ThreadPoolExecutor
+import math
+import os
 import numpy as np
 
-from .texture_generator import Mask
+from .texture_generator import Mask, MaskTileCache, MaskGraph
 from .exception import NotEnoughTextureSpace
 from .json_tools import get_vect_json
-from .common import (
-    MINECRAFT_SCALE_FACTOR, McblendObject, McblendObjectGroup, CubePolygon,
-    MeshType)
+
+# The common module depends on bpy. The UV planner (UvBox and UvMapper) must be
+# usable without Blender (e.g. in the benchmarks) so it's imported only for
+# type checking and in the functions that need Blender objects.
+if TYPE_CHECKING:
+    from .common import McblendObject, McblendObjectGroup, CubePolygon
 
 
 
@@ -49,6 +56,56 @@ class CoordinatesConverter:
         x = np.array(x).T
         return (((x-self.space_a[0])/self.scale_a)*self.scale_b)+self.space_b[0]
 
+    def convert_array(self, x: np.ndarray) -> np.ndarray:
+        '''
+        Converts many vectors at once (from space_a to space_b).
+
+        :param x: the array with shape (..., number of dimensions).
+        :returns: array with converted vectors.
+        '''
+        return (((x-self.space_a[0])/self.scale_a)*self.scale_b)+self.space_b[0]
+
+
+class TextureSizeMode(Enum):
+    '''
+    Defines how the size of the texture is picked during UV-mapping when the
+    texture is allowed to expand.
+    '''
+    EXPAND = 'Expand'
+    POWER_OF_TWO = 'Power of two'
+    MULTIPLE_OF_16 = 'Multiple of 16'
+
+def list_texture_size_modes_as_blender_enum(self, context):
+    '''
+    Returns list of tuples for creating EnumProperties with TextureSizeMode
+    enum.
+    '''
+    # pylint: disable=unused-argument
+    return [(i.value, i.value, i.value) for i in TextureSizeMode]
+
+def _texture_size_candidates(
+        mode: TextureSizeMode, minimal: int) -> Iterator[int]:
+    '''
+    Yields (infinitely) increasing texture sizes greater or equal to minimal
+    value that are valid for given TextureSizeMode.
+
+    :param mode: the TextureSizeMode (other than EXPAND).
+    :param minimal: the minimal size.
+    '''
+    if mode == TextureSizeMode.POWER_OF_TWO:
+        size = 1
+        while size < minimal:
+            size *= 2
+        while True:
+            yield size
+            size *= 2
+    elif mode == TextureSizeMode.MULTIPLE_OF_16:
+        size = max(16, math.ceil(minimal/16)*16)
+        while True:
+            yield size
+            size += 16
+    else:
+        raise ValueError(f'Unsupported texture size mode: {mode}')
 
 # (U, V) - 0, 0 = top left
 class UvCorner(Enum):
@@ -165,7 +222,8 @@ class UvBox:
             )
 
     def paint_texture(
-            self, arr: np.ndarray, resolution: int = 1
+            self, arr: np.ndarray, resolution: int = 1,
+            cache: Optional[MaskTileCache] = None
         ):
         '''
         Paints the UvBox on the texture represented by the numpy array.
@@ -173,7 +231,10 @@ class UvBox:
         :param arr: the texture array.
         :param resolution: the resolution of the Minecraft texture. Where 1 is
             standard Minecraft texture resolution (16 pixels for one block).
+        :param cache: optional - the cache of the tiles of the texture
+            created with the masks.
         '''
+        # pylint: disable=unused-argument
         min1 = int(arr.shape[0]/resolution)-int(self.uv[1]+self.size[1])
         max1 = int(arr.shape[0]/resolution)-int(self.uv[1])
         min2, max2 = int(self.uv[0]), int(self.uv[0]+self.size[0])
@@ -186,6 +247,14 @@ class UvBox:
         texture_part = arr[min1:max1, min2:max2]
         texture_part[...] = 1  # Set RGBA white
 
+    def get_painted_boxes(self) -> List[UvBox]:
+        '''
+        Returns the list of the boxes that paint this box on the texture.
+        Every box paints separate part of the texture so they can be painted
+        independently (in parallel).
+        '''
+        return [self]
+
 class McblendObjUvBox(UvBox):
     '''
     An UvBox that holds reference to an McblendObject and provides a method
@@ -211,6 +280,14 @@ class McblendObjUvBox(UvBox):
         '''
         raise NotImplementedError()
 
+    def split_faces(self) -> List[UvBox]:
+        '''
+        Returns the list of rectangles that represent the faces of this box.
+        The rectangles can be mapped independently on the texture (used for
+        per-face UV-mapping).
+        '''
+        raise NotImplementedError()
+
 class UvMcCubeFace(UvBox):
     '''
     A single face in the UvBox.
@@ -253,8 +330,23 @@ class UvMcCubeFace(UvBox):
             (self.uv[0] + self.size[0], self.uv[1]))
         uv_data[left_up].uv = converter.convert(self.uv)
 
+    def read_blender_uv(self, converter: CoordinatesConverter):
+        '''
+        Reads the UV of this face from the active UV-layer of the blender
+        object (the opposite of set_blender_uv).
+
+        :param converter: the coordinates converter used to convert from
+            Blender UV coordinates to Minecraft UV coordinates.
+        '''
+        cp_loop_indices = self.cube_polygon.side.loop_indices
+        left_up = cp_loop_indices[self.cube_polygon.order[3]]
+        uv_data = self.cube.thisobj.obj_data.uv_layers.active.data
+        u, v = converter.convert(uv_data[left_up].uv)
+        self.uv = (int(round(u)), int(round(v)))
+
     def paint_texture(
-            self, arr: np.ndarray, resolution: int = 1
+            self, arr: np.ndarray, resolution: int = 1,
+            cache: Optional[MaskTileCache] = None
         ):
         '''
         Paints the UvBox on the texture.
@@ -262,6 +354,9 @@ class UvMcCubeFace(UvBox):
         :param arr: the texture array.
         :param resolution: the resolution of the Minecraft texture. Where 1 is
             standard Minecraft texture resolution (16 pixels for one block).
+        :param cache: optional - the cache of the tiles of the texture
+            created with the masks. Faces with the same size and masks reuse
+            the cached tiles.
         '''
         min1 = int(arr.shape[0]/resolution)-int(self.uv[1]+self.size[1])
         max1 = int(arr.shape[0]/resolution)-int(self.uv[1])
@@ -271,13 +366,15 @@ class UvMcCubeFace(UvBox):
         max1 = max1 * resolution
         max2 = max2 * resolution
 
-        # Alway paint white
         texture_part = arr[min1:max1, min2:max2]
+        if cache is not None:
+            cache.paint(self.masks, texture_part, resolution)
+            return
+        # Alway paint white
         texture_part[...] = 1.0  # Set RGBA white
 
         texture_part = texture_part[..., :3]  # No alpha channel filters yet
-        for mask in self.masks:
-            mask.apply(texture_part)
+        MaskGraph(self.masks).apply(texture_part, resolution)
 
 class UvMcCube(McblendObjUvBox):
     '''
@@ -390,25 +487,62 @@ class UvMcCube(McblendObjUvBox):
         self.side5.set_blender_uv(converter)
         self.side6.set_blender_uv(converter)
 
+    def read_blender_uv(self, converter: CoordinatesConverter):
+        '''
+        Reads the UV of the faces of this cube from the active UV-layer of
+        the blender object. The faces are read separately so this works for
+        the standard and for the per-face UV-mapping.
+
+        :param converter: the coordinates converter used to convert from
+            Blender UV coordinates to Minecraft UV coordinates.
+        '''
+        self.side1.read_blender_uv(converter)
+        self.side2.read_blender_uv(converter)
+        self.side3.read_blender_uv(converter)
+        self.side4.read_blender_uv(converter)
+        self.side5.read_blender_uv(converter)
+        self.side6.read_blender_uv(converter)
+        self.is_mapped = True
+
     def clear_uv_layers(self):
+        # Don't clear the UV of the other cubes that share the mesh
+        self.thisobj.make_data_single_user()
         while len(self.thisobj.obj_data.uv_layers) > 0:
             self.thisobj.obj_data.uv_layers.remove(
                 self.thisobj.obj_data.uv_layers[0]
             )
 
     def paint_texture(
-            self, arr: np.ndarray, resolution: int = 1
+            self, arr: np.ndarray, resolution: int = 1,
+            cache: Optional[MaskTileCache] = None
         ):
-        self.side1.paint_texture(arr, resolution)
-        self.side2.paint_texture(arr, resolution)
-        self.side3.paint_texture(arr, resolution)
-        self.side4.paint_texture(arr, resolution)
-        self.side5.paint_texture(arr, resolution)
-        self.side6.paint_texture(arr, resolution)
+        self.side1.paint_texture(arr, resolution, cache)
+        self.side2.paint_texture(arr, resolution, cache)
+        self.side3.paint_texture(arr, resolution, cache)
+        self.side4.paint_texture(arr, resolution, cache)
+        self.side5.paint_texture(arr, resolution, cache)
+        self.side6.paint_texture(arr, resolution, cache)
+
+    def get_painted_boxes(self) -> List[UvBox]:
+        return [
+            self.side1, self.side2, self.side3, self.side4, self.side5,
+            self.side6
+        ]
 
     def new_uv_layer(self):
+        # The UV of the cubes that share the mesh can be different
+        self.thisobj.make_data_single_user()
         self.thisobj.obj_data.uv_layers.new()
 
+    def split_faces(self) -> List[UvBox]:
+        faces: List[UvBox] = [
+            self.side1, self.side2, self.side3, self.side4, self.side5,
+            self.side6
+        ]
+        for face in faces:
+            face.is_mapped = self.is_mapped
+        return faces
+
 class UvGroup(McblendObjUvBox):
     '''
     A collection of McblendObjUvBoxes that have the same UV mapping.
@@ -479,16 +613,145 @@ class UvGroup(McblendObjUvBox):
         for obj in self._objects:
             obj.clear_uv_layers()
 
-    def paint_texture(self, arr: np.ndarray, resolution: int = 1):
+    def paint_texture(
+            self, arr: np.ndarray, resolution: int = 1,
+            cache: Optional[MaskTileCache] = None):
         # They mapped to one place (paint only one)
         # for obj in self._objects:
         if len(self._objects) > 0 :
-            self._objects[0].paint_texture(arr, resolution)
+            self._objects[0].paint_texture(arr, resolution, cache)
+
+    def get_painted_boxes(self) -> List[UvBox]:
+        if len(self._objects) > 0:
+            return self._objects[0].get_painted_boxes()
+        return []
 
     def new_uv_layer(self):
         for obj in self._objects:
             obj.new_uv_layer()
 
+    def split_faces(self) -> List[UvBox]:
+        # Matching faces of all of the objects are grouped together
+        return [
+            UvFaceGroup(faces) for faces in
+            zip(*[obj.split_faces() for obj in self._objects])]
+
+class UvFaceGroup(UvBox):
+    '''
+    A collection of UvBoxes (the matching faces of the cubes from one
+    UvGroup) that have the same UV mapping. Used for per-face UV-mapping of
+    the UvGroups.
+
+    Internally all of the properties are read from the first box on the list.
+    '''
+    def __init__(self, faces: Sequence[UvBox]):
+        # pylint: disable=super-init-not-called
+        self._faces: List[UvBox] = list(faces)
+        for face in self._faces[1:]:
+            face.uv = self.uv
+            face.is_mapped = self.is_mapped
+
+    @property  # type: ignore
+    def uv(self) -> Tuple[int, int]:  # type: ignore
+        '''Uv of the faces.'''
+        return self._faces[0].uv
+
+    @uv.setter
+    def uv(self, uv: Tuple[int, int]):
+        for face in self._faces:
+            face.uv = uv
+
+    @property  # type: ignore
+    def size(self) -> Tuple[int, int]:  # type: ignore
+        '''Size of the faces.'''
+        return self._faces[0].size
+
+    @size.setter
+    def size(self, size: Tuple[int, int]):
+        for face in self._faces:
+            face.size = size
+
+    @property  # type: ignore
+    def is_mapped(self) -> bool:  # type: ignore
+        '''Returns whether the faces have assigned UV-mapping.'''
+        return self._faces[0].is_mapped
+
+    @is_mapped.setter
+    def is_mapped(self, val: bool):
+        for face in self._faces:
+            face.is_mapped = val
+
+    def paint_texture(
+            self, arr: np.ndarray, resolution: int = 1,
+            cache: Optional[MaskTileCache] = None):
+        # They mapped to one place (paint only one)
+        self._faces[0].paint_texture(arr, resolution, cache)
+
+    def get_painted_boxes(self) -> List[UvBox]:
+        return self._faces[0].get_painted_boxes()
+
+def get_cube_uv_size(objprop: McblendObject) -> Tuple[int, int, int]:
+    '''
+    Returns the width, the depth and the height of the cube of the object
+    used for UV-mapping (rounded down to integers like in Minecraft).
+
+    :param objprop: the object with the cube.
+    '''
+    # pylint: disable=import-outside-toplevel
+    from .common import MINECRAFT_SCALE_FACTOR
+
+    scale = (
+        objprop.mcube_size *
+        # scale
+        np.array(objprop.obj_matrix_world.decompose()[2].xzy) *
+        MINECRAFT_SCALE_FACTOR
+    )
+
+    if objprop.inflate != 0:
+        scale = scale - objprop.inflate * 2
+
+    # width, height, depth - rounded down to int
+    # first round with get_json_vect to avoid numerical errors and
+    # than round down to int (like minecraft does).
+    width, height, depth = [int(i) for i in get_vect_json(scale)]
+    return width, depth, height
+
+def paint_texture(
+        uv_boxes: Sequence[UvBox], arr: np.ndarray, resolution: int = 1,
+        cache: Optional[MaskTileCache] = None, workers: int = 1):
+    '''
+    Paints the UvBoxes on the texture represented by the numpy array. The
+    faces of the boxes are painted into separate (not overlapping) parts of
+    the array, so they can be painted by multiple threads. NumPy releases
+    the GIL during the operations on the arrays.
+
+    :param uv_boxes: the boxes to paint.
+    :param arr: the texture array.
+    :param resolution: the resolution of the Minecraft texture. Where 1 is
+        standard Minecraft texture resolution (16 pixels for one block).
+    :param cache: optional - the cache of the tiles of the texture created
+        with the masks.
+    :param workers: the number of the threads used for painting. The value
+        of 0 uses the number of the processors.
+    '''
+    painted_boxes: List[UvBox] = []
+    for uv_box in uv_boxes:
+        painted_boxes.extend(uv_box.get_painted_boxes())
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(painted_boxes))
+    if workers <= 1:
+        for painted_box in painted_boxes:
+            painted_box.paint_texture(arr, resolution, cache)
+        return
+    # The largest boxes first for better balance of the work
+    painted_boxes.sort(key=lambda b: b.size[0]*b.size[1], reverse=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results to raise the exceptions from the threads
+        list(executor.map(
+            lambda b: b.paint_texture(arr, resolution, cache),
+            painted_boxes))
+
 @dataclass
 class UvMapper:
     '''
@@ -497,17 +760,49 @@ class UvMapper:
     width: int
     height: int
     uv_boxes: List[McblendObjUvBox] = field(default_factory=list)
+    shared_area: int = 0
+    '''
+    The texture area saved by mapping the boxes to the same spots on the
+    texture (sum of the areas of the faces of the cubes added to existing
+    UvGroups, without the unused corners of their UV layouts).
+    '''
+    bone_sets: Dict[str, List[McblendObjUvBox]] = field(
+        default_factory=dict)
+    '''
+    The uv_boxes grouped by the names of the top-most objects of the
+    hierarchies of the model (the boxes from one group must be placed on the
+    same page of the texture atlas).
+    '''
+    _planned_boxes: List[UvBox] = field(default_factory=list, repr=False)
 
-    def load_uv_boxes(self, object_properties: McblendObjectGroup):
+    def load_uv_boxes(
+            self, object_properties: McblendObjectGroup,
+            auto_share: bool = False, split_bone_sets: bool = False):
         '''
         Populates the uv_boxes dictionary.
 
         # Properties:
         :prop object_properties: The properties of all of the Minecraft cubes
             and bones.
+        :prop auto_share: Whether the cubes with the same integer size and
+            identical stack of masks should share the same space on the
+            texture even if they don't belong to the same UV-group. The
+            mirrored cubes in such groups are mapped using their mirror
+            property.
+        :prop split_bone_sets: Whether the cubes from different bone sets
+            (hierarchies of the model with different top-most objects) should
+            never share the same space on the texture. Used for the texture
+            atlas because every bone set can be placed on different page.
         '''
-        # Dictionary identified by width, depth, height, group name
-        cube_uv_groups: Dict[Tuple[int, int, int, str], UvGroup] = {}
+        # pylint: disable=import-outside-toplevel
+        from .common import MeshType
+
+        # Dictionary identified by width, depth, height, group name (or the
+        # key of the masks stack if auto_share is enabled) and the name of
+        # the bone set (if split_bone_sets is enabled)
+        cube_uv_groups: Dict[Tuple[int, int, int, str, str], UvGroup] = {}
+        # Masks keys of the UV-groups keyed by the names of the groups
+        masks_keys: Dict[str, str] = {}
 
         objprop: McblendObject
         for objprop in object_properties.values():
@@ -515,38 +810,36 @@ class UvMapper:
                     objprop.obj_type != 'MESH' or
                     objprop.mesh_type != MeshType.CUBE):
                 continue
-            scale = (
-                objprop.mcube_size *
-                # scale
-                np.array(objprop.obj_matrix_world.decompose()[2].xzy) *
-                MINECRAFT_SCALE_FACTOR
-            )
-
-            if objprop.inflate != 0:
-                scale = scale - objprop.inflate * 2
-
-            # width, height, depth - rounded down to int
-            # first round with get_json_vect to avoid numerical errors and
-            # than round down to int (like minecraft does).
-            width, height, depth = [
-                int(i) for i in get_vect_json(scale)]
-            if objprop.uv_group != '':
-                curr_key = (width, depth, height, objprop.uv_group)
-                if curr_key in cube_uv_groups:
-                    cube_uv_groups[curr_key].append(
-                        UvMcCube(width, depth, height, objprop)
-                    )
-                else:
-                    cube_uv_groups[curr_key] = UvGroup(
-                        UvMcCube(width, depth, height, objprop)
-                    )
-                    self.uv_boxes.append(cube_uv_groups[curr_key])
+            width, depth, height = get_cube_uv_size(objprop)
+            if auto_share:
+                if objprop.uv_group not in masks_keys:
+                    masks_keys[objprop.uv_group] = objprop.uv_masks_key
+                group_key = masks_keys[objprop.uv_group]
             else:
-                self.uv_boxes.append(
+                group_key = objprop.uv_group
+            bone_set = objprop.root.thisobj.name
+            if auto_share or objprop.uv_group != '':
+                curr_key = (
+                    width, depth, height, group_key,
+                    bone_set if split_bone_sets else '')
+                if curr_key in cube_uv_groups:
+                    uv_cube = UvMcCube(width, depth, height, objprop)
+                    cube_uv_groups[curr_key].append(uv_cube)
+                    self.shared_area += 2 * (
+                        width * height + depth * height + width * depth)
+                    continue
+                cube_uv_groups[curr_key] = UvGroup(
                     UvMcCube(width, depth, height, objprop)
                 )
+                new_box: McblendObjUvBox = cube_uv_groups[curr_key]
+            else:
+                new_box = UvMcCube(width, depth, height, objprop)
+            self.uv_boxes.append(new_box)
+            if bone_set not in self.bone_sets:
+                self.bone_sets[bone_set] = []
+            self.bone_sets[bone_set].append(new_box)
 
-    def plan_uv(self, allow_expanding: bool):
+    def plan_uv(self, allow_expanding: bool, per_face: bool = False):
         '''
         Plans UVs for all of the boxes on the list. Uses self.width and
         self.height to limit the area unless the allow_expanding is set to
@@ -555,20 +848,52 @@ class UvMapper:
 
         :param allow_expanding: Whether the texture space can be expanded to
             fit all of the objects in it.
+        :param per_face: Whether the faces of the boxes should be mapped
+            independently (results in per-face UV-mapping which uses less
+            space on the texture).
         '''
-        self.uv_boxes.sort(key=lambda box: box.size[0], reverse=True)
+        boxes: List[UvBox]
+        if per_face:
+            boxes = [
+                face for box in self.uv_boxes for face in box.split_faces()]
+        else:
+            boxes = list(self.uv_boxes)
+        self._planned_boxes = boxes
+        boxes.sort(key=lambda box: box.size[0], reverse=True)
 
-        if allow_expanding and len(self.uv_boxes) > 0:
-            self.width = max([self.width, self.uv_boxes[0].size[0]])
+        if allow_expanding and len(boxes) > 0:
+            self.width = max([self.width, boxes[0].size[0]])
 
         suggestions: List[Suggestion] = [Suggestion((0, 0), UvCorner.TOP_LEFT)]
 
-        authors: List[UvBox] = []  # authors of the suggestions
-        mapped_boxes = []
+        authors: Set[int] = set()  # ids of the authors of the suggestions
+        mapped_boxes: List[UvBox] = []
         unmapped_boxes = []
-        for box in self.uv_boxes:
+        # The bounding rectangles of the mapped boxes (u, v, u + width,
+        # v + height). The shapes of the boxes are inside of their bounding
+        # rectangles and the boxes collide with the bounding rectangles of
+        # the other boxes, so only the boxes with overlapping rectangles
+        # need to be tested.
+        mapped_rects = np.empty((len(boxes), 4))
+
+        def _add_mapped(box):
+            mapped_rects[len(mapped_boxes)] = (
+                box.uv[0], box.uv[1], box.uv[0] + box.size[0],
+                box.uv[1] + box.size[1])
+            mapped_boxes.append(box)
+
+        def _get_near_boxes(box):
+            rects = mapped_rects[:len(mapped_boxes)]
+            u, v = box.uv
+            u_end, v_end = u + box.size[0], v + box.size[1]
+            near = np.flatnonzero(
+                (rects[:, 0] < u_end) & (u < rects[:, 2]) &
+                (rects[:, 1] < v_end) & (v < rects[:, 3]))
+            return [mapped_boxes[i] for i in near]
+
+        for box in boxes:
             if box.is_mapped:
-                mapped_boxes.append(box)
+                _add_mapped(box)
             else:
                 unmapped_boxes.append(box)
 
@@ -578,39 +903,220 @@ class UvMapper:
                 (not allow_expanding and uv[1] + size[1] > self.height)
             )
 
+        def _is_covered(position, other_box):
+            # Every box placed with the suggestion covers its position, so
+            # the suggestions covered by a mapped box can never be used
+            return (
+                other_box.uv[0] <= position[0] <
+                other_box.uv[0] + other_box.size[0] and
+                other_box.uv[1] <= position[1] <
+                other_box.uv[1] + other_box.size[1]
+            )
+
         # pylint: disable=too-many-nested-blocks
         for box in unmapped_boxes:
-            suggestion_i = -1
-            while len(suggestions) > suggestion_i + 1:
-                suggestion_i += 1
+            suggestion_i = 0
+            while len(suggestions) > suggestion_i:
                 # Apply suggestion
                 box.apply_suggestion(suggestions[suggestion_i])
 
                 # Test if box in texture space
                 if not _is_out_of_bounds(box.uv, box.size):
                     # Test if suggestion doesn't collide
-                    for other_box in mapped_boxes:
+                    for other_box in _get_near_boxes(box):
                         if box.collides(other_box):  # Bad suggestion. Find more
-                            if other_box not in authors:
-                                authors.append(other_box)
+                            if id(other_box) not in authors:
+                                authors.add(id(other_box))
                                 suggestions.extend(filterfalse(
                                     lambda x: _is_out_of_bounds(x.position),
                                     other_box.suggest_positions()
                                 ))
+                            if _is_covered(
+                                    suggestions[suggestion_i].position,
+                                    other_box):
+                                # Don't test it again for the next boxes
+                                del suggestions[suggestion_i]
+                                suggestion_i -= 1
                             break
                     else:  # didn't found collisions. Good suggestion, break the loop
                         box.is_mapped = True
-                        mapped_boxes.append(box)
+                        _add_mapped(box)
+                        del suggestions[suggestion_i]
+                        suggestions[:] = [
+                            s for s in suggestions
+                            if not _is_covered(s.position, box)]
                         suggestions.extend(filterfalse(
                             lambda x: _is_out_of_bounds(x.position),
                             box.suggest_positions()
                         ))
-                        del suggestions[suggestion_i]
                         break
+                suggestion_i += 1
             else:  # No good suggestion found for current box.
                 box.uv = (0, 0)
                 raise NotEnoughTextureSpace()
 
+    def plan_uv_minimal_size(
+            self, size_mode: TextureSizeMode, per_face: bool = False):
+        '''
+        Plans UVs for all of the boxes on the list and picks the smallest
+        texture (smallest area) with the width and the height valid for
+        size_mode (e.g. powers of two) that fits all of the boxes. The width
+        and height of the mapper are used as the minimal size of the texture.
+        The chosen size is saved in self.width and self.height.
+
+        The height for every tested width is found using binary search.
+
+        :param size_mode: the TextureSizeMode which defines valid sizes of
+            the texture (other than EXPAND).
+        :param per_face: Whether the faces of the boxes should be mapped
+            independently.
+        '''
+        boxes: List[UvBox]
+        if per_face:
+            boxes = [
+                face for box in self.uv_boxes for face in box.split_faces()]
+        else:
+            boxes = list(self.uv_boxes)
+        if len(boxes) == 0:
+            self.width = next(_texture_size_candidates(size_mode, self.width))
+            self.height = next(
+                _texture_size_candidates(size_mode, self.height))
+            return
+        # Save the state of the boxes to reset them before every attempt
+        mapped_states = [box.is_mapped for box in self.uv_boxes]
+
+        def _try_plan(width: int, height: int, expand: bool) -> bool:
+            for box, is_mapped in zip(self.uv_boxes, mapped_states):
+                box.is_mapped = is_mapped
+            self.width, self.height = width, height
+            try:
+                self.plan_uv(expand, per_face=per_face)
+            except NotEnoughTextureSpace:
+                return False
+            return True
+
+        total_area = sum(box.size[0]*box.size[1] for box in boxes)
+        min_width = max([self.width] + [box.size[0] for box in boxes])
+        min_height = max([self.height] + [box.size[1] for box in boxes])
+        lowest_height = next(_texture_size_candidates(size_mode, min_height))
+
+        best_size: Optional[Tuple[int, int]] = None
+        for width in _texture_size_candidates(size_mode, min_width):
+            if best_size is None:
+                # Expanding the height always succeeds and gives the upper
+                # limit of the height (rounded up to a valid size)
+                _try_plan(width, min_height, True)
+                max_height = next(_texture_size_candidates(
+                    size_mode, max(min_height, self.used_space()[1])))
+                max_area = width * max_height
+            else:
+                max_area = best_size[0] * best_size[1]
+                if width * lowest_height >= max_area:
+                    break  # Wider textures can't be smaller
+            # List the heights that could give better result than max_area
+            heights: List[int] = []
+            for height in _texture_size_candidates(
+                    size_mode, max(min_height, math.ceil(total_area/width))):
+                if width * height > max_area:
+                    break
+                if best_size is not None and width * height == max_area:
+                    break  # Not better than the best result
+                heights.append(height)
+                if width * height >= max_area:
+                    break
+            # Binary search for the lowest height that fits all of the boxes
+            found: Optional[int] = None
+            low, high = 0, len(heights) - 1
+            while low <= high:
+                mid = (low + high) // 2
+                if _try_plan(width, heights[mid], False):
+                    found = heights[mid]
+                    high = mid - 1
+                else:
+                    low = mid + 1
+            if found is None and best_size is None:
+                # The layout planned with the fixed height can differ from
+                # the expanded one. Use the first height that fits.
+                for height in _texture_size_candidates(size_mode, max_height):
+                    if _try_plan(width, height, False):
+                        found = height
+                        break
+            if found is not None:
+                best_size = (width, found)
+        # The last attempt was not necessarily the best one. Plan again (the
+        # planning is deterministic so it succeeds).
+        assert best_size is not None
+        _try_plan(best_size[0], best_size[1], False)
+
+    def plan_uv_atlas(self, per_face: bool = False) -> List[UvMapper]:
+        '''
+        Splits the boxes into pages of the texture atlas and plans their UVs.
+        Every page has the size of this mapper (self.width and self.height).
+        All of the boxes of a bone set (from self.bone_sets) are placed on
+        the same page. The boxes that don't belong to any bone set are
+        treated as separate bone sets. The bone sets are added to the first
+        page that can fit them (starting from the largest bone sets). The
+        boxes are planned from scratch. Raises NotEnoughTextureSpace if a bone
+        set doesn't fit on an empty page.
+
+        :param per_face: Whether the faces of the boxes should be mapped
+            independently.
+        :returns: the list of UvMappers that represent the pages of the atlas.
+            The bone_sets of the pages list the names of the bone sets
+            placed on them.
+        '''
+        bone_sets: List[Tuple[str, List[McblendObjUvBox]]] = list(
+            self.bone_sets.items())
+        in_bone_sets = set(
+            id(box) for boxes in self.bone_sets.values() for box in boxes)
+        bone_sets.extend(
+            (f'#{i}', [box]) for i, box in enumerate(self.uv_boxes)
+            if id(box) not in in_bone_sets)
+        bone_sets.sort(
+            key=lambda item: sum(box.size[0]*box.size[1] for box in item[1]),
+            reverse=True)
+
+        def _try_plan(page: UvMapper) -> bool:
+            for box in page.uv_boxes:
+                box.is_mapped = False
+            try:
+                page.plan_uv(False, per_face=per_face)
+            except NotEnoughTextureSpace:
+                return False
+            return True
+
+        pages: List[UvMapper] = []
+        for name, boxes in bone_sets:
+            for page in pages:
+                page.uv_boxes.extend(boxes)
+                if _try_plan(page):
+                    page.bone_sets[name] = boxes
+                    break
+                del page.uv_boxes[-len(boxes):]
+            else:
+                page = UvMapper(
+                    self.width, self.height, uv_boxes=list(boxes),
+                    bone_sets={name: boxes})
+                if not _try_plan(page):
+                    raise NotEnoughTextureSpace()
+                pages.append(page)
+        # The failed attempts changed the UVs of the boxes. Plan the pages
+        # again (the planning is deterministic so it succeeds).
+        for page in pages:
+            _try_plan(page)
+        return pages
+
+    def used_space(self) -> Tuple[int, int]:
+        '''
+        Returns the width and the height of the part of the texture used by
+        the boxes planned with the last plan_uv() call.
+        '''
+        width, height = 0, 0
+        for box in self._planned_boxes:
+            width = max(width, box.uv[0] + box.size[0])
+            height = max(height, box.uv[1] + box.size[1])
+        return width, height
+
     def __iter__(self) -> Iterator[McblendObjUvBox]:
         for i in self.uv_boxes:
             yield i
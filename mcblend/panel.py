@@ -534,6 +534,25 @@ class OBJECT_PT_NusiqMcblendImportPanel(bpy.types.Panel):
         self.layout.row().operator(
             "object.nusiq_mcblend_import_operator", text="Import model"
         )
+        self.layout.row().operator(
+            "object.nusiq_mcblend_batch_import_operator",
+            text="Import models (batch)"
+        )
+        self.layout.row().operator(
+            "object.nusiq_mcblend_import_animation_operator",
+            text="Import animation"
+        )
+        box = self.layout.box()
+        box.label(text="Import cache")
+        box.prop(
+            context.scene.nusiq_mcblend, "import_cache_directory",
+            text="Directory")
+        row = box.row()
+        row.operator(
+            "object.nusiq_mcblend_clear_import_cache", text="Clear")
+        row.operator(
+            "object.nusiq_mcblend_invalidate_import_cache",
+            text="Invalidate file")
 
 # Animation export panel
 class OBJECT_PT_NusiqMcblendExportAnimationPanel(bpy.types.Panel):
@@ -604,8 +623,22 @@ class OBJECT_PT_NusiqMcblendSetUvsPanel(bpy.types.Panel):
             context.scene.nusiq_mcblend, "texture_height",
             text="Texture height")
         col.prop(
-            context.scene.nusiq_mcblend, "allow_expanding",
-            text="Allow texture expanding")
+            context.scene.nusiq_mcblend, "texture_atlas",
+            text="Texture atlas")
+        if not context.scene.nusiq_mcblend.texture_atlas:
+            col.prop(
+                context.scene.nusiq_mcblend, "allow_expanding",
+                text="Allow texture expanding")
+            if context.scene.nusiq_mcblend.allow_expanding:
+                col.prop(
+                    context.scene.nusiq_mcblend, "texture_size_mode",
+                    text="Texture size")
+        col.prop(
+            context.scene.nusiq_mcblend, "auto_uv_sharing",
+            text="Automatic UV sharing")
+        col.prop(
+            context.scene.nusiq_mcblend, "per_face_uv_packing",
+            text="Per-face UV packing")
         col.prop(
             context.scene.nusiq_mcblend, "generate_texture",
             text="Generate Texture")
@@ -613,8 +646,24 @@ class OBJECT_PT_NusiqMcblendSetUvsPanel(bpy.types.Panel):
             col.prop(
                 context.scene.nusiq_mcblend, "texture_template_resolution",
                 text="Template resolution")
+            col.prop(
+                context.scene.nusiq_mcblend, "texture_generation_threads",
+                text="Threads")
+            col.prop(
+                context.scene.nusiq_mcblend, "reuse_template_image",
+                text="Reuse template image")
+            col.prop(
+                context.scene.nusiq_mcblend, "template_png_path",
+                text="PNG file")
+            if context.scene.nusiq_mcblend.template_png_path != '':
+                col.prop(
+                    context.scene.nusiq_mcblend, "template_png_only",
+                    text="Only PNG")
         self.layout.row().operator(
             "object.nusiq_mcblend_map_uv_operator", text="Set minecraft UVs")
+        self.layout.row().operator(
+            "object.nusiq_mcblend_repaint_template_operator",
+            text="Repaint template")
 
 # "Other" operators panel
 class OBJECT_PT_NusiqMcblendOperatorsPanel(bpy.types.Panel):
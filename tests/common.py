@@ -12,7 +12,10 @@ The config.py file is blacklisted in .gitignore because it can be different on
 different devices.
 '''
 import os
+import sys
 import json
+import types
+import importlib
 from typing import Optional, Tuple, Dict, Any, Set, Union, List
 from pathlib import Path
 
@@ -45,6 +48,23 @@ def blender_run_script(
         ]
     subprocess.call(command)
 
+def load_mcblend_module(name: str) -> types.ModuleType:
+    '''
+    Imports a module of mcblend.operator_func that doesn't depend on bpy
+    (e.g. "texture_generator") without running the __init__ files of the
+    addon (they need Blender).
+    '''
+    root = Path(__file__).parent.parent
+    packages = [
+        ('mcblend', root / 'mcblend'),
+        ('mcblend.operator_func', root / 'mcblend' / 'operator_func')]
+    for package_name, path in packages:
+        if package_name not in sys.modules:
+            package = types.ModuleType(package_name)
+            package.__path__ = [str(path)]  # type: ignore
+            sys.modules[package_name] = package
+    return importlib.import_module(f'mcblend.operator_func.{name}')
+
 def assert_is_vector(vect: Any, length: int, types: Tuple):
     assert isinstance(vect, list)
     assert len(vect) == length
@@ -0,0 +1,100 @@
+'''
+This is a testing script for loading the animations. It runs without
+Blender.
+
+It loads the animation timelines and checks the values of the keyframes,
+the skipped Molang keyframes and the errors raised for invalid files.
+'''
+# pylint: disable=missing-docstring
+import numpy as np
+import pytest
+
+from .common import load_mcblend_module
+
+animation_loader = load_mcblend_module('animation_loader')
+exception = load_mcblend_module('exception')
+
+def get_animation_file():
+    return {
+        'format_version': '1.8.0',
+        'animations': {
+            'animation.test.walk': {
+                'animation_length': 1.5,
+                'loop': True,
+                'anim_time_update': 'query.anim_time + 0.1',
+                'bones': {
+                    'leg': {
+                        'rotation': {
+                            '1.0': [10, '20', 30],
+                            '0.0': [0, 0, 0],
+                            '0.5': {'pre': [1, 1, 1], 'post': [2, 2, 2]},
+                            '0.75': ['math.sin(q.anim_time)', 0, 0],
+                        },
+                        'position': [0, 1, 2],
+                        'scale': 2,
+                    },
+                    'head': {'rotation': ['q.life_time', 0, 0]},
+                },
+            },
+            'animation.test.idle': {
+                'loop': 'hold_on_last_frame',
+                'bones': {'head': {'position': {'0.0': {'pre': [0, 1, 0]}}}},
+            },
+        }
+    }
+
+# PYTEST FUNCTIONS
+def test_load_animations():
+    walk, idle = animation_loader.load_animations(get_animation_file())
+    assert walk.name == 'animation.test.walk'
+    assert walk.length == 1.5
+    assert walk.loop is True
+    assert walk.anim_time_update == 'query.anim_time + 0.1'
+    # Molang keyframes are skipped and the bones without keyframes are
+    # ignored
+    assert walk.skipped_keyframes == 2
+    assert list(walk.bones) == ['leg']
+
+    rotation = walk.bones['leg']['rotation']
+    assert np.array_equal(rotation.times, [0.0, 0.5, 1.0])
+    assert np.array_equal(
+        rotation.values, [[0, 0, 0], [2, 2, 2], [10, 20, 30]])
+    position = walk.bones['leg']['position']
+    assert np.array_equal(position.times, [0.0])
+    assert np.array_equal(position.values, [[0, 1, 2]])
+    assert np.array_equal(walk.bones['leg']['scale'].values, [[2, 2, 2]])
+
+    assert idle.length is None
+    assert idle.loop is True
+    assert np.array_equal(idle.bones['head']['position'].values, [[0, 1, 0]])
+
+@pytest.mark.parametrize('path,value,message', [
+    (
+        ['bones', 'leg', 'position'], [0, 1],
+        "['animations', 'animation.test.walk', 'bones', 'leg', "
+        "'position']::vector has invalid length 2 != 3"
+    ),
+    (
+        ['bones', 'leg', 'rotation'], {'a': [0, 0, 0]},
+        "['animations', 'animation.test.walk', 'bones', 'leg', "
+        "'rotation']::a is not a valid timestamp"
+    ),
+    (
+        ['bones', 'leg'], [0, 0, 0],
+        "['animations', 'animation.test.walk', 'bones', 'leg']::bone is not "
+        "a dict"
+    ),
+])
+def test_load_animations_errors(path, value, message):
+    data = get_animation_file()
+    obj = data['animations']['animation.test.walk']
+    for key in path[:-1]:
+        obj = obj[key]
+    obj[path[-1]] = value
+    with pytest.raises(exception.FileIsNotAnAnimationException) as e:
+        animation_loader.load_animations(data)
+    assert str(e.value) == message
+
+def test_load_animations_not_an_animation():
+    with pytest.raises(exception.FileIsNotAnAnimationException):
+        animation_loader.load_animations({'format_version': '1.12.0'})
@@ -0,0 +1,130 @@
+'''
+This is a testing script for indexing the geometries of the model files. It
+runs without Blender.
+
+It compares the geometries loaded with the index with the geometries loaded
+by the ModelLoader and checks the index of the files with multiple
+geometries and comments.
+'''
+# pylint: disable=missing-docstring
+import json
+from pathlib import Path
+
+import pytest
+
+from .common import load_mcblend_module
+
+geometry_index = load_mcblend_module('geometry_index')
+model_loader = load_mcblend_module('model_loader')
+exception = load_mcblend_module('exception')
+
+MODELS_PATH = Path(__file__).parent / 'data' / 'test_importer' / 'models'
+
+MULTI_GEOMETRY_SOURCE = b'''{
+    // Comments with brackets: { [
+    "format_version": "1.12.0",
+    "minecraft:geometry": [
+        {
+            "description": {"identifier": "geometry.a", "texture_width": 32},
+            "bones": [
+                {"name": "root", "pivot": [0, 0, 0]},
+                {
+                    "name": "body", "parent": "root",
+                    "cubes": [
+                        {"origin": [0, 0, 0], "size": [1, 1, 1]},
+                        {"origin": [0, 0, 0], "size": [2, 2, 2]}
+                    ]
+                }
+            ]
+        },
+        /* "description": {"identifier": "geometry.comment"} */
+        {
+            "description": {"identifier": "geometry.\\"b\\" }"},
+            "bones": [
+                {
+                    "name": "root", "pivot": [0, 0, 0],
+                    "cubes": [{"origin": [0, 0, 0], "size": [1, 1, 1]}]
+                }
+            ]
+        }
+    ]
+}'''
+
+LEGACY_SOURCE = b'''{
+    "format_version": "1.8.0",
+    "geometry.legacy": {
+        "texturewidth": 16,
+        "bones": [{"name": "root", "pivot": [0, 0, 0], "cubes": [
+            {"origin": [0, 0, 0], "size": [1, 1, 1]}]}]
+    },
+    "geometry.legacy_child:geometry.legacy": {"bones": []}
+}'''
+
+# PYTEST FUNCTIONS
+@pytest.mark.parametrize('path', sorted(MODELS_PATH.glob('*.json')))
+def test_load_indexed_geometry(path):
+    source = path.read_bytes()
+    loader = model_loader.ModelLoader(json.loads(source))
+    geometry = model_loader.load_indexed_geometry(source)
+    assert geometry == (loader.description, loader.bones)
+
+def test_index_geometries():
+    index = geometry_index.index_geometries(MULTI_GEOMETRY_SOURCE)
+    assert index.format_version == '1.12.0'
+    assert index.root_keys == ('format_version', 'minecraft:geometry')
+    assert [
+        (entry.identifier, entry.key, entry.bone_count, entry.cube_count)
+        for entry in index.geometries
+    ] == [('geometry.a', 0, 2, 2), ('geometry."b" }', 1, 1, 1)]
+    for entry in index.geometries:
+        assert MULTI_GEOMETRY_SOURCE[entry.start:entry.start + 1] == b'{'
+        assert MULTI_GEOMETRY_SOURCE[entry.end - 1:entry.end] == b'}'
+
+    geometry = model_loader.load_indexed_geometry(
+        MULTI_GEOMETRY_SOURCE, 'geometry."b" }', index)
+    assert geometry.description['identifier'] == 'geometry."b" }'
+    assert geometry.description['texture_width'] == 64
+    assert model_loader.load_indexed_geometry(
+        MULTI_GEOMETRY_SOURCE).description['texture_width'] == 32
+    with pytest.raises(ValueError):
+        model_loader.load_indexed_geometry(
+            MULTI_GEOMETRY_SOURCE, 'geometry.missing', index)
+
+def test_index_geometries_1_8_0():
+    index = geometry_index.index_geometries(LEGACY_SOURCE)
+    assert index.format_version == '1.8.0'
+    assert [
+        (entry.identifier, entry.bone_count, entry.cube_count)
+        for entry in index.geometries
+    ] == [
+        ('geometry.legacy', 1, 1),
+        ('geometry.legacy_child:geometry.legacy', 0, 0)
+    ]
+    geometry = model_loader.load_indexed_geometry(LEGACY_SOURCE, index=index)
+    loader = model_loader.ModelLoader(json.loads(LEGACY_SOURCE))
+    assert geometry == (loader.description, loader.bones)
+
+def test_load_indexed_geometry_errors():
+    # The selected geometry is validated and the path of the error is the
+    # path in the whole file
+    source = MULTI_GEOMETRY_SOURCE.replace(b'[2, 2, 2]', b'[2, 2]')
+    with pytest.raises(exception.FileIsNotAModelException) as e:
+        model_loader.load_indexed_geometry(source, 'geometry.a')
+    assert str(e.value).startswith(
+        "['minecraft:geometry', 0, 'bones', 1, 'cubes', 1, 'size']")
+    # The other geometries aren't validated
+    model_loader.load_indexed_geometry(source, 'geometry."b" }')
+
+    # The keys of the root object are checked
+    source = MULTI_GEOMETRY_SOURCE.replace(
+        b'"format_version"', b'"extra": 1, "format_version"')
+    with pytest.raises(exception.FileIsNotAModelException):
+        model_loader.load_indexed_geometry(source)
+
+@pytest.mark.parametrize('source', [
+    b'[]', b'{"minecraft:geometry": [}', b'{"a": "b', b'{"a": 1 / 2}',
+    b'{"format_version": "1.12.0", "minecraft:geometry": [{"bones": []}]}',
+])
+def test_index_geometries_errors(source):
+    with pytest.raises(exception.FileIsNotAModelException):
+        geometry_index.index_geometries(source)
@@ -0,0 +1,68 @@
+'''
+This is a testing script for the management of the import cache. It runs
+without Blender.
+
+It checks the keys of the cached imports and removing the cached files.
+'''
+# pylint: disable=missing-docstring
+import os
+import time
+
+from .common import load_mcblend_module
+
+import_cache = load_mcblend_module('import_cache')
+
+SOURCE = b'{"format_version": "1.12.0", "minecraft:geometry": []}'
+OPTIONS = {'replace_bones_with_empties': False, 'share_cube_meshes': False}
+
+# PYTEST FUNCTIONS
+def test_get_cache_key():
+    key = import_cache.get_cache_key(SOURCE, 'geometry.a', OPTIONS)
+    assert key == import_cache.get_cache_key(
+        SOURCE, 'geometry.a', dict(reversed(OPTIONS.items())))
+    assert key.startswith(import_cache.get_source_hash(SOURCE) + '-')
+    other_keys = {
+        import_cache.get_cache_key(SOURCE + b' ', 'geometry.a', OPTIONS),
+        import_cache.get_cache_key(SOURCE, 'geometry.b', OPTIONS),
+        import_cache.get_cache_key(
+            SOURCE, 'geometry.a', {**OPTIONS, 'share_cube_meshes': True}),
+    }
+    assert key not in other_keys
+    assert len(other_keys) == 3
+
+def test_clear_cache(tmp_path):
+    assert import_cache.list_cache_files(tmp_path / 'missing') == []
+    paths = []
+    for geometry_name in ('geometry.a', 'geometry.b'):
+        path = import_cache.get_cache_path(
+            tmp_path,
+            import_cache.get_cache_key(SOURCE, geometry_name, OPTIONS))
+        path.write_bytes(b'')
+        paths.append(path)
+    other_file = tmp_path / 'notes.txt'
+    other_file.write_text('not a cached file')
+    assert import_cache.list_cache_files(tmp_path) == sorted(paths)
+
+    # Only the files unused for the given number of days are removed
+    old_time = time.time() - 3 * 24 * 60 * 60
+    os.utime(paths[0], (old_time, old_time))
+    assert import_cache.clear_cache(tmp_path, max_age_days=2) == 1
+    assert import_cache.list_cache_files(tmp_path) == [paths[1]]
+    assert import_cache.clear_cache(tmp_path) == 1
+    assert import_cache.list_cache_files(tmp_path) == []
+    assert other_file.exists()
+
+def test_invalidate_source(tmp_path):
+    other_source = SOURCE + b'\n'
+    for source in (SOURCE, other_source):
+        for geometry_name in ('geometry.a', 'geometry.b'):
+            import_cache.get_cache_path(
+                tmp_path,
+                import_cache.get_cache_key(source, geometry_name, OPTIONS)
+            ).write_bytes(b'')
+    assert import_cache.invalidate_source(tmp_path, SOURCE) == 2
+    remaining = import_cache.list_cache_files(tmp_path)
+    assert len(remaining) == 2
+    assert all(
+        path.name.startswith(import_cache.get_source_hash(other_source))
+        for path in remaining)
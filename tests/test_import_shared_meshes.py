@@ -0,0 +1,67 @@
+'''
+This is a testing script for importing models with shared meshes of the
+identical cubes.
+
+It imports a model with equal cubes at different origins and checks that
+they share one mesh and that the exported cubes are in the same places.
+'''
+# pylint: disable=missing-docstring
+import os
+import json
+from pathlib import Path
+import shutil
+
+from .common import blender_run_script
+
+OUTPUT = "./.tmp/test_import_shared_meshes"
+
+CUBES = [
+    {'origin': [0, 0, 0], 'size': [2, 2, 2], 'uv': [0, 0]},
+    {'origin': [5, 1, -3], 'size': [2, 2, 2], 'uv': [0, 0]},
+    # Different size
+    {'origin': [0, 4, 0], 'size': [1, 2, 2], 'uv': [0, 0]},
+]
+
+MODEL = {
+    'format_version': '1.12.0',
+    'minecraft:geometry': [{
+        'description': {
+            'identifier': 'geometry.shared_meshes',
+            'texture_width': 64, 'texture_height': 64
+        },
+        'bones': [{'name': 'root', 'pivot': [0, 0, 0], 'cubes': CUBES}]
+    }]
+}
+
+def setup_module(module):
+    '''Runs before tests'''
+    # pylint: disable=unused-argument
+    if os.path.exists(OUTPUT):
+        shutil.rmtree(OUTPUT)
+
+# TESTS
+def test_import_shared_meshes():
+    tmp = Path(OUTPUT).absolute()
+    tmp.mkdir(parents=True, exist_ok=True)
+    source = (tmp / 'shared_meshes.geo.json').as_posix()
+    target = (tmp / 'meshes.json').as_posix()
+    export = (tmp / 'exported.geo.json').as_posix()
+    script = os.path.abspath(
+        './blender_scripts/import_shared_meshes.py').replace('\\', '/')
+    with open(source, 'w') as f:
+        json.dump(MODEL, f)
+
+    blender_run_script(script, source, target, export)
+
+    with open(target, 'r') as f:
+        meshes = json.load(f)
+    # Two equal cubes share one mesh, the other cube has its own mesh
+    assert len(meshes) == 3
+    assert len(set(meshes)) == 2
+
+    with open(export, 'r') as f:
+        exported = json.load(f)
+    exported_cubes = exported['minecraft:geometry'][0]['bones'][0]['cubes']
+    assert sorted(
+        (cube['origin'], cube['size']) for cube in exported_cubes
+    ) == sorted((cube['origin'], cube['size']) for cube in CUBES)
@@ -0,0 +1,135 @@
+'''
+This is a testing script for loading the models. It runs without Blender.
+
+It loads the models used by the importer tests with and without the
+validation and checks the errors raised for invalid models.
+'''
+# pylint: disable=missing-docstring
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from .common import load_mcblend_module
+
+model_loader = load_mcblend_module('model_loader')
+exception = load_mcblend_module('exception')
+
+MODELS_PATH = Path(__file__).parent / 'data' / 'test_importer' / 'models'
+
+def get_model():
+    return {
+        'format_version': '1.12.0',
+        'minecraft:geometry': [{
+            'description': {'identifier': 'geometry.test'},
+            'bones': [
+                {'name': 'root', 'pivot': [0, 0, 0]},
+                {
+                    'name': 'body', 'parent': 'root',
+                    'cubes': [
+                        {'origin': [0, 0, 0], 'size': [1, 2, 3]},
+                        {
+                            'origin': [1, 1, 1], 'size': [2, 2, 2],
+                            'uv': {'north': {'uv': [0, 0]}}
+                        },
+                    ],
+                    'locators': {'hand': [0, 1, 2]}
+                }
+            ]
+        }]
+    }
+
+# PYTEST FUNCTIONS
+@pytest.mark.parametrize('path', sorted(MODELS_PATH.glob('*.json')))
+def test_trusted_model_loader(path):
+    with path.open('r') as f:
+        data = json.load(f)
+    loader = model_loader.ModelLoader(data)
+    trusted_loader = model_loader.ModelLoader(data, trusted=True)
+    assert loader.description == trusted_loader.description
+    assert loader.bones == trusted_loader.bones
+
+def test_model_loader_defaults():
+    loader = model_loader.ModelLoader(get_model())
+    assert loader.description['texture_width'] == 64
+    body = loader.bones[1]
+    assert body['mirror'] is False
+    assert body['locators'] == {'hand': [0, 1, 2]}
+    assert body['cubes'][0]['pivot'] == (0, 0, 0)
+    uv = body['cubes'][1]['uv']
+    assert uv['north'] == {
+        'uv_size': (2, 2), 'uv': [0, 0], 'material_instance': ''}
+    assert uv['south']['uv'] == (0, -1)
+
+@pytest.mark.parametrize('path,value,message', [
+    (
+        ['bones', 1, 'cubes', 1, 'origin'], [1, 2],
+        "['minecraft:geometry', 0, 'bones', 1, 'cubes', 1, 'origin']::origin "
+        "has invalid length 2 != 3"
+    ),
+    (
+        ['bones', 1, 'cubes', 1, 'uv', 'north', 'uv'], 'a',
+        "['minecraft:geometry', 0, 'bones', 1, 'cubes', 1, 'uv', 'north', "
+        "'uv']::uv is not a list"
+    ),
+    (
+        ['bones', 1, 'locators', 'hand'], 5,
+        "['minecraft:geometry', 0, 'bones', 1, 'locators', 'hand']::locator "
+        "is not an instance of"
+    ),
+    (
+        ['bones', 0, 'size'], [1, 1, 1],
+        "['minecraft:geometry', 0, 'bones', 0]::bone has unexpected "
+        "properties: {'size'}"
+    ),
+])
+def test_model_loader_errors(path, value, message):
+    data = get_model()
+    obj = data['minecraft:geometry'][0]
+    for key in path[:-1]:
+        obj = obj[key]
+    obj[path[-1]] = value
+    with pytest.raises(exception.FileIsNotAModelException) as e:
+        model_loader.ModelLoader(copy.deepcopy(data))
+    assert str(e.value).startswith(message)
+
+def test_model_loader_not_implemented():
+    data = get_model()
+    data['minecraft:geometry'][0]['bones'][0]['debug'] = True
+    with pytest.raises(exception.ImportingNotImplementedError):
+        model_loader.ModelLoader(data)
+
+def test_load_model_files(tmp_path):
+    paths = sorted(MODELS_PATH.glob('*.json'))
+    invalid_path = tmp_path / 'invalid.geo.json'
+    invalid_path.write_text('{"format_version": "1.12.0"}')
+    duplicate_path = tmp_path / 'duplicate.geo.json'
+    duplicate_path.write_text(json.dumps(get_model()))
+    paths = [duplicate_path] + paths + [invalid_path, duplicate_path]
+
+    geometries, errors = model_loader.load_model_files(paths, workers=1)
+    assert [path for path, _ in errors] == [str(invalid_path)]
+    assert 'missing properties' in errors[0][1]
+    # The first geometry with the identifier is used
+    assert geometries['geometry.test'].bones == (
+        model_loader.ModelLoader(get_model()).bones)
+    identifiers = set()
+    for path in paths[1:-2]:
+        with path.open('r') as f:
+            loader = model_loader.ModelLoader(json.load(f))
+        identifier = loader.description['identifier']
+        if identifier not in identifiers:
+            identifiers.add(identifier)
+            assert geometries[identifier] == (loader.description, loader.bones)
+    assert set(geometries) == identifiers | {'geometry.test'}
+
+    # Loading in multiple processes gives the same results
+    assert model_loader.load_model_files(paths, workers=2) == (
+        geometries, errors)
+
+    # Loading only the selected geometries
+    geometries, errors = model_loader.load_model_files(
+        paths, ['geometry.test', 'geometry.missing'], workers=1)
+    assert list(geometries) == ['geometry.test']
+    assert len(errors) == 1
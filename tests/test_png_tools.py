@@ -0,0 +1,58 @@
+'''
+This is a testing script for saving the PNG files. It runs without Blender.
+
+It encodes the images, decodes them using zlib and compares the pixels with
+the original images.
+'''
+# pylint: disable=missing-docstring
+import struct
+import zlib
+
+import numpy as np
+
+from .common import load_mcblend_module
+
+png_tools = load_mcblend_module('png_tools')
+
+def read_png_chunks(data):
+    assert data[:8] == png_tools.PNG_SIGNATURE
+    i = 8
+    while i < len(data):
+        length, = struct.unpack('>I', data[i:i+4])
+        chunk_type = data[i+4:i+8]
+        chunk_data = data[i+8:i+8+length]
+        crc, = struct.unpack('>I', data[i+8+length:i+12+length])
+        assert crc == zlib.crc32(chunk_type + chunk_data)
+        yield chunk_type, chunk_data
+        i += 12 + length
+
+def decode_png(data):
+    chunks = list(read_png_chunks(data))
+    assert [c[0] for c in chunks] == [b'IHDR', b'IDAT', b'IEND']
+    width, height, depth, color_type, _, _, _ = struct.unpack(
+        '>IIBBBBB', chunks[0][1])
+    assert (depth, color_type) == (8, 6)
+    rows = np.frombuffer(zlib.decompress(chunks[1][1]), dtype=np.uint8)
+    rows = rows.reshape(height, width*4 + 1)
+    assert np.all(rows[:, 0] == 0)
+    return rows[:, 1:].reshape(height, width, 4)
+
+# PYTEST FUNCTIONS
+def test_encode_png():
+    rng = np.random.default_rng(0)
+    arr = rng.random((13, 7, 4), dtype=np.float32)
+    arr[0, 0] = [-0.5, 1.5, 0.0, 1.0]  # Values out of range are clipped
+    pixels = decode_png(png_tools.encode_png(arr))
+    # The first row of the array is the bottom row of the image
+    assert np.array_equal(pixels, png_tools.quantize_image(arr)[::-1])
+    assert np.array_equal(pixels[-1, 0], [0, 255, 0, 255])
+    assert np.max(np.abs(pixels[::-1]/255 - np.clip(arr, 0, 1))) <= 0.5/255
+
+def test_save_png(tmp_path):
+    arr = np.ones((4, 8, 4), dtype=np.float32)
+    arr[..., 0] = 0.5
+    path = tmp_path / 'template.png'
+    png_tools.save_png(path, arr)
+    pixels = decode_png(path.read_bytes())
+    assert pixels.shape == (4, 8, 4)
+    assert np.all(pixels[..., 0] == 128)
@@ -0,0 +1,59 @@
+'''
+This is a testing script for running the tasks in chunks. It runs without
+Blender.
+'''
+# pylint: disable=missing-docstring
+import pytest
+
+from .common import load_mcblend_module
+
+scheduler = load_mcblend_module('scheduler')
+
+def get_steps(n, log):
+    try:
+        for i in range(n):
+            log.append(i)
+            yield i + 1, n
+    except GeneratorExit:
+        log.append('rollback')
+        raise
+    return sum(log)
+
+# PYTEST FUNCTIONS
+def test_chunked_task():
+    log = []
+    task = scheduler.ChunkedTask(get_steps(10, log), time_budget=0.0)
+    # Every chunk runs at least one step
+    assert task.run_chunk() is False
+    assert log == [0]
+    assert task.progress == 0.1
+    assert task.run() == 45
+    assert task.finished and task.progress == 1.0
+    assert task.run_chunk() is True
+
+def test_chunked_task_time_budget():
+    log = []
+    task = scheduler.ChunkedTask(get_steps(1000, log), time_budget=60.0)
+    assert task.run_chunk() is True
+    assert len(log) == 1000
+
+def test_chunked_task_cancel():
+    log = []
+    task = scheduler.ChunkedTask(get_steps(10, log), time_budget=0.0)
+    task.run_chunk()
+    task.run_chunk()
+    task.cancel()
+    assert log == [0, 1, 'rollback']
+    assert task.finished
+    task.cancel()  # Cancelling again does nothing
+    assert log == [0, 1, 'rollback']
+
+def test_chunked_task_exception():
+    def steps():
+        yield 1, 2
+        raise ValueError('invalid')
+    task = scheduler.ChunkedTask(steps(), time_budget=0.0)
+    task.run_chunk()
+    with pytest.raises(ValueError):
+        task.run_chunk()
+    assert task.finished
@@ -0,0 +1,268 @@
+'''
+This is a testing script for the texture generator. It runs without Blender.
+
+It applies the masks to the images with and without the cache of the tiles
+and compares the results. It also measures the memory used by the masks and
+compares the textures painted with multiple threads with the textures painted
+with one thread.
+'''
+# pylint: disable=missing-docstring
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from .common import load_mcblend_module
+
+tg = load_mcblend_module('texture_generator')
+uv = load_mcblend_module('uv')
+
+def get_mask_stacks():
+    return [
+        [tg.ColorMask((0.5, 0.2, 1.0))],
+        [
+            tg.GradientMask((0.1, 0.2), (0.8, 0.9), expotent=2.0),
+            tg.ColorMask((1.0, 0.5, 0.0))
+        ],
+        [
+            tg.EllipseMask((0.2, 0.2), (0.8, 0.8)),
+            tg.ColorPaletteMask([
+                tg.Color(1, 0, 0), tg.Color(0, 1, 0), tg.Color(0, 0, 1)],
+                interpolate=True)
+        ],
+        [
+            tg.RectangleMask((0.2, 0.3), (0.6, 0.7)),
+            tg.StripesMask([tg.Stripe(0.25, 0.2), tg.Stripe(0.25, 1.0)]),
+        ],
+        [
+            tg.MixMask([
+                tg.StripesMask(
+                    [tg.Stripe(0.3, 0.5), tg.Stripe(0.1, 1.0)],
+                    horizontal=False),
+                tg.RandomMask(seed=5),
+            ], mode='max')
+        ],
+        [
+            # The MaskGraph reuses the buffers of the two-point masks
+            tg.EllipseMask((0.1, 0.1), (0.6, 0.9), strength=(0.2, 1.0)),
+            tg.GradientMask((0.9, 0.1), (0.2, 0.5)),
+            tg.RectangleMask((0.3, 0.2), (0.5, 0.6)),
+        ],
+    ]
+
+@pytest.fixture(params=list(range(len(get_mask_stacks()))))
+def masks(request):
+    return get_mask_stacks()[request.param]
+
+def paint_without_cache(masks, shape):
+    image = np.ones(shape)
+    for mask in masks:
+        mask.apply(image[..., :3])
+    return image
+
+# PYTEST FUNCTIONS
+def test_mask_tile_cache(masks):
+    cache = tg.MaskTileCache()
+    expected = paint_without_cache(masks, (12, 7, 4))
+    for _ in range(3):
+        texture = np.zeros((20, 20, 4))
+        cache.paint(masks, texture[3:15, 5:12])
+        assert np.allclose(texture[3:15, 5:12], expected)
+        assert np.all(texture[:3] == 0)
+    assert cache.misses == 1
+    assert cache.hits == 2
+    assert cache.uncached == 0
+
+    # Equal masks created separately share the cache
+    cache.paint([tg.ColorMask((0.1, 0.1, 0.1))], np.zeros((12, 7, 4)))
+    cache.paint([tg.ColorMask((0.1, 0.1, 0.1))], np.zeros((12, 7, 4)))
+    assert cache.hits == 3
+
+    # Different shape of the tile
+    texture = np.zeros((5, 6, 4))
+    cache.paint(masks, texture)
+    assert np.allclose(texture, paint_without_cache(masks, (5, 6, 4)))
+    assert cache.hits == 3
+
+def test_mask_tile_cache_random_without_seed():
+    cache = tg.MaskTileCache()
+    masks = [tg.RandomMask()]
+    cache.paint(masks, np.zeros((4, 4, 4)))
+    cache.paint(masks, np.zeros((4, 4, 4)))
+    assert cache.uncached == 2
+    assert cache.hits == 0
+    assert len(cache.tiles) == 0
+
+def test_masks_peak_memory():
+    # Resolution 2 of 256x256 texture
+    image = np.ones((512, 512, 4), dtype=np.float32)
+    masks = [
+        tg.ColorMask((0.5, 0.2, 1.0)),
+        tg.StripesMask([tg.Stripe(0.25, 0.2), tg.Stripe(0.25, 1.0)]),
+        tg.ColorPaletteMask([tg.Color(1, 0, 0), tg.Color(0, 1, 0)]),
+        tg.DummyMask(),
+    ]
+    tracemalloc.start()
+    try:
+        for mask in masks:
+            mask.apply(image[..., :3])
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert image.dtype == np.float32
+    # The masks don't allocate arrays larger than the image
+    assert peak_memory < 1.5 * image.nbytes
+    assert tg.ColorMask((0.5, 0.2, 1.0)).get_mask(image).shape == (1, 1, 3)
+
+def test_mask_graph(masks):
+    image = np.ones((12, 7, 3), dtype=np.float32)
+    tg.MaskGraph(masks).apply(image)
+    assert np.allclose(image, paint_without_cache(masks, (12, 7, 3)))
+
+class CountingMask(tg.StripesMask):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def get_mask(self, image):
+        self.calls += 1
+        return super().get_mask(image)
+
+def test_mask_graph_deep_mix_masks():
+    # Every MixMask uses the previous MixMask twice and a shared leaf
+    leaf = CountingMask([tg.Stripe(0.3, 0.5), tg.Stripe(0.1, 1.0)])
+    mask = tg.MixMask([leaf, tg.ColorMask((0.2, 0.4, 0.6))], mode='median')
+    for _ in range(30):
+        mask = tg.MixMask([mask, mask, leaf], mode='mean', expotent=1.1)
+    stack = [mask, tg.ColorMask((0.5, 0.5, 0.5)), mask]
+
+    image = np.ones((8, 5, 3), dtype=np.float32)
+    tg.MaskGraph(stack).apply(image)
+    assert leaf.calls == 1
+    assert image.shape == (8, 5, 3)
+    assert np.all((image >= 0) & (image <= 1))
+
+def test_paint_texture_threads():
+    # 6x6 grid of faces with all of the tested stacks of masks
+    stacks = get_mask_stacks() + [[tg.RandomMask(seed=1)]]
+    faces = []
+    for i in range(36):
+        faces.append(uv.UvMcCubeFace(
+            None, None, (5, 4), stacks[i % len(stacks)],
+            uv=(i % 6 * 5, i // 6 * 4)))
+    expected = np.zeros((24*2, 30*2, 4), dtype=np.float32)
+    uv.paint_texture(faces, expected, 2, workers=1)
+    for cache in [None, tg.MaskTileCache()]:
+        texture = np.zeros((24*2, 30*2, 4), dtype=np.float32)
+        uv.paint_texture(faces, texture, 2, cache, workers=4)
+        assert np.array_equal(texture, expected)
+    assert cache.hits + cache.misses == 36
+
+def test_random_mask_streams():
+    def get_mask(seed, stream):
+        return tg.RandomMask(seed=seed, stream=stream).get_mask(
+            np.ones((6, 5, 3), dtype=np.float32))
+
+    stream_1 = tg.get_random_stream('cube', 1)
+    stream_2 = tg.get_random_stream('cube', 2)
+    mask_1 = get_mask(7, stream_1)
+    # Evaluation of other masks doesn't affect the result
+    get_mask(7, stream_2)
+    assert np.array_equal(mask_1, get_mask(7, stream_1))
+    # Different faces and seeds give different noise
+    assert not np.array_equal(mask_1, get_mask(7, stream_2))
+    assert not np.array_equal(
+        mask_1, get_mask(7, tg.get_random_stream('cube.001', 1)))
+    assert not np.array_equal(mask_1, get_mask(8, stream_1))
+    # Negative seeds are allowed
+    assert get_mask(-3, stream_1).shape == (6, 5, 1)
+    assert (
+        tg.RandomMask(seed=7, stream=stream_1).cache_key !=
+        tg.RandomMask(seed=7, stream=stream_2).cache_key)
+
+def get_texel_constant_mask_stacks():
+    stripes = tg.StripesMask(
+        [tg.Stripe(4, 0.2), tg.Stripe(8, 1.0)], relative_boundaries=False)
+    return [
+        # All of the masks are constant in every texel
+        [stripes, tg.ColorPaletteMask([tg.Color(1, 0, 0), tg.Color(0, 1, 0)])],
+        [tg.MixMask([stripes, tg.ColorMask((0.2, 0.3, 0.4))], mode='min')],
+        # Some of the masks are constant in every texel
+        [
+            tg.MixMask([stripes, tg.GradientMask((0.1, 0.2), (0.8, 0.9))]),
+            stripes,
+            tg.EllipseMask((0.2, 0.2), (0.8, 0.8)),
+        ],
+        # The widths aren't multiples of the resolution
+        [tg.StripesMask(
+            [tg.Stripe(3, 0.2), tg.Stripe(4, 1.0)],
+            relative_boundaries=False, horizontal=False)],
+    ]
+
+@pytest.fixture(params=list(range(len(get_texel_constant_mask_stacks()))))
+def texel_constant_masks(request):
+    return get_texel_constant_mask_stacks()[request.param]
+
+def test_mask_graph_resolution(masks, texel_constant_masks):
+    for stack in [masks, texel_constant_masks]:
+        texture = np.ones((40, 28, 4), dtype=np.float32)
+        tg.MaskGraph(stack).apply(texture[..., :3], 4)
+        assert np.allclose(texture, paint_without_cache(stack, (40, 28, 4)))
+
+@pytest.mark.parametrize('mask', [
+    tg.GradientMask((0.1, 0.2), (0.8, 0.9)),
+    tg.EllipseMask((0.2, 0.3), (0.7, 0.8)),
+    tg.RectangleMask((0.2, 0.3), (0.6, 0.7)),
+])
+def test_two_point_masks_peak_memory(mask):
+    image = np.ones((512, 256, 3), dtype=np.float32)
+    tracemalloc.start()
+    try:
+        result = mask.get_mask(image)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert result.shape == (512, 256, 1)
+    # No coordinate grids, only the result and one temporary array
+    assert peak_memory < 2.5 * result.nbytes
+
+def test_mix_mask_strength_float32():
+    masks = [
+        np.linspace(0, 1, 12, dtype=np.float32).reshape(3, 4, 1),
+        np.full((1, 1, 1), 0.5, dtype=np.float32)]
+    mix_mask = tg.MixMask([], mode='mean', strength=(0.2, 0.7), expotent=2.0)
+    result = mix_mask.mix(masks)
+    # The scaling doesn't promote the float32 buffer to float64
+    assert result.dtype == np.float32
+    expected = np.interp((masks[0][..., 0] + 0.5) / 2, (0, 1), (0.2, 0.7))
+    assert np.allclose(result[..., 0], expected ** 2.0, atol=1e-6)
+
+@pytest.mark.parametrize('mask', [
+    tg.GradientMask((0.1, 0.2), (0.8, 0.9), expotent=2.0),
+    tg.EllipseMask((0.2, 0.3), (0.7, 0.8)),
+    tg.EllipseMask((0.2, 0.3), (0.7, 0.8), hard_edge=True),
+    tg.RectangleMask((0.2, 0.3), (0.6, 0.7)),
+    tg.RectangleMask((0.2, 0.3), (0.6, 0.7), hard_edge=True),
+    tg.RandomMask(strength=(0.2, 0.7), seed=1),
+])
+def test_masks_float32(mask):
+    image = np.ones((40, 28, 3), dtype=np.float32)
+    result = mask.get_mask(image)
+    # The masks don't return full size float64 arrays
+    assert result.dtype == np.float32
+    assert result.shape == (40, 28, 1)
+
+@pytest.mark.parametrize('mask', [
+    tg.GradientMask((0.1, 0.2), (0.8, 0.9), expotent=2.0),
+    tg.EllipseMask((0.2, 0.3), (0.7, 0.8)),
+    tg.RectangleMask((0.2, 0.3), (0.6, 0.7)),
+    tg.RectangleMask((0.2, 0.3), (0.6, 0.7), hard_edge=True),
+])
+def test_two_point_masks_out(mask):
+    image = np.ones((40, 28, 3), dtype=np.float32)
+    out = np.full((40, 28, 1), 7.0, dtype=np.float32)
+    result = mask.get_mask(image, out=out)
+    assert np.shares_memory(result, out)
+    assert np.array_equal(out, mask.get_mask(image))
+    with pytest.raises(ValueError):
+        mask.get_mask(image, out=np.empty((40, 28, 1)))
@@ -0,0 +1,114 @@
+'''
+This is a testing script for the UV-packing. It runs without Blender.
+
+It plans the UV of the synthetic sets of cubes from the benchmark and checks
+if the boxes don't overlap and if the textures aren't larger than the
+baseline.
+'''
+# pylint: disable=missing-docstring
+import json
+from itertools import combinations
+
+import pytest
+from benchmarks.uv_packing import (
+    BOX_SETS, STRATEGIES, BASELINE_PATH, uv)
+
+
+@pytest.fixture(params=list(BOX_SETS))
+def set_name(request):
+    return request.param
+
+@pytest.fixture(params=list(STRATEGIES))
+def strategy_name(request):
+    return request.param
+
+# PYTEST FUNCTIONS
+def test_uv_packing(set_name, strategy_name):
+    box_set = BOX_SETS[set_name]
+    cubes = box_set.generate(box_set.default_count)
+    strategy = STRATEGIES[strategy_name]
+
+    mapper = uv.UvMapper(16, 16)
+    mapper.uv_boxes = strategy.create_boxes(cubes)
+    if strategy.size_mode == uv.TextureSizeMode.EXPAND:
+        mapper.plan_uv(True)
+        width = max(mapper.width, mapper.used_space()[0])
+        height = max(mapper.height, mapper.used_space()[1])
+    else:
+        mapper.plan_uv_minimal_size(strategy.size_mode)
+        width, height = mapper.width, mapper.height
+        if strategy.size_mode == uv.TextureSizeMode.POWER_OF_TWO:
+            assert width & (width - 1) == 0
+            assert height & (height - 1) == 0
+        elif strategy.size_mode == uv.TextureSizeMode.MULTIPLE_OF_16:
+            assert width % 16 == 0 and height % 16 == 0
+
+    for box in mapper.uv_boxes:
+        assert box.is_mapped
+        assert box.uv[0] >= 0 and box.uv[1] >= 0
+        assert box.uv[0] + box.size[0] <= width
+        assert box.uv[1] + box.size[1] <= height
+    for box_a, box_b in combinations(mapper.uv_boxes, 2):
+        assert not box_a.collides(box_b)
+
+    with BASELINE_PATH.open('r') as f:
+        baseline = json.load(f)
+    name = f'{set_name}[{box_set.default_count}]/{strategy_name}'
+    assert width*height <= baseline[name]['area']
+
+def test_uv_packing_atlas(set_name):
+    box_set = BOX_SETS[set_name]
+    cubes = box_set.generate(box_set.default_count)
+
+    mapper = uv.UvMapper(64, 64)
+    mapper.uv_boxes = STRATEGIES['cube_expand'].create_boxes(cubes)
+    # Every 4 cubes make a bone set
+    for i, box in enumerate(mapper.uv_boxes):
+        mapper.bone_sets.setdefault(f'bone_set_{i//4}', []).append(box)
+    pages = mapper.plan_uv_atlas()
+
+    assert sum(len(page.uv_boxes) for page in pages) == len(mapper.uv_boxes)
+    for page in pages:
+        for boxes in page.bone_sets.values():
+            for box in boxes:
+                assert box in page.uv_boxes
+        for box in page.uv_boxes:
+            assert box.is_mapped
+            assert box.uv[0] >= 0 and box.uv[1] >= 0
+            assert box.uv[0] + box.size[0] <= 64
+            assert box.uv[1] + box.size[1] <= 64
+        for box_a, box_b in combinations(page.uv_boxes, 2):
+            assert not box_a.collides(box_b)
+
+@pytest.mark.parametrize('size_mode,sizes,expected', [
+    (uv.TextureSizeMode.POWER_OF_TWO, [(10, 70)], (16, 128)),
+    (uv.TextureSizeMode.POWER_OF_TWO, [(64, 20), (64, 20)], (64, 64)),
+    (uv.TextureSizeMode.MULTIPLE_OF_16, [(10, 70)], (16, 80)),
+    (uv.TextureSizeMode.MULTIPLE_OF_16, [(64, 20), (64, 20)], (64, 48)),
+])
+def test_uv_packing_minimal_size_non_square(size_mode, sizes, expected):
+    # The boxes which aren't square used to make the search loop forever
+    mapper = uv.UvMapper(16, 16)
+    mapper.uv_boxes = [uv.UvBox(size) for size in sizes]
+    mapper.plan_uv_minimal_size(size_mode)
+    assert (mapper.width, mapper.height) == expected
+    for box in mapper.uv_boxes:
+        assert box.is_mapped
+        assert box.uv[0] + box.size[0] <= mapper.width
+        assert box.uv[1] + box.size[1] <= mapper.height
+    for box_a, box_b in combinations(mapper.uv_boxes, 2):
+        assert not box_a.collides(box_b)
+
+def test_uv_packing_face_groups():
+    # The matching faces of the cubes from one UV-group share the space
+    faces = [uv.UvBox((4, 2)), uv.UvBox((4, 2))]
+    group = uv.UvFaceGroup(faces)
+    mapper = uv.UvMapper(16, 16)
+    mapper.uv_boxes = [uv.UvBox((8, 8)), group, uv.UvBox((6, 3))]
+    mapper.plan_uv(False)
+    assert group.get_painted_boxes() == [faces[0]]
+    for face in faces:
+        assert face.is_mapped
+        assert face.uv == group.uv
+    for box_a, box_b in combinations(mapper.uv_boxes, 2):
+        assert not box_a.collides(box_b)
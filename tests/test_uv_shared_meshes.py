@@ -0,0 +1,66 @@
+'''
+This is a testing script for the UV-mapping of the cubes imported with shared
+meshes.
+
+It imports a model with identical cubes that share a mesh, maps the UV of one
+of them and checks that the UV layers of the other cubes are kept.
+'''
+# pylint: disable=missing-docstring
+import os
+import json
+from pathlib import Path
+import shutil
+
+from .common import blender_run_script
+
+OUTPUT = "./.tmp/test_uv_shared_meshes"
+
+MODEL = {
+    'format_version': '1.12.0',
+    'minecraft:geometry': [{
+        'description': {
+            'identifier': 'geometry.shared_meshes',
+            'texture_width': 64, 'texture_height': 64
+        },
+        'bones': [{
+            'name': 'root', 'pivot': [0, 0, 0],
+            'cubes': [
+                {
+                    'origin': [i*4, 0, 0], 'pivot': [i*4, 0, 0],
+                    'size': [2, 2, 2], 'uv': [0, 0]
+                }
+                for i in range(3)
+            ]
+        }]
+    }]
+}
+
+def setup_module(module):
+    '''Runs before tests'''
+    # pylint: disable=unused-argument
+    if os.path.exists(OUTPUT):
+        shutil.rmtree(OUTPUT)
+
+# TESTS
+def test_map_uv_shared_meshes():
+    tmp = Path(OUTPUT).absolute()
+    tmp.mkdir(parents=True, exist_ok=True)
+    source = (tmp / 'shared_meshes.geo.json').as_posix()
+    target = (tmp / 'result.json').as_posix()
+    script = os.path.abspath(
+        './blender_scripts/map_uv_shared_meshes.py').replace('\\', '/')
+    with open(source, 'w') as f:
+        json.dump(MODEL, f)
+
+    blender_run_script(script, source, target)
+
+    with open(target, 'r') as f:
+        result = json.load(f)
+    # The cubes shared the mesh after the import
+    assert result['shared_before'] == [3, 3, 3]
+    mapped, *others = result['cubes']
+    # The mapped cube got its own mesh and the other cubes kept their UV
+    assert mapped['mesh'] not in [cube['mesh'] for cube in others]
+    assert mapped['uv_layers'] == 1
+    for cube in others:
+        assert cube['uv_layers'] == 1